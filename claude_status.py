@@ -4,14 +4,64 @@
 #!/usr/bin/env python3
 
 import argparse
+import json
 import os
 import shutil
+import sys
 import time
 from pathlib import Path
-from typing import Optional, Tuple
-
-from src.git_integration import GitIntegration
+from typing import Dict, List, Optional, Tuple
+
+from src.activity import UNKNOWN
+from src.commit_timeline import (
+    CommitTimeline,
+    correlate,
+    read_todo_events,
+    todo_work_periods,
+)
+from src.compressed import SESSION_PATTERNS, list_sessions
+from src.extractors import SESSION_METRICS, ExtractorRegistry
+from src.git_cache import GitStatusCache
+from src.git_integration import find_git_dir
 from src.jsonl_parser import JSONLParser
+from src.parse_cache import ParseCache
+from src.poll_scheduler import BACKOFF_FACTOR, AdaptivePoller
+from src.project_index import ProjectIndex, project_folder_name
+from src.search_index import SearchIndex, SearchIndexError
+from src.sections import SectionRunner, load_entry_point_sections, load_section_spec
+from src.session_archive import DEFAULT_FINISHED_AFTER, SessionArchive
+from src.status_collector import ProjectStatus, collect_sessions, collect_status
+from src.status_file import StatusFileWriter
+from src.status_history import StatusHistory
+from src.status_server import StatusBoard, StatusServer
+from src.text_width import exceeds_width, truncate_to_width
+from src.todos import TodoList, TodoStatus
+from src.tool_latency import ToolLatencyCache
+from src.usage_report import UsageReportCache
+
+# Seconds a display without --budget-ms waits for git on a repository that has
+# nothing cached yet; cached answers are shown at once and refreshed behind
+COLD_GIT_WAIT = 1.0
+
+# Seconds after which --update redraws even if nothing changed, so that
+# "N minutes ago" labels stay current; while nothing changes, the forced
+# redraw backs off from the --update interval up to this
+REDRAW_INTERVAL = 60
+
+# Shortest wait between redraws, even for sections asking for ttl=0
+MIN_REDRAW_WAIT = 1.0
+
+# Files below the git directory that change on commits, checkouts and staging
+GIT_WATCHED_FILES = ("HEAD", "index", "logs/HEAD")
+
+# Seconds between refreshes of the served status unless --update says otherwise
+SERVE_INTERVAL = 2
+
+# Session metrics included in JSON output, gathered while parsing
+METRICS = ExtractorRegistry(SESSION_METRICS)
+
+# Characters of the last prompt kept for display; pasted prompts can be huge
+PROMPT_PREVIEW_CHARS = 4000
 
 
 class Colors:
@@ -37,70 +87,105 @@ def get_minutes_ago(timestamp_seconds: float) -> int:
     return round(seconds_ago / 60)
 
 
-def get_current_todo_with_status(todos: list) -> Tuple[str, bool]:
+def get_current_todo_with_status(todos: TodoList) -> Tuple[str, bool]:
     """Get the most current todo with completion status
 
     Args:
-        todos: List of todo dictionaries
+        todos: Parsed todo list; its current todo is chosen when it is built
 
     Returns:
         Tuple of (todo_text, is_completed)
     """
-    if not todos:
+    if not todos or todos.current is None:
         return "No todos", False
+    return todos.current.content, todos.current_completed
 
-    # First look for in_progress todos
-    for todo in todos:
-        if todo.get("status") == "in_progress":
-            return todo.get("content", "Unknown todo"), False
-
-    # If no in_progress, find the first pending todo
-    for todo in todos:
-        if todo.get("status") == "pending":
-            return todo.get("content", "Unknown todo"), False
 
-    # If all completed, return the last one
-    last_todo = todos[-1]
-    is_completed = last_todo.get("status") == "completed"
-    return last_todo.get("content", "Unknown todo"), is_completed
-
-
-def get_default_jsonl_path(cwd: Optional[str] = None) -> Optional[Path]:
-    """Get the default JSONL file path based on current working directory
+def get_project_folder(
+    cwd: Optional[str] = None, project_index: Optional[ProjectIndex] = None
+) -> Path:
+    """Get the Claude project folder holding the sessions of a directory
 
     Args:
         cwd: Current working directory. If None, uses os.getcwd()
+        project_index: Index of real project paths; lets a subdirectory of a
+            project find the project's sessions
 
     Returns:
-        Path to the most recent JSONL file, or None if not found
+        Path of the folder under ~/.claude/projects, which may not exist
     """
     if cwd is None:
         cwd = os.getcwd()
 
-    # Convert path to folder name (e.g., /var/home/a/Code/ClaudeStatus -> -var-home-a-Code-ClaudeStatus)  # noqa: E501
-    folder_name = cwd.replace("/", "-")
+    folder_name = project_index.folder_for(cwd) if project_index else None
+    if folder_name is None:
+        # Convert path to folder name (e.g., /var/home/a/Code/ClaudeStatus -> -var-home-a-Code-ClaudeStatus)  # noqa: E501
+        folder_name = project_folder_name(cwd)
 
     # Base directory for Claude projects
-    base_dir = Path.home() / ".claude" / "projects" / folder_name
+    return Path.home() / ".claude" / "projects" / folder_name
+
+
+def get_session_paths(
+    cwd: Optional[str] = None,
+    project_index: Optional[ProjectIndex] = None,
+    within: Optional[float] = None,
+) -> List[Path]:
+    """Get the session files of a project, most recently modified first
 
+    Args:
+        cwd: Current working directory. If None, uses os.getcwd()
+        project_index: Index of real project paths
+        within: Only include files modified in the last ``within`` seconds
+
+    Returns:
+        Paths of the JSONL files, including gzip and zstd compressed ones,
+        empty if there are none
+    """
+    base_dir = get_project_folder(cwd, project_index)
     if not base_dir.exists():
-        return None
+        return []
+
+    modified = []
+    for jsonl_path in (
+        path for pattern in SESSION_PATTERNS for path in base_dir.glob(pattern)
+    ):
+        try:
+            modified.append((jsonl_path.stat().st_mtime, jsonl_path))
+        except OSError:
+            continue  # removed since the directory was listed
 
-    # Find most recent .jsonl file
-    jsonl_files = list(base_dir.glob("*.jsonl"))
-    if not jsonl_files:
-        return None
+    if within is not None:
+        cutoff = time.time() - within
+        modified = [(mtime, path) for mtime, path in modified if mtime >= cutoff]
 
     # Sort by modification time, most recent first
-    jsonl_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    return jsonl_files[0]
+    modified.sort(key=lambda item: item[0], reverse=True)
+    return [path for _, path in modified]
+
+
+def get_default_jsonl_path(
+    cwd: Optional[str] = None, project_index: Optional[ProjectIndex] = None
+) -> Optional[Path]:
+    """Get the default JSONL file path based on current working directory
+
+    Args:
+        cwd: Current working directory. If None, uses os.getcwd()
+        project_index: Index of real project paths; lets a subdirectory of a
+            project find the project's sessions
+
+    Returns:
+        Path to the most recent JSONL file, or None if not found
+    """
+    jsonl_files = get_session_paths(cwd, project_index)
+    return jsonl_files[0] if jsonl_files else None
 
 
-def format_todo_status(todos: list, detailed: bool = False) -> str:
+def format_todo_status(todos: TodoList, detailed: bool = False) -> str:
     """Format todo list for display
 
     Args:
-        todos: List of todo dictionaries
+        todos: Parsed todo list
         detailed: If True, show full todo list with strikethrough for completed items
 
     Returns:
@@ -113,55 +198,66 @@ def format_todo_status(todos: list, detailed: bool = False) -> str:
         # Show full todo list with checkbox-style markers
         todo_lines = []
         for todo in todos:
-            content = todo.get("content", "Unknown todo")
-            status = todo.get("status", "unknown")
-            priority = todo.get("priority", "")
-
             # Format checkbox based on completion status
-            checkbox = "[x]" if status == "completed" else "[ ]"
+            checkbox = "[x]" if todo.is_completed else "[ ]"
 
             # Format priority marker
+            priority = todo.priority.value
             priority_marker = f" [{priority.upper()}]" if priority else ""
 
             # Format the todo line
-            todo_line = f"  {checkbox}{priority_marker} {content}"
+            todo_line = f"  {checkbox}{priority_marker} {todo.content}"
 
             todo_lines.append(todo_line)
 
         return "\n".join(todo_lines)
     else:
-        # Show summary counts
-        status_counts: dict[str, int] = {}
-        for todo in todos:
-            status = todo.get("status", "unknown")
-            status_counts[status] = status_counts.get(status, 0) + 1
+        # Show summary counts, computed when the list was parsed
+        parts = [f"{count} {status}" for status, count in todos.counts.items()]
+        return f"Todos: {', '.join(parts)}"
 
-        parts = []
-        for status, count in status_counts.items():
-            parts.append(f"{count} {status}")
 
-        return f"Todos: {', '.join(parts)}"
+def should_show_todos(status: ProjectStatus) -> bool:
+    """Decide whether the todo list belongs to the current prompt
 
+    Args:
+        status: Collected project status
 
-def display_status(
-    jsonl_path: Optional[Path],
+    Returns:
+        True if todos exist and were written at or after the last user prompt
+    """
+    if not status.todos:
+        return False
+    if status.todos_timestamp and status.prompt_timestamp:
+        # Show todos only if they're newer than or same time as the last user prompt
+        return status.todos_timestamp >= status.prompt_timestamp
+    # If no user prompt timestamp, show todos
+    return not status.prompt_timestamp
+
+
+def render_status(
+    status: ProjectStatus,
     two_line: bool = False,
     terminal_width: Optional[int] = None,
-) -> None:
-    """Display the current status
+    include_session: bool = True,
+    include_git: bool = True,
+) -> str:
+    """Render a collected project status as display text
 
     Args:
-        jsonl_path: Path to JSONL file to parse
+        status: Collected project status
         two_line: Whether to format as two lines
         terminal_width: Terminal width for formatting (auto-detected if None)
+        include_session: Whether the multi-line format shows the prompt, agent,
+            todos and subagents
+        include_git: Whether the multi-line format shows the commit and tree
+
+    Returns:
+        The rendered status, without a trailing newline
     """
     if terminal_width is None:
         terminal_width = shutil.get_terminal_size().columns
 
-    # Initialize components
-    parser = JSONLParser()
-    git = GitIntegration()
-
     # Get data with timestamps
     last_prompt = "No user prompt found"
     todos_info = "No todos found"
@@ -173,50 +269,39 @@ def display_status(
     git_minutes_ago = None
     show_todos = False
 
-    if jsonl_path and jsonl_path.exists():
-        # Get prompt with timestamp from JSONL entries
-        prompt, prompt_timestamp = parser.get_last_user_prompt_with_timestamp(
-            jsonl_path
-        )
-        if prompt:
-            last_prompt = prompt
-            if prompt_timestamp:
-                prompt_minutes_ago = get_minutes_ago(prompt_timestamp)
-
-        # Get todos with timestamp from JSONL entries
-        todos, todos_timestamp = parser.get_latest_todo_list_with_timestamp(jsonl_path)
-
-        # Only show todos if they were created after the last user prompt
-        show_todos = False
-        if todos and todos_timestamp and prompt_timestamp:
-            # Show todos only if they're newer than or same time as the last user prompt
-            if todos_timestamp >= prompt_timestamp:
-                show_todos = True
-        elif todos and not prompt_timestamp:
-            # If no user prompt timestamp, show todos
-            show_todos = True
-
-        if show_todos and todos:
-            # Use detailed format for multi-line, summary for two-line
-            todos_info = format_todo_status(todos, detailed=not two_line)
-            if todos_timestamp:
-                todos_minutes_ago = get_minutes_ago(todos_timestamp)
-        else:
-            # Don't show todos - they're older than the last user prompt
-            # Keep todos for two-line format logic, but mark as not showing
-            todos_info = "No todos found"
-
-    if git.is_git_repository():
-        commit_msg = git.get_last_commit_message()
-        commit_timestamp = git.get_last_commit_timestamp()
-
-        if commit_msg:
-            git_message = commit_msg
-            if commit_timestamp:
-                git_minutes_ago = get_minutes_ago(commit_timestamp)
+    prompt_timestamp = status.prompt_timestamp
+    todos = status.todos
+    todos_timestamp = status.todos_timestamp
+
+    if status.prompt:
+        last_prompt = status.prompt
+        if prompt_timestamp:
+            prompt_minutes_ago = get_minutes_ago(prompt_timestamp)
+
+    # Only show todos if they were created after the last user prompt
+    show_todos = should_show_todos(status)
+
+    if show_todos and todos:
+        # Use detailed format for multi-line, summary for two-line
+        todos_info = format_todo_status(todos, detailed=not two_line)
+        if todos_timestamp:
+            todos_minutes_ago = get_minutes_ago(todos_timestamp)
+    else:
+        # Don't show todos - they're older than the last user prompt
+        todos_info = "No todos found"
+
+    if status.git_pending:
+        git_message = "Checking git..."
+    elif status.is_git_repository:
+        if status.commit_message:
+            git_message = status.commit_message
+            if status.commit_timestamp:
+                git_minutes_ago = get_minutes_ago(status.commit_timestamp)
         else:
             git_message = "Git repository (no commits)"
 
+    tree = status.working_tree
+
     # Format labels with time information and colors
     prompt_label = f"{Colors.CYAN}Prompt"
     if prompt_minutes_ago is not None:
@@ -228,38 +313,43 @@ def display_status(
         git_label += f" ({git_minutes_ago} minutes ago)"
     git_label += f"{Colors.RESET}"
 
+    tree_label = f"{Colors.CYAN}Tree"
+    if status.working_tree_age is not None:
+        tree_label += f" ({round(status.working_tree_age)} seconds ago)"
+    tree_label += f"{Colors.RESET}"
+
     todos_label = f"{Colors.CYAN}Todos"
     if todos_minutes_ago is not None:
         todos_label += f" ({todos_minutes_ago} minutes ago)"
     todos_label += f"{Colors.RESET}"
 
+    lines = []
     if two_line:
+        # Dirty and ahead/behind markers lead the commit message
+        if tree is not None and tree.compact():
+            git_message = f"[{tree.compact()}] {git_message}"
+
         # Two-line format: prompt on first line, todo --- commit on second line
         # First line: prompt (convert newlines to spaces, only truncate if needed)
-        line1 = last_prompt.replace("\n", " ").replace("\r", " ")
-        if len(line1) > terminal_width:
-            line1 = line1[: terminal_width - 3] + "..."
+        line1 = truncate_to_width(last_prompt, terminal_width, single_line=True)
 
         # Second line: checkbox + todo --- commit message (or just commit if no todos)
         # Use the same filtered todos logic as multi-line format
         if todos and show_todos:
             current_todo_text, is_completed = get_current_todo_with_status(todos)
-            # Convert newlines to spaces in todo text
-            current_todo_text = current_todo_text.replace("\n", " ").replace("\r", " ")
             checkbox = "[x]" if is_completed else "[ ]"
             todo_with_checkbox = f"{checkbox} {current_todo_text}"
 
             # Build second line with separator (convert newlines in git message)
             separator = " --- "
-            clean_git_message = git_message.replace("\n", " ").replace("\r", " ")
-            line2_parts = [todo_with_checkbox, clean_git_message]
+            line2_parts = [todo_with_checkbox, git_message]
 
             # Try to fit without truncation first
             line2_full = separator.join(line2_parts)
 
-            if len(line2_full) <= terminal_width:
+            if not exceeds_width(line2_full, terminal_width):
                 # Fits without truncation
-                line2 = line2_full
+                line2 = truncate_to_width(line2_full, terminal_width, single_line=True)
             else:
                 # Need to truncate - calculate available space for each part
                 separator_space = len(separator)
@@ -267,40 +357,743 @@ def display_status(
                 part_space = available_space // 2
 
                 # Truncate parts only if they exceed their allocated space
-                truncated_parts = []
-                for part in line2_parts:
-                    if len(part) > part_space:
-                        truncated_parts.append(part[: part_space - 3] + "...")
-                    else:
-                        truncated_parts.append(part)
-
+                truncated_parts = [
+                    truncate_to_width(part, part_space, single_line=True)
+                    for part in line2_parts
+                ]
                 line2 = separator.join(truncated_parts)
 
                 # Final safety check
-                if len(line2) > terminal_width:
-                    line2 = line2[: terminal_width - 3] + "..."
+                line2 = truncate_to_width(line2, terminal_width)
         else:
             # No todos to show - just display the commit message (convert newlines)
-            line2 = git_message.replace("\n", " ").replace("\r", " ")
-            if len(line2) > terminal_width:
-                line2 = line2[: terminal_width - 3] + "..."
+            line2 = truncate_to_width(git_message, terminal_width, single_line=True)
 
-        print(line1)
-        print(line2)
+        lines.append(line1)
+        lines.append(line2)
     else:
         # Multi-line format with colors
-        print(f"{prompt_label}: {last_prompt}")
-        print(f"{git_label}: {git_message}")
+        if status.prompt and status.prompt_length > len(status.prompt):
+            hidden = status.prompt_length - len(status.prompt)
+            last_prompt += f"... [{hidden} more characters]"
+        if include_session:
+            lines.append(f"{prompt_label}: {last_prompt}")
+            if status.activity is not None and status.activity.state != UNKNOWN:
+                lines.append(
+                    f"{Colors.CYAN}Agent{Colors.RESET}: {status.activity.describe()}"
+                )
+        if include_git:
+            lines.append(f"{git_label}: {git_message}")
+            if tree is not None:
+                lines.append(f"{tree_label}: {tree.summary()}")
+            for value in status.sections:
+                if value.error is not None:
+                    text = f"error: {value.error}"
+                elif value.fetched_at is None:
+                    text = "Checking..."
+                else:
+                    text = value.text
+                lines.append(f"{Colors.CYAN}{value.name}{Colors.RESET}: {text}")
 
         # Only display todos section if there are todos to show
-        if show_todos and todos and todos_info != "No todos found":
+        if include_session and show_todos and todos and todos_info != "No todos found":
             if "\n" in todos_info:
                 # Multi-line todo display
-                print(f"{todos_label}:")
-                print(todos_info)
+                lines.append(f"{todos_label}:")
+                lines.append(todos_info)
             else:
                 # Single line todo display
-                print(f"{todos_label}: {todos_info}")
+                lines.append(f"{todos_label}: {todos_info}")
+
+        # Subagents running on sidechains are reported apart from the main prompt
+        for branch in status.subagents if include_session else []:
+            subagent_label = f"{Colors.CYAN}Subagent"
+            if branch.last_timestamp is not None:
+                subagent_label += (
+                    f" ({get_minutes_ago(branch.last_timestamp)} minutes ago)"
+                )
+            subagent_label += f"{Colors.RESET}"
+            task = (branch.prompt or "Unknown task").replace("\n", " ")
+            lines.append(f"{subagent_label}: {task}")
+
+    return "\n".join(lines)
+
+
+def render_sessions(
+    statuses: List[ProjectStatus],
+    two_line: bool = False,
+    terminal_width: Optional[int] = None,
+) -> str:
+    """Render several sessions of one project as display text
+
+    Args:
+        statuses: Collected statuses of the sessions, sharing their git state
+        two_line: Whether to format each session as two lines
+        terminal_width: Terminal width for formatting (auto-detected if None)
+
+    Returns:
+        The rendered sessions, without a trailing newline
+    """
+    if terminal_width is None:
+        terminal_width = shutil.get_terminal_size().columns
+    if not statuses or statuses[0].jsonl_path is None:
+        return render_status(
+            statuses[0] if statuses else ProjectStatus(), two_line, terminal_width
+        )
+
+    blocks = []
+    for status in statuses:
+        session = (status.session_id or "unknown")[:8]
+        if two_line:
+            # The session id leads the prompt; the commit line is indented to match
+            prefix = f"[{session}] "
+            line1, line2 = render_status(
+                status, True, max(1, terminal_width - len(prefix))
+            ).split("\n")
+            blocks.append(f"{prefix}{line1}\n{' ' * len(prefix)}{line2}")
+            continue
+
+        header = f"{Colors.YELLOW}Session {session}"
+        if status.last_activity is not None:
+            header += f" ({get_minutes_ago(status.last_activity)} minutes ago)"
+        header += Colors.RESET
+        blocks.append(
+            header
+            + "\n"
+            + render_status(status, False, terminal_width, include_git=False)
+        )
+
+    if two_line:
+        return "\n".join(blocks)
+
+    # Git state belongs to the project and is shown once, after all sessions
+    blocks.append(
+        render_status(statuses[0], False, terminal_width, include_session=False)
+    )
+    return "\n\n".join(blocks)
+
+
+def render_status_json(status: ProjectStatus) -> str:
+    """Render a collected project status as a JSON document
+
+    Only absolute timestamps are included, so the output changes only when the
+    underlying state changes.
+
+    Args:
+        status: Collected project status
+
+    Returns:
+        JSON text terminated by a newline
+    """
+    todos = None
+    if should_show_todos(status) and status.todos:
+        current, is_completed = get_current_todo_with_status(status.todos)
+        todos = {
+            "current": current,
+            "current_completed": is_completed,
+            "counts": dict(status.todos.counts),
+            "timestamp": status.todos_timestamp,
+        }
+
+    activity = None
+    if status.activity is not None and status.activity.state != UNKNOWN:
+        activity = {
+            "state": status.activity.state,
+            "since": status.activity.since,
+            "tool": status.activity.tool_name,
+        }
+
+    commit = None
+    if status.is_git_repository:
+        commit = {
+            "message": status.commit_message,
+            "timestamp": status.commit_timestamp,
+        }
+
+    document = {
+        "project": status.project_path,
+        "session": str(status.jsonl_path) if status.jsonl_path else None,
+        "session_id": status.session_id,
+        "prompt": status.prompt,
+        "prompt_length": status.prompt_length,
+        "prompt_timestamp": status.prompt_timestamp,
+        "activity": activity,
+        "todos": todos,
+        "commit": commit,
+        "working_tree": (
+            vars(status.working_tree) if status.working_tree is not None else None
+        ),
+        "git_pending": status.git_pending,
+        "metrics": status.metrics,
+        "sections": {
+            value.name: {
+                "value": value.text,
+                "error": value.error,
+                "fetched_at": value.fetched_at,
+            }
+            for value in status.sections
+        },
+    }
+    return json.dumps(document, sort_keys=True) + "\n"
+
+
+def write_status_files(
+    projects: List[str],
+    path_template: str,
+    writer: StatusFileWriter,
+    two_line: bool = False,
+    as_json: bool = False,
+    jsonl_file: Optional[str] = None,
+    parser: Optional[JSONLParser] = None,
+    git_cache: Optional[GitStatusCache] = None,
+    git_budget: float = 0.0,
+    project_index: Optional[ProjectIndex] = None,
+    history: Optional[StatusHistory] = None,
+    sections: Optional[SectionRunner] = None,
+) -> int:
+    """Render the status of each project into its status file
+
+    Args:
+        projects: Project directories to render
+        path_template: Output path; ``{project}`` is replaced by the project's
+            folder name under ~/.claude/projects
+        writer: Writer that skips unchanged files
+        two_line: Whether to render the two-line format
+        as_json: Whether to render JSON instead of text
+        jsonl_file: Explicit JSONL file (single project only)
+        parser: Parser to reuse between calls, e.g. one with a cache attached
+        git_cache: Budgeted git cache; git work then stops after ``git_budget``
+        git_budget: Seconds allowed for the git work of all projects together
+            when using ``git_cache``
+        project_index: Index used to find each project's folder
+        history: Recorder receiving each collected status
+        sections: Runner of the plugin sections to include
+
+    Returns:
+        Number of files that were rewritten; files that could not be written
+        are reported on stderr and skipped
+    """
+    if git_cache is not None:
+        git_cache.start(projects)
+    deadline = time.monotonic() + git_budget
+    written = 0
+    for project in projects:
+        folder = project_index.folder_for(project) if project_index else None
+        jsonl_path = (
+            Path(jsonl_file)
+            if jsonl_file
+            else get_default_jsonl_path(project, project_index)
+        )
+        status = collect_status(
+            project,
+            jsonl_path,
+            include_subagents=not (two_line or as_json),
+            parser=parser,
+            include_working_tree=True,
+            git_cache=git_cache,
+            git_budget=max(0.0, deadline - time.monotonic()),
+            sections=sections,
+        )
+        if history is not None:
+            history.record(status)
+        if as_json:
+            content = render_status_json(status)
+        else:
+            content = render_status(status, two_line) + "\n"
+
+        folder = folder or project_folder_name(project)
+        path = path_template.replace("{project}", folder)
+        try:
+            if writer.write(path, content):
+                written += 1
+        except OSError as e:
+            # One unwritable path must not stop the other projects' files
+            print(f"Could not write {path}: {e}", file=sys.stderr)
+    return written
+
+
+def display_status(
+    jsonl_path: Optional[Path],
+    two_line: bool = False,
+    terminal_width: Optional[int] = None,
+    parser: Optional[JSONLParser] = None,
+    git_cache: Optional[GitStatusCache] = None,
+    git_budget: float = 0.0,
+    as_json: bool = False,
+    sections: Optional[SectionRunner] = None,
+) -> ProjectStatus:
+    """Display the current status
+
+    Args:
+        jsonl_path: Path to JSONL file to parse
+        two_line: Whether to format as two lines
+        terminal_width: Terminal width for formatting (auto-detected if None)
+        parser: Parser to reuse between calls, e.g. one with a cache attached
+        git_cache: Budgeted git cache; git work then stops after ``git_budget``
+        git_budget: Seconds allowed for all git work when using ``git_cache``
+        as_json: Whether to print JSON instead of text
+        sections: Runner of the plugin sections to include
+
+    Returns:
+        The displayed status
+    """
+    status = collect_status(
+        None,
+        jsonl_path,
+        include_subagents=not two_line,
+        parser=parser
+        or JSONLParser(
+            max_prompt_chars=PROMPT_PREVIEW_CHARS,
+            extractors=METRICS if as_json else None,
+        ),
+        include_working_tree=True,
+        git_cache=git_cache,
+        git_budget=git_budget,
+        sections=sections,
+    )
+    if as_json:
+        print(render_status_json(status), end="")
+    else:
+        print(render_status(status, two_line, terminal_width))
+    return status
+
+
+def display_sessions(
+    jsonl_paths: List[Path],
+    two_line: bool = False,
+    terminal_width: Optional[int] = None,
+    parser: Optional[JSONLParser] = None,
+    git_cache: Optional[GitStatusCache] = None,
+    git_budget: float = 0.0,
+    as_json: bool = False,
+    sections: Optional[SectionRunner] = None,
+) -> List[ProjectStatus]:
+    """Display every given session of the current project
+
+    Args:
+        jsonl_paths: Session files, most recently modified first
+        two_line: Whether to format each session as two lines
+        terminal_width: Terminal width for formatting (auto-detected if None)
+        parser: Parser to reuse between calls, e.g. one with a cache attached
+        git_cache: Budgeted git cache; git work then stops after ``git_budget``
+        git_budget: Seconds allowed for all git work when using ``git_cache``
+        as_json: Whether to print one JSON document per session instead of text
+        sections: Runner of the plugin sections, shown once for the project
+
+    Returns:
+        The displayed statuses
+    """
+    statuses = collect_sessions(
+        None,
+        jsonl_paths,
+        include_subagents=not two_line,
+        parser=parser
+        or JSONLParser(
+            max_prompt_chars=PROMPT_PREVIEW_CHARS,
+            extractors=METRICS if as_json else None,
+        ),
+        include_working_tree=True,
+        git_cache=git_cache,
+        git_budget=git_budget,
+        sections=sections,
+    )
+    if as_json:
+        print("".join(render_status_json(status) for status in statuses), end="")
+    else:
+        print(render_sessions(statuses, two_line, terminal_width))
+    return statuses
+
+
+def run_search(terms: str, limit: int = 20, update_index: bool = True) -> None:
+    """Search prompts and todos across all Claude sessions
+
+    Args:
+        terms: Search terms
+        limit: Maximum number of results to print
+        update_index: Whether to index new session data before searching
+    """
+    try:
+        index = SearchIndex()
+        try:
+            if update_index:
+                index.update()
+            results = index.search(terms, limit=limit)
+        finally:
+            index.close()
+    except SearchIndexError as e:
+        print(f"Search failed: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    if not results:
+        print("No matches found")
+        return
+
+    for result in results:
+        when = "unknown time"
+        if result.timestamp is not None:
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.timestamp))
+        snippet = result.snippet.replace("\n", " ").replace("\r", " ")
+        print(
+            f"{Colors.CYAN}{result.project} {result.session_id[:8]} ({when}) "
+            f"[{result.kind}]{Colors.RESET}: {snippet}"
+        )
+
+
+def run_compact(older_than_hours: float, keep_gzip_copy: bool = False) -> None:
+    """Summarize finished sessions so later scans skip their raw JSON
+
+    Args:
+        older_than_hours: Hours without changes after which a session is finished
+        keep_gzip_copy: Also keep a gzip copy of each original in the archive
+    """
+    archive = SessionArchive()
+    result = archive.compact(older_than_hours * 3600, keep_gzip_copy=keep_gzip_copy)
+    print(
+        f"Compacted {result.sessions} session(s): "
+        f"{result.raw_bytes / 1024:.0f} KB of JSONL -> "
+        f"{result.summary_bytes / 1024:.0f} KB of summaries in {archive.archive_dir}"
+    )
+    for path, error in result.failed:
+        print(f"Skipped {path}: {error}", file=sys.stderr)
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    """Format a latency for the tools table"""
+    return "-" if seconds is None else f"{seconds:.1f}s"
+
+
+def run_tools(jsonl_paths: List[Path], workers: Optional[int] = None) -> None:
+    """Print per-tool call latency statistics for one or more sessions
+
+    Args:
+        jsonl_paths: Session files to include
+        workers: Worker processes for scanning several files
+    """
+    stats = ToolLatencyCache().analyze(jsonl_paths, workers=workers)
+    if not stats:
+        print("No tool calls found")
+        return
+
+    width = max(len("Tool"), *(len(s.tool) for s in stats))
+    print(
+        f"{Colors.CYAN}{'Tool':<{width}} {'Calls':>6} {'p50':>8} {'p95':>8} "
+        f"{'Max':>8} {'Errors':>7} {'Open':>5}{Colors.RESET}"
+    )
+    for s in stats:
+        print(
+            f"{s.tool:<{width}} {s.count:>6} {_format_seconds(s.p50):>8} "
+            f"{_format_seconds(s.p95):>8} {_format_seconds(s.max):>8} "
+            f"{s.error_rate:>7.0%} {s.unanswered:>5}"
+        )
+
+
+def run_report(
+    days: float,
+    workers: Optional[int] = None,
+    project_index: Optional[ProjectIndex] = None,
+    as_json: bool = False,
+) -> None:
+    """Print daily activity of every project over the last days
+
+    Args:
+        days: Length of the report period in days
+        workers: Worker processes for scanning changed session files
+        project_index: Index used to show real project paths for folders
+        as_json: Whether to print a JSON document instead of tables
+    """
+    now = time.time()
+    report = UsageReportCache().report(now - days * 86400, now, workers=workers)
+    folders = (
+        {folder: cwd for cwd, folder in project_index.projects().items()}
+        if project_index
+        else {}
+    )
+    projects = sorted(
+        (folders.get(folder) or folder, stats) for folder, stats in report.items()
+    )
+
+    if as_json:
+        print(
+            json.dumps(
+                {
+                    project: [stats._asdict() for stats in project_stats]
+                    for project, project_stats in projects
+                },
+                indent=2,
+            )
+        )
+        return
+    if not projects:
+        print(f"No activity in the last {days:g} days")
+        return
+
+    for project, project_stats in projects:
+        print(f"{Colors.CYAN}{project}{Colors.RESET}")
+        print(
+            f"  {'Day':<10} {'Sessions':>8} {'Prompts':>8} {'Todos done':>10} "
+            f"{'Active':>7}"
+        )
+        for s in project_stats:
+            print(
+                f"  {s.day:<10} {s.sessions:>8} {s.prompts:>8} "
+                f"{s.todos_completed:>10} {s.active_hours:>6.1f}h"
+            )
+        print(
+            f"  {'Total':<10} {'':>8} {sum(s.prompts for s in project_stats):>8} "
+            f"{sum(s.todos_completed for s in project_stats):>10} "
+            f"{sum(s.active_hours for s in project_stats):>6.1f}h"
+        )
+
+
+def run_history(
+    project: str, days: float, step: float = 86400, as_json: bool = False
+) -> None:
+    """Print the recorded status history of a project
+
+    Args:
+        project: Absolute project directory
+        days: Length of the period in days
+        step: Seconds per printed row
+        as_json: Whether to print a JSON document instead of a table
+    """
+    history = StatusHistory()
+    try:
+        points = history.trend(
+            project,
+            time.time() - days * 86400,
+            step=step,
+            utc_offset=time.localtime().tm_gmtoff,
+        )
+    finally:
+        history.close()
+
+    if as_json:
+        print(json.dumps([point._asdict() for point in points], indent=2))
+        return
+    if not points:
+        print(f"No history recorded for {project} (use --record-history)")
+        return
+
+    label = "%Y-%m-%d %H:00" if step < 86400 else "%Y-%m-%d"
+    width = len(time.strftime(label))
+    print(
+        f"{Colors.CYAN}{'Time':<{width}} {'Samples':>7} {'Prompts':>7} "
+        f"{'Commits':>7} {'Todos':>7} {'Working':>7}{Colors.RESET}"
+    )
+    for point in points:
+        todos = (
+            f"{point.todos_completed}/{point.todos_total}" if point.todos_total else "-"
+        )
+        print(
+            f"{time.strftime(label, time.localtime(point.start)):<{width}} "
+            f"{point.samples:>7} {point.prompts:>7} {point.commits:>7} "
+            f"{todos:>7} {point.working:>7.0%}"
+        )
+
+
+def run_timeline(jsonl_path: Optional[Path]) -> None:
+    """Print each todo's work periods with the commits made during them
+
+    Args:
+        jsonl_path: Session whose todo transitions are used
+    """
+    if jsonl_path is None:
+        print("No session found")
+        return
+    timeline = CommitTimeline()
+    if timeline.git_dir is None:
+        print("No git repository")
+        return
+    timeline.refresh()
+
+    periods = correlate(
+        timeline,
+        todo_work_periods(read_todo_events(jsonl_path, SessionArchive())),
+    )
+    if not periods:
+        print("No todo progress found")
+        return
+
+    for period in periods:
+        checkbox = "[x]" if period.status == TodoStatus.COMPLETED else "[ ]"
+        started = time.strftime("%H:%M", time.localtime(period.started))
+        finished = (
+            time.strftime("%H:%M", time.localtime(period.finished))
+            if period.finished is not None
+            else "now"
+        )
+        print(
+            f"{Colors.YELLOW}{checkbox} {period.content}{Colors.RESET} "
+            f"({started}-{finished})"
+        )
+        for commit in period.commits:
+            when = time.strftime("%H:%M", time.localtime(commit.timestamp))
+            print(
+                f"    {Colors.GREEN}{commit.sha[:8]}{Colors.RESET} {when} "
+                f"{commit.subject}"
+            )
+
+
+def run_status_file_writer(
+    args: argparse.Namespace,
+    projects: List[str],
+    project_index: Optional[ProjectIndex] = None,
+    sections: Optional[SectionRunner] = None,
+) -> None:
+    """Keep status files up to date for shell prompt and tmux integrations
+
+    Args:
+        args: Parsed command line arguments
+        projects: Absolute project directories
+        project_index: Index used to find each project's folder
+        sections: Runner of the plugin sections to include
+    """
+    writer = StatusFileWriter()
+    # Keep parsed state between refreshes so only appended lines are read
+    jsonl_parser = JSONLParser(
+        cache=ParseCache(),
+        max_prompt_chars=PROMPT_PREVIEW_CHARS,
+        extractors=METRICS if args.json else None,
+    )
+    git_cache, git_budget = make_git_cache(args)
+    history = StatusHistory() if args.record_history else None
+
+    try:
+        while True:
+            write_status_files(
+                projects,
+                args.write_status_file,
+                writer,
+                two_line=args.two_line,
+                as_json=args.json,
+                jsonl_file=args.file,
+                parser=jsonl_parser,
+                git_cache=git_cache,
+                git_budget=git_budget,
+                project_index=project_index,
+                history=history,
+                sections=sections,
+            )
+            if args.update is None:
+                break
+            git_cache.save()
+            if sections is not None:
+                sections.save()
+            time.sleep(args.update)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if history is not None:
+            history.close()
+
+    git_cache.finish()
+    if sections is not None:
+        sections.finish()
+
+
+def make_git_cache(args: argparse.Namespace) -> Tuple[GitStatusCache, float]:
+    """Create the persistent git cache and budget for the given options
+
+    With --budget-ms every display may wait that long for fresh git answers.
+    Without it a display never waits on a known repository; slow queries
+    finish in the background and are saved for the next call.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Tuple of (cache, git budget in seconds)
+    """
+    if args.budget_ms is not None:
+        return GitStatusCache(), args.budget_ms / 1000
+    return GitStatusCache(wait_for_fresh=False), COLD_GIT_WAIT
+
+
+def parse_listen_address(value: str) -> Tuple[str, int]:
+    """Parse a HOST:PORT listen address
+
+    Args:
+        value: Address such as ``127.0.0.1:8765`` or ``:8765``
+
+    Returns:
+        Tuple of (host, port); an empty host means localhost
+
+    Raises:
+        ValueError: If the port is missing or not a valid number
+    """
+    host, _, port = value.rpartition(":")
+    if not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"invalid port in {value!r}")
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+def run_status_server(
+    args: argparse.Namespace,
+    projects: List[str],
+    address: Tuple[str, int],
+    project_index: Optional[ProjectIndex] = None,
+    sections: Optional[SectionRunner] = None,
+) -> None:
+    """Serve the status of projects over HTTP until interrupted
+
+    Args:
+        args: Parsed command line arguments
+        projects: Absolute project directories
+        address: (host, port) to listen on
+        project_index: Index used to find each project's folder
+        sections: Runner of the plugin sections to include
+    """
+    # Warm parsers and cached git state are shared by every refresh
+    jsonl_parser = JSONLParser(
+        cache=ParseCache(), max_prompt_chars=PROMPT_PREVIEW_CHARS, extractors=METRICS
+    )
+    git_cache, git_budget = make_git_cache(args)
+    history = StatusHistory() if args.record_history else None
+
+    def render() -> Dict[str, str]:
+        # One budget covers the git work of every project
+        git_cache.start(projects)
+        deadline = time.monotonic() + git_budget
+        documents = {}
+        for project in projects:
+            jsonl_path = (
+                Path(args.file)
+                if args.file
+                else get_default_jsonl_path(project, project_index)
+            )
+            status = collect_status(
+                project,
+                jsonl_path,
+                parser=jsonl_parser,
+                include_working_tree=True,
+                git_cache=git_cache,
+                git_budget=max(0.0, deadline - time.monotonic()),
+                sections=sections,
+            )
+            if history is not None:
+                history.record(status)
+            documents[project] = render_status_json(status)
+        git_cache.save()
+        if sections is not None:
+            sections.save()
+        return documents
+
+    board = StatusBoard(render)
+    server = StatusServer(address, board, interval=args.update or SERVE_INTERVAL)
+    host, port = server.server_address[:2]
+    print(f"Serving status of {len(projects)} project(s) on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopping.set()
+        server.server_close()
+        git_cache.finish()
+        if sections is not None:
+            sections.save()
+        if history is not None:
+            history.close()
 
 
 def main():
@@ -311,7 +1104,8 @@ def main():
     parser.add_argument(
         "--file",
         type=str,
-        help="Path to JSONL file (default: auto-detect from ~/.claude/projects/)",
+        help="Path to JSONL file, optionally .jsonl.gz or .jsonl.zst "
+        "(default: auto-detect from ~/.claude/projects/)",
     )
     parser.add_argument(
         "--two-line",
@@ -324,34 +1118,313 @@ def main():
         const=5,
         type=int,
         metavar="SECONDS",
-        help="Continuously update status display until interrupted "
-        "(default: 5 seconds)",
+        help="Continuously update status display until interrupted, redrawing "
+        "when files change, checked at least every SECONDS (default: 5 seconds)",
+    )
+    parser.add_argument(
+        "--sessions",
+        nargs="?",
+        const=60,
+        type=float,
+        metavar="MINUTES",
+        help="Show every session of the project modified in the last MINUTES "
+        "instead of only the most recent one (default: 60 minutes)",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=int,
+        metavar="MS",
+        help="Latency budget for all git work; slower answers fall back to the "
+        "last cached values and finish in the background",
+    )
+    parser.add_argument(
+        "--write-status-file",
+        metavar="PATH",
+        help="Write the rendered status to PATH instead of the terminal, only "
+        "when it changes; {project} in PATH is replaced by the project folder name",
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        metavar="DIR",
+        help="Project directory to report on; repeat for several projects "
+        "(default: current directory)",
+    )
+    parser.add_argument(
+        "--all-projects",
+        action="store_true",
+        help="With --serve or --write-status-file, report on every project that "
+        "has Claude sessions",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Render the status as JSON",
+    )
+    parser.add_argument(
+        "--record-history",
+        action="store_true",
+        help="With --update, --serve or --write-status-file, record each changed "
+        "status in ~/.cache/claude_status/history.db",
+    )
+    parser.add_argument(
+        "--section",
+        action="append",
+        metavar="MODULE[:NAME]",
+        help="Add the status section(s) defined by NAME in MODULE, or by its "
+        "SECTIONS list; repeat for several (installed plugins are always loaded)",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="HOST:PORT",
+        help="Serve /status, /projects and /events over HTTP instead of printing",
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    search_parser = subparsers.add_parser(
+        "search", help="Search prompts and todos across all Claude sessions"
+    )
+    search_parser.add_argument("terms", help="Terms that must all match")
+    search_parser.add_argument(
+        "--limit", type=int, default=20, help="Maximum number of results"
+    )
+    search_parser.add_argument(
+        "--no-update",
+        action="store_true",
+        help="Query the existing index without indexing new session data",
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Summarize finished sessions to speed up later scans"
+    )
+    compact_parser.add_argument(
+        "--older-than",
+        type=float,
+        default=DEFAULT_FINISHED_AFTER / 3600,
+        metavar="HOURS",
+        help="Only compact sessions unchanged for this many hours (default: 24)",
+    )
+    compact_parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="Also keep a gzip copy of each original session in the archive",
+    )
+
+    tools_parser = subparsers.add_parser(
+        "tools", help="Show how long each tool's calls take"
+    )
+    tools_parser.add_argument(
+        "--all-sessions",
+        action="store_true",
+        help="Include every session of every project instead of the current one",
+    )
+    tools_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Processes used to scan several sessions (default: CPU count)",
+    )
+
+    history_parser = subparsers.add_parser(
+        "history", help="Show recorded status history of the current project"
+    )
+    history_parser.add_argument(
+        "--days",
+        type=float,
+        default=30,
+        metavar="DAYS",
+        help="Length of the period shown (default: 30)",
+    )
+    history_parser.add_argument(
+        "--hourly",
+        action="store_true",
+        help="One row per hour instead of per day",
+    )
+
+    report_parser = subparsers.add_parser(
+        "report", help="Show prompts, todos and active hours per project and day"
+    )
+    report_parser.add_argument(
+        "--days",
+        type=float,
+        default=7,
+        metavar="DAYS",
+        help="Length of the report period (default: 7)",
+    )
+    report_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="Processes used to scan changed sessions (default: CPU count)",
+    )
+
+    subparsers.add_parser(
+        "timeline",
+        help="Show the commits made while each todo of the session was in progress",
     )
 
     args = parser.parse_args()
 
-    # Determine JSONL file path
-    if args.file:
-        jsonl_path = Path(args.file)
-    else:
-        jsonl_path = get_default_jsonl_path()
+    if args.command == "search":
+        run_search(args.terms, limit=args.limit, update_index=not args.no_update)
+        return
+    if args.command == "compact":
+        run_compact(args.older_than, keep_gzip_copy=args.gzip)
+        return
+
+    project_index = ProjectIndex()
+
+    if args.command == "timeline":
+        run_timeline(
+            Path(args.file)
+            if args.file
+            else get_default_jsonl_path(project_index=project_index)
+        )
+        return
+
+    if args.command == "history":
+        run_history(
+            os.path.abspath((args.project or ["."])[0]),
+            args.days,
+            step=3600 if args.hourly else 86400,
+            as_json=args.json,
+        )
+        return
+
+    if args.command == "report":
+        run_report(
+            args.days,
+            workers=args.workers,
+            project_index=project_index,
+            as_json=args.json,
+        )
+        return
+
+    if args.command == "tools":
+        if args.all_sessions:
+            jsonl_paths = list_sessions(project_index.projects_dir, "*/")
+        elif args.file:
+            jsonl_paths = [Path(args.file)]
+        else:
+            jsonl_path = get_default_jsonl_path(project_index=project_index)
+            jsonl_paths = [jsonl_path] if jsonl_path else []
+        run_tools(jsonl_paths, workers=args.workers)
+        return
+
+    section_plugins = load_entry_point_sections()
+    for spec in args.section or []:
+        try:
+            section_plugins.extend(load_section_spec(spec))
+        except (ImportError, TypeError) as e:
+            parser.error(f"--section {spec}: {e}")
+    sections = SectionRunner(section_plugins) if section_plugins else None
+
+    if args.serve or args.write_status_file:
+        if args.all_projects:
+            projects = list(project_index.projects())
+        else:
+            projects = [os.path.abspath(project) for project in args.project or ["."]]
+        if len(projects) > 1 and args.file:
+            parser.error("--file can only be used with a single project")
+
+    if args.serve:
+        try:
+            address = parse_listen_address(args.serve)
+        except ValueError as e:
+            parser.error(f"--serve: {e}")
+        run_status_server(args, projects, address, project_index, sections)
+        return
+
+    if args.write_status_file:
+        if len(projects) > 1 and "{project}" not in args.write_status_file:
+            parser.error("--write-status-file needs {project} for several projects")
+        run_status_file_writer(args, projects, project_index, sections)
+        return
+
+    if args.sessions is not None and args.file:
+        parser.error("--sessions cannot be combined with --file")
+
+    def find_sessions() -> List[Path]:
+        """Find the session files to show, most recent first"""
+        if args.sessions is not None:
+            return get_session_paths(
+                project_index=project_index, within=args.sessions * 60
+            )
+        jsonl_path = get_default_jsonl_path(project_index=project_index)
+        return [jsonl_path] if jsonl_path is not None else []
+
+    # Determine JSONL file path(s)
+    jsonl_paths = [Path(args.file)] if args.file else find_sessions()
+
+    def show(jsonl_parser: Optional[JSONLParser] = None) -> List[ProjectStatus]:
+        """Display the session(s) once"""
+        if args.sessions is not None:
+            return display_sessions(
+                jsonl_paths,
+                args.two_line,
+                parser=jsonl_parser,
+                git_cache=git_cache,
+                git_budget=git_budget,
+                as_json=args.json,
+                sections=sections,
+            )
+        status = display_status(
+            jsonl_paths[0] if jsonl_paths else None,
+            args.two_line,
+            parser=jsonl_parser,
+            git_cache=git_cache,
+            git_budget=git_budget,
+            as_json=args.json,
+            sections=sections,
+        )
+        return [status]
+
+    git_cache, git_budget = make_git_cache(args)
 
     if args.update is not None:
         # Update mode with configurable interval
         update_interval = args.update
+        # Keep parsed state between refreshes so only appended lines are read
+        jsonl_parser = JSONLParser(
+            cache=ParseCache(),
+            max_prompt_chars=PROMPT_PREVIEW_CHARS,
+            extractors=METRICS if args.json else None,
+        )
+        # Each source is polled on its own schedule; SECONDS caps the back-off
+        poller = AdaptivePoller(max_interval=update_interval)
+        history = StatusHistory() if args.record_history else None
+        git_dir = find_git_dir()
+        if git_dir is not None:
+            for name in GIT_WATCHED_FILES:
+                poller.watch(git_dir / name)
+        project_folder = None
+        # Forced redraws, and the git status they refresh, back off like the
+        # poller while nothing changes
+        idle_wait = min(REDRAW_INTERVAL, update_interval)
         try:
             while True:
-                # Check for newer JSONL file if using auto-detection
+                for jsonl_path in jsonl_paths:
+                    poller.watch(jsonl_path)
                 if not args.file:
-                    current_jsonl_path = get_default_jsonl_path()
-                    if current_jsonl_path != jsonl_path:
-                        jsonl_path = current_jsonl_path
+                    # New sessions show up as changes of the project folder
+                    project_folder = (
+                        jsonl_paths[0].parent
+                        if jsonl_paths
+                        else get_project_folder(project_index=project_index)
+                    )
+                    poller.watch(project_folder)
 
                 # Clear screen and display status
                 if not args.two_line:
                     os.system("clear" if os.name == "posix" else "cls")  # nosec B605
 
-                display_status(jsonl_path, args.two_line)
+                statuses = show(jsonl_parser)
+                if history is not None:
+                    for status in statuses:
+                        history.record(status)
+                git_cache.save()
+                if sections is not None:
+                    sections.save()
 
                 if args.two_line:
                     # For two-line mode, just refresh in place
@@ -360,15 +1433,43 @@ def main():
                     interval_text = (
                         f"{update_interval} second{'s' if update_interval != 1 else ''}"
                     )
-                    print(f"\n--- Refreshing in {interval_text} (Ctrl+C to exit) ---")
+                    print(
+                        f"\n--- Watching for changes at least every "
+                        f"{interval_text} (Ctrl+C to exit) ---"
+                    )
 
-                time.sleep(update_interval)
+                # Redraw when idle too, which picks up working tree edits that
+                # touch no watched file, and in time for the fastest section
+                redraw_wait = idle_wait
+                if sections is not None and sections.min_ttl is not None:
+                    redraw_wait = min(redraw_wait, sections.min_ttl)
+                changed = poller.wait(max(MIN_REDRAW_WAIT, redraw_wait))
+                if changed:
+                    idle_wait = min(REDRAW_INTERVAL, update_interval)
+                else:
+                    idle_wait = min(idle_wait * BACKOFF_FACTOR, REDRAW_INTERVAL)
+
+                # Check for newer JSONL files if using auto-detection
+                if not args.file and (not changed or project_folder in changed):
+                    current_paths = find_sessions()
+                    for jsonl_path in set(jsonl_paths) - set(current_paths):
+                        poller.unwatch(jsonl_path)
+                    jsonl_paths = current_paths
         except KeyboardInterrupt:
             if not args.two_line:
                 print("\nExiting...")
+        finally:
+            if history is not None:
+                history.close()
+            if sections is not None:
+                sections.save()
     else:
         # Single display
-        display_status(jsonl_path, args.two_line)
+        show()
+        # Complete git queries that ran over budget for the next call
+        git_cache.finish()
+        if sections is not None:
+            sections.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+# ABOUTME: Classifies whether a Claude agent is working, waiting on a tool or idle
+# ABOUTME: Reads only the last few KB of a session file so it can run on every tick
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from src.compressed import compression_of, read_tail
+from src.jsonl_parser import JSONLParser
+
+# Tail window read first, and the most that is read when lines are long
+TAIL_BYTES = 8 * 1024
+MAX_TAIL_BYTES = 256 * 1024
+
+# A session that claims to be busy but has not written anything for this long
+# is most likely interrupted, so it is reported as idle
+STALE_AFTER = 30 * 60
+
+WORKING = "working"
+WAITING = "waiting"
+IDLE = "idle"
+UNKNOWN = "unknown"
+
+# Text Claude Code records as a user message when the user presses Escape
+INTERRUPTED_MARKER = "[Request interrupted by user"
+
+
+class Activity(NamedTuple):
+    """What the agent of a session is doing"""
+
+    state: str  # WORKING, WAITING, IDLE or UNKNOWN
+    since: Optional[float] = None  # timestamp of the last main-chain entry
+    tool_name: Optional[str] = None  # tool whose result is outstanding
+
+    def idle_minutes(self, now: Optional[float] = None) -> Optional[int]:
+        """Get the whole minutes since the last entry
+
+        Args:
+            now: Current time. If None, uses time.time()
+
+        Returns:
+            Minutes since the last entry, or None if unknown
+        """
+        if self.since is None:
+            return None
+        return max(0, int(((now or time.time()) - self.since) / 60))
+
+    def describe(self, now: Optional[float] = None) -> str:
+        """Describe the activity for display
+
+        Args:
+            now: Current time. If None, uses time.time()
+
+        Returns:
+            Text such as "waiting on Bash" or "idle for 12 minutes"
+        """
+        if self.state == WORKING:
+            return "working"
+        if self.state == WAITING:
+            return f"waiting on {self.tool_name or 'a tool'}"
+        if self.state == IDLE:
+            minutes = self.idle_minutes(now)
+            if minutes is None:
+                return "idle"
+            return f"idle for {minutes} minute{'s' if minutes != 1 else ''}"
+        return "unknown"
+
+
+def read_tail_entries(jsonl_path: Path, window: int) -> Optional[List[dict]]:
+    """Decode the complete entries in the last ``window`` bytes of a file
+
+    Args:
+        jsonl_path: Path to the JSONL file
+        window: Number of bytes to read from the end
+
+    Returns:
+        Entries in file order, or None if the file can't be read. The first,
+        possibly cut, line is dropped unless the window covers the whole file.
+    """
+    try:
+        if compression_of(jsonl_path) is not None:
+            data, complete = read_tail(jsonl_path, window)
+        else:
+            with open(jsonl_path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - window))
+                data = f.read()
+            complete = size <= window
+    except (IOError, OSError):
+        return None
+
+    lines = data.split(b"\n")
+    if not complete:
+        lines = lines[1:]
+    entries = []
+    for raw_line in lines:
+        if not raw_line.strip():
+            continue
+        try:
+            entry = json.loads(raw_line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue  # e.g. a line still being written
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries
+
+
+def _content_items(entry: dict) -> list:
+    """Get the dict items of an entry's message content
+
+    Args:
+        entry: Decoded JSONL entry
+
+    Returns:
+        Content items, empty for plain text messages
+    """
+    message = entry.get("message")
+    content = message.get("content") if isinstance(message, dict) else None
+    if not isinstance(content, list):
+        return []
+    return [item for item in content if isinstance(item, dict)]
+
+
+def _is_interruption(entry: dict) -> bool:
+    """Check whether a user entry records an interrupted request
+
+    Args:
+        entry: Decoded user entry
+
+    Returns:
+        True if the message is the interruption marker
+    """
+    message = entry.get("message")
+    content = message.get("content") if isinstance(message, dict) else None
+    if isinstance(content, str):
+        return content.startswith(INTERRUPTED_MARKER)
+    return any(
+        isinstance(item.get("text"), str)
+        and item["text"].startswith(INTERRUPTED_MARKER)
+        for item in _content_items(entry)
+    )
+
+
+def classify(entries: List[dict], now: Optional[float] = None) -> Activity:
+    """Classify agent activity from the last entries of a session
+
+    Walks back over the main chain from the newest message to the prompt that
+    started the current turn, pairing tool results with the tool uses they
+    answer. Subagent (sidechain) entries are ignored: a running subagent shows
+    up as the outstanding Task tool use of the main chain.
+
+    Args:
+        entries: Entries in file order
+        now: Current time. If None, uses time.time()
+
+    Returns:
+        The activity, UNKNOWN if the entries hold no main-chain message
+    """
+    parser = JSONLParser()
+    latest: Optional[dict] = None
+    answered = set()
+    pending: Optional[str] = None
+    found_pending = False
+
+    for entry in reversed(entries):
+        entry_type = entry.get("type")
+        if entry.get("isSidechain") or entry_type not in ("user", "assistant"):
+            continue
+        items = _content_items(entry)
+        if latest is None:
+            latest = entry
+        if entry_type == "user":
+            results = [item for item in items if item.get("type") == "tool_result"]
+            if not results:
+                break  # the prompt that started this turn
+            answered.update(item.get("tool_use_id") for item in results)
+            continue
+
+        tool_uses = [item for item in items if item.get("type") == "tool_use"]
+        if not tool_uses:
+            if entry is latest:
+                break  # a final answer
+            continue
+        for item in reversed(tool_uses):
+            if not found_pending and item.get("id") not in answered:
+                found_pending = True
+                name = item.get("name")
+                pending = name if isinstance(name, str) else None
+
+    if latest is None:
+        return Activity(UNKNOWN)
+    since = None
+    if isinstance(latest.get("timestamp"), str):
+        since = parser._parse_timestamp(latest["timestamp"])
+
+    if latest["type"] == "user" and _is_interruption(latest):
+        return Activity(IDLE, since)
+    if found_pending:
+        activity = Activity(WAITING, since, pending)
+    elif latest["type"] == "assistant" and not any(
+        item.get("type") == "tool_use" for item in _content_items(latest)
+    ):
+        return Activity(IDLE, since)
+    else:
+        activity = Activity(WORKING, since)
+    return _unless_stale(activity, now)
+
+
+def _unless_stale(activity: Activity, now: Optional[float]) -> Activity:
+    """Report a busy activity as idle once it has been silent too long
+
+    Args:
+        activity: A WORKING or WAITING activity
+        now: Current time. If None, uses time.time()
+
+    Returns:
+        The activity, or an IDLE one with the same timestamp
+    """
+    if activity.since is not None and (now or time.time()) - activity.since > (
+        STALE_AFTER
+    ):
+        return Activity(IDLE, activity.since)
+    return activity
+
+
+def get_activity(jsonl_path: str | Path, now: Optional[float] = None) -> Activity:
+    """Classify the agent activity of a session from the tail of its file
+
+    Reads TAIL_BYTES from the end, growing the window up to MAX_TAIL_BYTES only
+    when the tail holds no complete main-chain message (e.g. one huge tool
+    result).
+
+    Args:
+        jsonl_path: Path to the JSONL file
+        now: Current time. If None, uses time.time()
+
+    Returns:
+        The activity of the session
+    """
+    jsonl_path = Path(jsonl_path)
+    window = TAIL_BYTES
+    while True:
+        entries = read_tail_entries(jsonl_path, window)
+        if entries is None:
+            return Activity(UNKNOWN)
+        activity = classify(entries, now)
+        if activity.state != UNKNOWN or window >= MAX_TAIL_BYTES:
+            return activity
+        try:
+            if jsonl_path.stat().st_size <= window:
+                return activity
+        except OSError:
+            return activity
+        window *= 4
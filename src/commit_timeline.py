@@ -0,0 +1,390 @@
+# ABOUTME: Cached git commit history extended incrementally from the last known head
+# ABOUTME: Joins commits by timestamp with the periods in which todos were in progress
+
+import bisect
+import hashlib
+import json
+import os
+import subprocess  # nosec B404
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.compressed import open_session
+from src.git_integration import find_git_dir
+from src.jsonl_parser import JSONLParser
+from src.paths import get_cache_dir
+from src.session_archive import SessionArchive
+from src.todos import Todo, TodoStatus
+
+# Bump when the cached timeline layout changes; older caches are then ignored
+CACHE_VERSION = 1
+
+# Seconds a history walk may take before it is abandoned
+LOG_TIMEOUT = 120.0
+
+LOG_FORMAT = "--format=%H%x00%ct%x00%s"
+
+
+class Commit(NamedTuple):
+    """One commit of the timeline"""
+
+    sha: str
+    timestamp: float  # committer time
+    subject: str
+
+
+class TodoWork(NamedTuple):
+    """A period in which one todo was being worked on"""
+
+    content: str
+    started: float
+    finished: Optional[float]  # None while the todo is still in progress
+    status: TodoStatus  # status the todo moved to when the period ended
+    commits: List[Commit]  # commits that landed during the period
+
+
+def _parse_log_line(line: str) -> Optional[Commit]:
+    """Parse one line of ``git log`` output in LOG_FORMAT
+
+    Args:
+        line: Output line
+
+    Returns:
+        The commit, or None for a malformed line
+    """
+    fields = line.rstrip("\n").split("\0", 2)
+    if len(fields) != 3:
+        return None
+    try:
+        return Commit(fields[0], float(fields[1]), fields[2])
+    except ValueError:
+        return None
+
+
+class CommitTimeline:
+    """Commit history of one repository, cached between runs
+
+    The first refresh streams the full ``git log``. Later refreshes cost one
+    ``git rev-parse HEAD`` while nothing was committed, and otherwise only
+    walk the commits added since the cached head. A rewritten history (rebase,
+    reset) is detected and walked again in full.
+    """
+
+    def __init__(
+        self, repo_path: Optional[str] = None, cache_dir: Optional[Path] = None
+    ):
+        """Create a timeline, loading the cached history
+
+        Args:
+            repo_path: Directory inside the repository. If None, uses current
+                directory.
+            cache_dir: Directory for cached timelines. Defaults to the cache dir.
+        """
+        self.repo_path = repo_path
+        self.git_dir = find_git_dir(repo_path)
+        self.cache_dir = Path(cache_dir or get_cache_dir() / "commits")
+        self.head: Optional[str] = None
+        self.commits: List[Commit] = []  # newest first, as git log lists them
+        self._ordered: Optional[List[Commit]] = None  # oldest first, for lookups
+        self._timestamps: List[float] = []  # bisect keys of _ordered
+        self._load()
+
+    @property
+    def cache_path(self) -> Optional[Path]:
+        """File holding the cached timeline of this repository"""
+        if self.git_dir is None:
+            return None
+        key = hashlib.sha1(
+            str(self.git_dir).encode("utf-8"), usedforsecurity=False
+        ).hexdigest()[:16]
+        return self.cache_dir / f"{key}.json"
+
+    def _load(self) -> None:
+        """Load the cached timeline, ignoring a missing or corrupt file"""
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != CACHE_VERSION
+            or data.get("git_dir") != str(self.git_dir)
+        ):
+            return
+        self.head = data.get("head")
+        self.commits = [Commit(*commit) for commit in data.get("commits") or []]
+
+    def _save(self) -> None:
+        """Save the timeline atomically"""
+        if self.cache_path is None:
+            return
+        data = {
+            "version": CACHE_VERSION,
+            "git_dir": str(self.git_dir),
+            "head": self.head,
+            "commits": [list(commit) for commit in self.commits],
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f".{self.cache_path.name}.{os.getpid()}.tmp"
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except (IOError, OSError):
+            pass
+
+    def _git(self, args: List[str]) -> Optional[str]:
+        """Run a short git command
+
+        Args:
+            args: Arguments after ``git``
+
+        Returns:
+            Standard output, or None if the command failed
+        """
+        try:
+            result = subprocess.run(  # nosec B603
+                ["git", *args],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                cwd=str(self.repo_path) if self.repo_path else None,
+            )
+        except (subprocess.SubprocessError, OSError):
+            return None
+        return result.stdout if result.returncode == 0 else None
+
+    def _stream_log(self, revisions: List[str]) -> Optional[List[Commit]]:
+        """Stream ``git log`` output line by line
+
+        Args:
+            revisions: Revision arguments, e.g. ["HEAD", "^<old head>"]
+
+        Returns:
+            Commits newest first, or None if git failed or timed out
+        """
+        try:
+            process = subprocess.Popen(  # nosec B603
+                ["git", "log", LOG_FORMAT, *revisions, "--"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                cwd=str(self.repo_path) if self.repo_path else None,
+            )
+        except (subprocess.SubprocessError, OSError):
+            return None
+
+        watchdog = threading.Timer(LOG_TIMEOUT, process.kill)
+        watchdog.start()
+        commits = []
+        try:
+            for line in process.stdout or []:
+                commit = _parse_log_line(line)
+                if commit is not None:
+                    commits.append(commit)
+            returncode = process.wait()
+        finally:
+            watchdog.cancel()
+            if process.stdout is not None:
+                process.stdout.close()
+        return commits if returncode == 0 else None
+
+    def refresh(self) -> bool:
+        """Bring the timeline up to date with the repository's HEAD
+
+        Returns:
+            True if new commits were added or the history was rebuilt
+        """
+        if self.git_dir is None:
+            return False
+        output = self._git(["rev-parse", "HEAD"])
+        head = output.strip() if output else None
+        if head is None or head == self.head:
+            return False
+
+        new_commits = None
+        if (
+            self.head is not None
+            and self._git(["merge-base", "--is-ancestor", self.head, head]) is not None
+        ):
+            new_commits = self._stream_log([head, f"^{self.head}"])
+            if new_commits is not None:
+                self.commits = new_commits + self.commits
+        if new_commits is None:
+            # First run, or the cached head is no longer part of the history
+            commits = self._stream_log([head])
+            if commits is None:
+                return False
+            self.commits = commits
+
+        self.head = head
+        self._ordered = None
+        self._save()
+        return True
+
+    def between(self, start: float, end: Optional[float] = None) -> List[Commit]:
+        """Get the commits made in a period
+
+        Args:
+            start: Start of the period (inclusive)
+            end: End of the period (inclusive), or None for open-ended
+
+        Returns:
+            Commits oldest first
+        """
+        if self._ordered is None:
+            self._ordered = sorted(self.commits, key=lambda commit: commit.timestamp)
+            self._timestamps = [commit.timestamp for commit in self._ordered]
+        ordered = self._ordered
+        timestamps = self._timestamps
+        low = bisect.bisect_left(timestamps, start)
+        high = len(ordered) if end is None else bisect.bisect_right(timestamps, end)
+        return ordered[low:high]
+
+
+def read_todo_events(
+    jsonl_path: Path, archive: Optional[SessionArchive] = None
+) -> List[Tuple[float, List[Todo]]]:
+    """Read every main-chain todo list written in a session, in order
+
+    Uses the session's compacted summary when it is current.
+
+    Args:
+        jsonl_path: Path to the JSONL session file
+        archive: Archive holding session summaries
+
+    Returns:
+        (timestamp, todos) for each TodoWrite with a timestamp
+    """
+    summary = archive.load(jsonl_path) if archive is not None else None
+    if summary is not None:
+        rows: Dict[int, Tuple[float, List[Todo]]] = {}
+        todos = summary.todos
+        for event, timestamp, sidechain, todo_id, content, status in zip(
+            todos["event"],
+            todos["timestamp"],
+            todos["sidechain"],
+            todos["id"],
+            todos["content"],
+            todos["status"],
+        ):
+            if sidechain or timestamp is None:
+                continue
+            row = rows.setdefault(event, (timestamp, []))
+            # Summaries store a missing id as ""; periods are keyed by the id
+            todo = {"id": todo_id or None, "content": content, "status": status}
+            row[1].append(Todo.from_dict(todo))
+        return [rows[event] for event in sorted(rows)]
+
+    parser = JSONLParser()
+    events = []
+    try:
+        with open_session(jsonl_path) as f:
+            for raw_line in f:
+                # Matches both "todos" and "newTodos" without decoding
+                if b'odos"' not in raw_line:
+                    continue
+                try:
+                    entry = json.loads(raw_line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(entry, dict) or entry.get("isSidechain"):
+                    continue
+                entry_todos = parser.extract_todos(entry)
+                timestamp = entry.get("timestamp")
+                if not entry_todos or not isinstance(timestamp, str):
+                    continue
+                parsed = parser._parse_timestamp(timestamp)
+                if parsed is None:
+                    continue
+                events.append(
+                    (
+                        parsed,
+                        [
+                            Todo.from_dict(todo)
+                            for todo in entry_todos
+                            if isinstance(todo, dict)
+                        ],
+                    )
+                )
+    except (IOError, OSError):
+        return []
+    return events
+
+
+def todo_work_periods(events: Iterable[Tuple[float, List[Todo]]]) -> List[TodoWork]:
+    """Turn todo list snapshots into the periods each todo was worked on
+
+    A period starts when a todo becomes in_progress and ends at its next
+    status change. A todo that went from pending to completed between two
+    writes is credited with the time between them.
+
+    Args:
+        events: (timestamp, todos) snapshots in order
+
+    Returns:
+        Periods ordered by start, without commits yet
+    """
+    periods: List[TodoWork] = []
+    statuses: Dict[str, TodoStatus] = {}
+    open_periods: Dict[str, Tuple[str, float]] = {}
+    previous_timestamp: Optional[float] = None
+
+    for timestamp, todos in events:
+        seen = set()
+        for todo in todos:
+            key = todo.id or todo.content
+            seen.add(key)
+            before = statuses.get(key)
+            statuses[key] = todo.status
+            if todo.status == TodoStatus.IN_PROGRESS:
+                open_periods.setdefault(key, (todo.content, timestamp))
+            elif key in open_periods:
+                content, started = open_periods.pop(key)
+                periods.append(TodoWork(content, started, timestamp, todo.status, []))
+            elif (
+                todo.status == TodoStatus.COMPLETED
+                and before == TodoStatus.PENDING
+                and previous_timestamp is not None
+            ):
+                periods.append(
+                    TodoWork(
+                        todo.content, previous_timestamp, timestamp, todo.status, []
+                    )
+                )
+        # Todos dropped from the list while in progress
+        for key in [key for key in open_periods if key not in seen]:
+            content, started = open_periods.pop(key)
+            periods.append(
+                TodoWork(content, started, timestamp, TodoStatus.UNKNOWN, [])
+            )
+        previous_timestamp = timestamp
+
+    for content, started in open_periods.values():
+        periods.append(TodoWork(content, started, None, TodoStatus.IN_PROGRESS, []))
+    periods.sort(key=lambda period: period.started)
+    return periods
+
+
+def correlate(timeline: CommitTimeline, periods: List[TodoWork]) -> List[TodoWork]:
+    """Attach to each todo period the commits that landed during it
+
+    Args:
+        timeline: Refreshed commit timeline
+        periods: Todo work periods
+
+    Returns:
+        The periods with their commits filled in
+    """
+    return [
+        period._replace(commits=timeline.between(period.started, period.finished))
+        for period in periods
+    ]
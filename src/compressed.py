@@ -0,0 +1,493 @@
+# ABOUTME: Transparent reading of gzip and zstd compressed session transcripts
+# ABOUTME: Keeps a frame-offset index so tail lookups decompress only the last frames
+
+import bisect
+import gzip
+import hashlib
+import io
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from src.paths import get_cache_dir
+
+try:
+    # Standard library from Python 3.14
+    from compression import zstd as _stdlib_zstd  # type: ignore[import-not-found]
+except ImportError:
+    _stdlib_zstd = None
+
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:
+    zstandard = None
+
+# Errors raised by the decompressors for corrupt data
+_DECOMPRESS_ERRORS: Tuple[type, ...] = (zlib.error, EOFError)
+if _stdlib_zstd is not None:
+    _DECOMPRESS_ERRORS += (_stdlib_zstd.ZstdError,)
+if zstandard is not None:
+    _DECOMPRESS_ERRORS += (zstandard.ZstdError,)
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# File name suffixes of session transcripts, plain and compressed
+SESSION_SUFFIXES = {".jsonl": None, ".jsonl.gz": GZIP, ".jsonl.zst": ZSTD}
+
+# Glob patterns matching every session transcript in a project folder
+SESSION_PATTERNS = tuple(f"*{suffix}" for suffix in SESSION_SUFFIXES)
+
+# Uncompressed bytes per independent frame (gzip member or zstd frame) written
+# by write_framed
+FRAME_BYTES = 1024 * 1024
+
+# Bump when the cached frame index layout changes
+INDEX_VERSION = 1
+
+# Compressed bytes read at a time while building a frame index
+_READ_CHUNK = 256 * 1024
+
+
+class CompressionUnavailable(OSError):
+    """Raised for .zst files when no zstd implementation is installed"""
+
+
+def compression_of(path: str | Path) -> Optional[str]:
+    """Get the compression of a session file from its name
+
+    Args:
+        path: Session file path
+
+    Returns:
+        GZIP, ZSTD, or None for plain JSONL
+    """
+    name = str(path)
+    if name.endswith(".gz"):
+        return GZIP
+    if name.endswith(".zst"):
+        return ZSTD
+    return None
+
+
+def session_stem(path: str | Path) -> str:
+    """Get the session id part of a transcript file name
+
+    Args:
+        path: Session file path
+
+    Returns:
+        The name without its .jsonl, .jsonl.gz or .jsonl.zst suffix
+    """
+    name = Path(path).name
+    for suffix in sorted(SESSION_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return Path(path).stem
+
+
+def list_sessions(directory: Path, prefix: str = "") -> List[Path]:
+    """Find the session transcripts under a directory, plain and compressed
+
+    Args:
+        directory: Directory to search
+        prefix: Glob prefix of each pattern, e.g. ``*/`` for every project
+            folder below the directory
+
+    Returns:
+        Paths of the transcripts in sorted order
+    """
+    return sorted(
+        path
+        for pattern in SESSION_PATTERNS
+        for path in directory.glob(prefix + pattern)
+    )
+
+
+def _zstd_decompressobj():
+    """Create a decompressor for one zstd frame
+
+    Raises:
+        CompressionUnavailable: If neither compression.zstd nor zstandard exists
+    """
+    if _stdlib_zstd is not None:
+        return _stdlib_zstd.ZstdDecompressor()
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise CompressionUnavailable(
+        "reading .zst transcripts needs Python 3.14 or the zstandard package"
+    )
+
+
+def _decompressobj(kind: str):
+    """Create a decompressor for one frame of the given compression
+
+    Args:
+        kind: GZIP or ZSTD
+
+    Returns:
+        An object with decompress(), eof and unused_data
+    """
+    if kind == GZIP:
+        return zlib.decompressobj(wbits=31)
+    return _zstd_decompressobj()
+
+
+def _decompress(decompressor, data: bytes) -> bytes:
+    """Feed compressed bytes to a decompressor
+
+    Args:
+        decompressor: Object returned by _decompressobj
+        data: Compressed bytes
+
+    Returns:
+        The bytes decompressed so far
+
+    Raises:
+        OSError: If the data is corrupt
+    """
+    try:
+        return decompressor.decompress(data)
+    except _DECOMPRESS_ERRORS as e:
+        raise OSError(f"corrupt compressed transcript: {e}") from e
+
+
+def _compress_frame(kind: str, data: bytes) -> bytes:
+    """Compress data into one independent frame
+
+    Args:
+        kind: GZIP or ZSTD
+        data: Uncompressed bytes
+
+    Returns:
+        A complete gzip member or zstd frame
+    """
+    if kind == GZIP:
+        return gzip.compress(data)
+    if _stdlib_zstd is not None:
+        return _stdlib_zstd.compress(data)
+    if zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    raise CompressionUnavailable(
+        "writing .zst transcripts needs Python 3.14 or the zstandard package"
+    )
+
+
+class _FrameReader(io.RawIOBase):
+    """Raw stream decompressing consecutive frames of a compressed file
+
+    Seeking jumps to the frame holding the target through the frame index and
+    decompresses only from there.
+    """
+
+    def __init__(self, path: str | Path, kind: str):
+        self._path = path
+        self._raw = open(path, "rb")
+        self._kind = kind
+        self._decompressor = _decompressobj(kind)
+        self._buffer = b""
+        self._position = 0  # uncompressed offset of the start of the buffer
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            data = self._decompressor.unused_data or self._raw.read(_READ_CHUNK)
+            if self._decompressor.eof:
+                if not data.strip(b"\0"):
+                    return 0  # end of the file, or padding after the last frame
+                # The next member or frame starts right after this one
+                self._decompressor = _decompressobj(self._kind)
+            elif not data:
+                return 0  # truncated final frame; keep what was decoded
+            self._buffer = _decompress(self._decompressor, data)
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        self._position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += load_frame_index(self._path)[-1][1]
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"invalid whence ({whence})")
+        if offset < 0:
+            raise OSError("negative seek position")
+        if offset == self._position:
+            return offset
+
+        frames = load_frame_index(self._path)
+        starts = [uncompressed for _, uncompressed in frames]
+        frame = max(0, bisect.bisect_right(starts, offset) - 1)
+        frame = min(frame, len(frames) - 2) if len(frames) > 1 else 0
+        self._raw.seek(frames[frame][0])
+        self._decompressor = _decompressobj(self._kind)
+        self._buffer = b""
+        self._position = frames[frame][1]
+        # Decompress and drop the part of the frame before the target
+        skip = bytearray(min(_READ_CHUNK, max(0, offset - self._position)))
+        while self._position < offset:
+            view = memoryview(skip)[: offset - self._position]
+            if not self.readinto(view):
+                break
+        return self._position
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+def open_session(path: str | Path) -> BinaryIO:
+    """Open a session transcript for reading, decompressing it on the fly
+
+    Args:
+        path: Plain, gzip or zstd compressed JSONL file
+
+    Returns:
+        A seekable binary stream of the uncompressed JSONL
+
+    Raises:
+        OSError: If the file cannot be opened, or for a .zst file when no zstd
+            implementation is available
+    """
+    kind = compression_of(path)
+    if kind is None:
+        return open(path, "rb")
+    if kind == ZSTD:
+        _zstd_decompressobj()  # fail early with a clear message
+    return io.BufferedReader(_FrameReader(path, kind))
+
+
+def build_frame_index(path: str | Path) -> List[Tuple[int, int]]:
+    """Find where each frame of a compressed file starts
+
+    The whole file is decompressed once; the result is cached by
+    load_frame_index.
+
+    Args:
+        path: gzip or zstd compressed file
+
+    Returns:
+        (compressed offset, uncompressed offset) of each frame, followed by
+        the compressed and uncompressed sizes of the whole file
+    """
+    kind = compression_of(path) or GZIP
+    frames = [(0, 0)]
+    compressed = uncompressed = 0
+    decompressor = _decompressobj(kind)
+    with open(path, "rb") as f:
+        data = f.read(_READ_CHUNK)
+        while data:
+            uncompressed += len(_decompress(decompressor, data))
+            if not decompressor.eof:
+                compressed += len(data)
+                data = f.read(_READ_CHUNK)
+                continue
+            unused = decompressor.unused_data
+            compressed += len(data) - len(unused)
+            data = unused or f.read(_READ_CHUNK)
+            if not data.strip(b"\0"):
+                break  # end of the file, or padding after the last frame
+            frames.append((compressed, uncompressed))
+            decompressor = _decompressobj(kind)
+    frames.append((compressed, uncompressed))
+    return frames
+
+
+def _index_location(path: str | Path, cache_dir: Optional[Path]) -> Tuple[Path, list]:
+    """Get where the frame index of a file is cached and what it must match
+
+    Args:
+        path: Compressed file
+        cache_dir: Where indexes are kept. Defaults to the cache dir.
+
+    Returns:
+        Tuple of (index file, [resolved path, inode, size, mtime_ns])
+
+    Raises:
+        OSError: If the file cannot be stat'ed
+    """
+    stat = os.stat(path)
+    source = [str(Path(path).resolve()), stat.st_ino, stat.st_size, stat.st_mtime_ns]
+    key = hashlib.sha1(source[0].encode("utf-8"), usedforsecurity=False).hexdigest()
+    index_dir = Path(cache_dir or get_cache_dir() / "frames")
+    return index_dir / f"{key[:16]}.json", source
+
+
+def save_frame_index(
+    path: str | Path, frames: List[Tuple[int, int]], cache_dir: Optional[Path] = None
+) -> None:
+    """Cache the frame index of a compressed file atomically
+
+    Args:
+        path: Compressed file, in its final location
+        frames: Its frame index as returned by build_frame_index
+        cache_dir: Where indexes are kept. Defaults to the cache dir.
+    """
+    try:
+        index_path, source = _index_location(path, cache_dir)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": INDEX_VERSION, "source": source, "frames": frames},
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, index_path)
+    except (IOError, OSError):
+        pass
+
+
+def load_frame_index(
+    path: str | Path, cache_dir: Optional[Path] = None
+) -> List[Tuple[int, int]]:
+    """Get the frame index of a compressed file, building it at most once
+
+    Args:
+        path: gzip or zstd compressed file
+        cache_dir: Where indexes are kept. Defaults to the cache dir.
+
+    Returns:
+        Frame index as returned by build_frame_index
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    index_path, source = _index_location(path, cache_dir)
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if (
+            isinstance(data, dict)
+            and data.get("version") == INDEX_VERSION
+            and data.get("source") == source
+        ):
+            return [(start, offset) for start, offset in data["frames"]]
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        pass
+
+    frames = build_frame_index(path)
+    save_frame_index(path, frames, cache_dir)
+    return frames
+
+
+def iter_frames_reversed(
+    path: str | Path, cache_dir: Optional[Path] = None
+) -> Iterator[Tuple[int, bytes]]:
+    """Decompress the frames of a compressed file from last to first
+
+    Args:
+        path: gzip or zstd compressed file
+        cache_dir: Where frame indexes are kept
+
+    Yields:
+        Uncompressed offset and content of each frame
+    """
+    kind = compression_of(path) or GZIP
+    frames = load_frame_index(path, cache_dir)
+    with open(path, "rb") as f:
+        for (start, offset), (end, _) in reversed(list(zip(frames, frames[1:]))):
+            f.seek(start)
+            yield offset, _decompress(_decompressobj(kind), f.read(end - start))
+
+
+def iter_lines_reversed(
+    path: str | Path, cache_dir: Optional[Path] = None
+) -> Iterator[bytes]:
+    """Yield the complete lines of a compressed file from last to first
+
+    Lines may span frames; only as many frames as needed are decompressed.
+
+    Args:
+        path: gzip or zstd compressed file
+        cache_dir: Where frame indexes are kept
+
+    Yields:
+        Lines without their newline
+    """
+    carry = b""  # start of the line that continues into the later frame
+    for _, frame in iter_frames_reversed(path, cache_dir):
+        lines = (frame + carry).split(b"\n")
+        carry = lines[0]
+        for line in reversed(lines[1:]):
+            if line:
+                yield line
+    if carry:
+        yield carry
+
+
+def read_tail(
+    path: str | Path, window: int, cache_dir: Optional[Path] = None
+) -> Tuple[bytes, bool]:
+    """Read at least the last ``window`` uncompressed bytes of a compressed file
+
+    Args:
+        path: gzip or zstd compressed file
+        window: Number of bytes wanted from the end
+        cache_dir: Where frame indexes are kept
+
+    Returns:
+        Tuple of (bytes, whether they start at the beginning of the file)
+    """
+    chunks: List[bytes] = []
+    offset = 0
+    size = 0
+    for offset, frame in iter_frames_reversed(path, cache_dir):
+        chunks.append(frame)
+        size += len(frame)
+        if size >= window:
+            break
+    return b"".join(reversed(chunks)), offset == 0
+
+
+def write_framed(
+    lines: Iterable[bytes],
+    out: BinaryIO,
+    kind: str = GZIP,
+    frame_bytes: int = FRAME_BYTES,
+) -> List[Tuple[int, int]]:
+    """Write lines as a compressed stream of independent frames
+
+    Frames end on line boundaries, so a tail lookup never has to decompress
+    more than the frames holding the lines it needs.
+
+    Args:
+        lines: Lines including their newlines, e.g. an open JSONL file
+        out: Binary stream to write to, positioned at its start
+        kind: GZIP or ZSTD
+        frame_bytes: Uncompressed bytes per frame
+
+    Returns:
+        Frame index of what was written, for save_frame_index
+    """
+    frames = [(0, 0)]
+    pending: List[bytes] = []
+    pending_bytes = 0
+
+    def flush() -> None:
+        compressed, uncompressed = frames[-1]
+        written = out.write(_compress_frame(kind, b"".join(pending)))
+        frames.append((compressed + written, uncompressed + pending_bytes))
+
+    for line in lines:
+        pending.append(line)
+        pending_bytes += len(line)
+        if pending_bytes >= frame_bytes:
+            flush()
+            pending, pending_bytes = [], 0
+    if pending or len(frames) == 1:
+        flush()
+    return frames
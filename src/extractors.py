@@ -0,0 +1,319 @@
+# ABOUTME: Declarative registry of per-session metrics computed in one pass over a file
+# ABOUTME: Compiles extractors into a dispatch table and a byte prefilter for scans
+
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.compressed import open_session
+
+# Combine the accumulated value with the value of one matching entry or item
+REDUCERS: Dict[str, Callable[[Any, Any], Any]] = {
+    "last": lambda acc, value: value,
+    "first": lambda acc, value: value if acc is None else acc,
+    "count": lambda acc, value: (acc or 0) + 1,
+    "sum": lambda acc, value: (acc or 0) + value,
+}
+
+_registry_ids = itertools.count(1)
+
+
+class Extractor(NamedTuple):
+    """One metric extracted from session entries
+
+    An extractor matches entries by ``entry_type`` and, when ``item_type`` or
+    ``tool_name`` is set, the items of the entry's message content. ``value``
+    receives the entry and the matching item (None for entry-level extractors)
+    and returns the value to reduce, or None to skip the match. Without
+    ``value``, the item (or entry) itself is used.
+
+    Claude Code writes each content block of an API response as an entry of
+    its own, every one carrying the response's ``message.id`` and usage. With
+    ``once_per_message``, entries repeating the message id of the previous
+    assistant entry are skipped, so e.g. token sums count each response once.
+    """
+
+    name: str
+    reducer: str = "last"
+    entry_type: Optional[str] = None
+    item_type: Optional[str] = None
+    tool_name: Optional[str] = None
+    value: Optional[Callable[[dict, Optional[dict]], Any]] = None
+    include_sidechains: bool = False
+    once_per_message: bool = False
+
+
+class ExtractorRegistry:
+    """A set of extractors compiled into a single dispatch table
+
+    Entry-level extractors are keyed by entry type and item-level extractors by
+    (item type, tool name), so each decoded entry is only offered to the
+    extractors that declared interest in it. The declared keys also give the
+    byte strings a line must contain to be worth decoding at all.
+    """
+
+    def __init__(self, extractors: Optional[List[Extractor]] = None):
+        """Create a registry
+
+        Args:
+            extractors: Extractors to register right away
+        """
+        self._extractors: List[Extractor] = []
+        self._compiled = False
+        self._entry_table: Dict[Optional[str], List[Extractor]] = {}
+        self._item_table: Dict[Tuple[str, Optional[str]], List[Extractor]] = {}
+        self._needles: Optional[Tuple[bytes, ...]] = None
+        self._key = ""
+        for extractor in extractors or []:
+            self.register(extractor)
+
+    def register(self, extractor: Extractor) -> None:
+        """Add an extractor
+
+        Args:
+            extractor: Extractor to add
+
+        Raises:
+            ValueError: If the name is taken or the reducer is unknown
+        """
+        if extractor.reducer not in REDUCERS:
+            raise ValueError(f"unknown reducer {extractor.reducer!r}")
+        if any(existing.name == extractor.name for existing in self._extractors):
+            raise ValueError(f"extractor {extractor.name!r} is already registered")
+        self._extractors.append(extractor)
+        self._compiled = False
+
+    @property
+    def key(self) -> str:
+        """Identifies the compiled extractor set, e.g. in shared parse caches"""
+        if not self._compiled:
+            self.compile()
+        return self._key
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the registered extractors, in registration order"""
+        return [extractor.name for extractor in self._extractors]
+
+    def compile(self) -> None:
+        """Build the dispatch tables and the prefilter
+
+        Called automatically before the first use after a registration.
+        """
+        entry_table: Dict[Optional[str], List[Extractor]] = {}
+        item_table: Dict[Tuple[str, Optional[str]], List[Extractor]] = {}
+        needles: Optional[List[bytes]] = []
+        for extractor in self._extractors:
+            if extractor.item_type is None and extractor.tool_name is None:
+                entry_table.setdefault(extractor.entry_type, []).append(extractor)
+            else:
+                item_type = extractor.item_type or "tool_use"
+                key = (item_type, extractor.tool_name)
+                item_table.setdefault(key, []).append(extractor)
+
+            # The most specific declared key must appear in a matching line
+            literal = extractor.tool_name or extractor.item_type or extractor.entry_type
+            if literal is None:
+                needles = None
+            elif needles is not None:
+                needles.append(json.dumps(literal).encode("utf-8"))
+
+        self._entry_table = entry_table
+        self._item_table = item_table
+        self._needles = tuple(set(needles)) if needles is not None else None
+        self._key = f"extractors-{next(_registry_ids)}"
+        self._compiled = True
+
+    def initial(self) -> Dict[str, Any]:
+        """Get the starting values of all extractors
+
+        Returns:
+            Mapping of extractor name to None
+        """
+        return {extractor.name: None for extractor in self._extractors}
+
+    def wants(self, raw_line: bytes) -> bool:
+        """Check whether a line can match any extractor without decoding it
+
+        Args:
+            raw_line: Raw JSONL line
+
+        Returns:
+            False only if no extractor can possibly match the line
+        """
+        if not self._compiled:
+            self.compile()
+        if self._needles is None:
+            return True
+        return any(needle in raw_line for needle in self._needles)
+
+    def feed(self, values: Dict[str, Any], entry: Any, repeated: bool = False) -> None:
+        """Apply one decoded entry to the accumulated values
+
+        Args:
+            values: Accumulated values, updated in place
+            entry: Decoded JSONL entry
+            repeated: Whether the entry continues the message of the previous
+                assistant entry; ``once_per_message`` extractors then skip it
+        """
+        if not self._compiled:
+            self.compile()
+        if not isinstance(entry, dict):
+            return
+        sidechain = bool(entry.get("isSidechain"))
+        entry_type = entry.get("type")
+        if not isinstance(entry_type, str):
+            entry_type = None
+
+        for extractor in self._entry_table.get(None, ()):
+            self._apply(values, extractor, entry, None, sidechain, repeated)
+        if entry_type is not None:
+            for extractor in self._entry_table.get(entry_type, ()):
+                self._apply(values, extractor, entry, None, sidechain, repeated)
+
+        if not self._item_table:
+            return
+        message = entry.get("message")
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            return
+        for item in content:
+            if not isinstance(item, dict):
+                continue
+            item_type = item.get("type")
+            if not isinstance(item_type, str):
+                continue
+            keys = [(item_type, None)]
+            if isinstance(item.get("name"), str):
+                keys.append((item_type, item["name"]))
+            for key in keys:
+                for extractor in self._item_table.get(key, ()):
+                    if extractor.entry_type not in (None, entry_type):
+                        continue
+                    self._apply(values, extractor, entry, item, sidechain, repeated)
+
+    def _apply(
+        self,
+        values: Dict[str, Any],
+        extractor: Extractor,
+        entry: dict,
+        item: Optional[dict],
+        sidechain: bool,
+        repeated: bool = False,
+    ) -> None:
+        """Reduce one match into the accumulated values
+
+        Args:
+            values: Accumulated values, updated in place
+            extractor: Matching extractor
+            entry: Decoded entry
+            item: Matching content item, or None for entry-level extractors
+            sidechain: Whether the entry comes from a subagent
+            repeated: Whether the entry continues the previous message
+        """
+        if sidechain and not extractor.include_sidechains:
+            return
+        if repeated and extractor.once_per_message:
+            return
+        if extractor.value is None:
+            value = item if item is not None else entry
+        else:
+            try:
+                value = extractor.value(entry, item)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                return
+        if value is None:
+            return
+        values[extractor.name] = REDUCERS[extractor.reducer](
+            values.get(extractor.name), value
+        )
+
+    def scan(self, jsonl_path: str | Path) -> Optional[Dict[str, Any]]:
+        """Run every extractor over a session file in a single pass
+
+        Lines that cannot match any extractor are skipped without being
+        decoded.
+
+        Args:
+            jsonl_path: Path to the JSONL file
+
+        Returns:
+            Mapping of extractor name to value, or None if the file can't be read
+        """
+        values = self.initial()
+        last_message = None
+        try:
+            with open_session(jsonl_path) as f:
+                for raw_line in f:
+                    if not self.wants(raw_line):
+                        continue
+                    try:
+                        entry = json.loads(raw_line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    current = message_id(entry)
+                    self.feed(
+                        values, entry, current is not None and current == last_message
+                    )
+                    last_message = current or last_message
+        except (IOError, OSError):
+            return None
+        return values
+
+
+def message_id(entry: Any) -> Optional[str]:
+    """Get the API message id of an assistant entry
+
+    Args:
+        entry: Decoded JSONL entry
+
+    Returns:
+        The ``message.id`` of an assistant entry, or None
+    """
+    if not isinstance(entry, dict) or entry.get("type") != "assistant":
+        return None
+    message = entry.get("message")
+    if not isinstance(message, dict) or not isinstance(message.get("id"), str):
+        return None
+    return message["id"]
+
+
+def _message_field(*keys: str) -> Callable[[dict, Optional[dict]], Any]:
+    """Build a value function reading a nested field of an entry's message
+
+    Args:
+        keys: Path of keys below ``message``
+
+    Returns:
+        Value function for an Extractor
+    """
+
+    def value(entry: dict, item: Optional[dict]) -> Any:
+        current: Any = entry["message"]
+        for key in keys:
+            current = current[key]
+        return current
+
+    return value
+
+
+# Metrics reported by --json and --serve, gathered in the main parsing pass
+SESSION_METRICS = [
+    Extractor("tool_uses", "count", entry_type="assistant", item_type="tool_use"),
+    Extractor(
+        "input_tokens",
+        "sum",
+        entry_type="assistant",
+        value=_message_field("usage", "input_tokens"),
+        once_per_message=True,
+    ),
+    Extractor(
+        "output_tokens",
+        "sum",
+        entry_type="assistant",
+        value=_message_field("usage", "output_tokens"),
+        once_per_message=True,
+    ),
+    Extractor("model", "last", entry_type="assistant", value=_message_field("model")),
+]
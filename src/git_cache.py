@@ -0,0 +1,373 @@
+# ABOUTME: Latency-budgeted git status backed by a persistent cache of past answers
+# ABOUTME: Falls back to cached values when git is slow and refreshes in the background
+
+import json
+import os
+import subprocess  # nosec B404
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.git_integration import GitIntegration, WorkingTreeStatus
+from src.paths import get_cache_dir
+
+# Upper bound on how long the background refresher waits for one repository
+REFRESH_TIMEOUT = 30.0
+
+
+class GitSnapshot:
+    """Git details of one repository
+
+    The commit is as of ``checked_at`` and the working tree as of
+    ``tree_checked_at``; each is updated as soon as its own query returns.
+    A ``checked_at`` of 0 means the commit is not known yet.
+    """
+
+    def __init__(self) -> None:
+        self.is_repository = False
+        self.commit_message: Optional[str] = None
+        self.commit_timestamp: Optional[float] = None
+        self.working_tree: Optional[WorkingTreeStatus] = None
+        self.checked_at = 0.0
+        self.tree_checked_at = 0.0
+
+    @property
+    def age(self) -> float:
+        """Seconds since the commit was queried"""
+        return max(0.0, time.time() - self.checked_at)
+
+    @property
+    def tree_age(self) -> float:
+        """Seconds since the working tree was queried"""
+        return max(0.0, time.time() - self.tree_checked_at)
+
+    def copy(self) -> "GitSnapshot":
+        """Make a copy that can be updated without affecting readers
+
+        Returns:
+            A new snapshot with the same values
+        """
+        clone = GitSnapshot()
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def merged(self, other: "GitSnapshot") -> "GitSnapshot":
+        """Combine with another snapshot, keeping the newer answer of each query
+
+        Args:
+            other: Snapshot of the same repository, e.g. saved by another process
+
+        Returns:
+            A new snapshot
+        """
+        merged = self.copy()
+        if other.checked_at > self.checked_at:
+            merged.is_repository = other.is_repository
+            merged.commit_message = other.commit_message
+            merged.commit_timestamp = other.commit_timestamp
+            merged.checked_at = other.checked_at
+        if other.tree_checked_at > self.tree_checked_at:
+            merged.working_tree = other.working_tree
+            merged.tree_checked_at = other.tree_checked_at
+        return merged
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dictionary
+
+        Returns:
+            Dictionary form of the snapshot
+        """
+        return {
+            "is_repository": self.is_repository,
+            "commit_message": self.commit_message,
+            "commit_timestamp": self.commit_timestamp,
+            "working_tree": (
+                vars(self.working_tree) if self.working_tree is not None else None
+            ),
+            "checked_at": self.checked_at,
+            "tree_checked_at": self.tree_checked_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GitSnapshot":
+        """Create a snapshot from its dictionary form
+
+        Args:
+            data: Dictionary produced by to_dict
+
+        Returns:
+            The restored snapshot
+        """
+        snapshot = cls()
+        snapshot.is_repository = bool(data.get("is_repository"))
+        snapshot.commit_message = data.get("commit_message")
+        snapshot.commit_timestamp = data.get("commit_timestamp")
+        snapshot.checked_at = float(data.get("checked_at") or 0.0)
+        snapshot.tree_checked_at = float(
+            data.get("tree_checked_at") or snapshot.checked_at
+        )
+        tree = data.get("working_tree")
+        if isinstance(tree, dict):
+            snapshot.working_tree = WorkingTreeStatus()
+            for key, value in tree.items():
+                if hasattr(snapshot.working_tree, key):
+                    setattr(snapshot.working_tree, key, value)
+        return snapshot
+
+
+class GitStatusCache:
+    """Answers git queries within a latency budget
+
+    Each refresh runs the commit and working tree queries in parallel daemon
+    threads. A caller waits only until its deadline and otherwise gets the last
+    cached snapshot. Queries that miss the deadline keep running in a
+    long-lived process; a short-lived one hands them to a detached refresher
+    process on exit. Snapshots are saved to disk so the next process starts
+    warm.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None, wait_for_fresh: bool = True):
+        """Create a cache, loading previous answers from disk
+
+        Args:
+            cache_path: JSON file for persisted snapshots. Defaults to the cache dir.
+            wait_for_fresh: Whether get() spends its budget waiting for a
+                refresh when a stale snapshot is cached. If False, a cached
+                snapshot is returned at once and only a repository that was
+                never queried is waited for.
+        """
+        self.cache_path = Path(cache_path or get_cache_dir() / "git_status.json")
+        self.wait_for_fresh = wait_for_fresh
+        self.git = GitIntegration()
+        self._snapshots: Dict[str, GitSnapshot] = {}
+        # repository -> (commit query done, whole refresh done)
+        self._pending: Dict[str, Tuple[threading.Event, threading.Event]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def _read_file(self) -> Dict[str, GitSnapshot]:
+        """Read persisted snapshots, ignoring a missing or corrupt file
+
+        Returns:
+            Mapping of repository path to snapshot
+        """
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            repo: GitSnapshot.from_dict(snapshot)
+            for repo, snapshot in data.items()
+            if isinstance(snapshot, dict)
+        }
+
+    def load(self) -> None:
+        """Load persisted snapshots, keeping newer ones already in memory"""
+        stored = self._read_file()
+        with self._lock:
+            for repo, snapshot in stored.items():
+                current = self._snapshots.get(repo)
+                self._snapshots[repo] = (
+                    snapshot if current is None else current.merged(snapshot)
+                )
+
+    def save(self) -> None:
+        """Persist snapshots if anything changed since the last save
+
+        Snapshots written by other processes in the meantime are merged, keeping
+        the newest answer for every repository.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+        self.load()
+        with self._lock:
+            data = {repo: snap.to_dict() for repo, snap in self._snapshots.items()}
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f".{self.cache_path.name}.{os.getpid()}.tmp"
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except (IOError, OSError):
+            pass
+
+    def get(
+        self, repo_path: Optional[str], budget: float, max_age: float = 5.0
+    ) -> Optional[GitSnapshot]:
+        """Get git details for a repository within a time budget
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+            budget: Seconds the caller is willing to wait
+            max_age: Seconds after which a cached snapshot is refreshed
+
+        Returns:
+            The latest snapshot, holding whatever arrived in time, or None if
+            the repository has never answered
+        """
+        key = os.path.abspath(repo_path or os.getcwd())
+
+        with self._lock:
+            cached = self._snapshots.get(key)
+            events = self._pending.get(key)
+            if events is None and (cached is None or cached.age > max_age):
+                events = self._pending[key] = (threading.Event(), threading.Event())
+                threading.Thread(
+                    target=self._refresh, args=(key, *events), daemon=True
+                ).start()
+
+        if events is None:
+            return cached
+        commit_done, done = events
+        if self.wait_for_fresh:
+            done.wait(max(0.0, budget))
+        elif cached is None:
+            # Nothing to show yet: wait for the fast commit query only
+            commit_done.wait(max(0.0, budget))
+        with self._lock:
+            return self._snapshots.get(key)
+
+    def start(self, repo_paths: Iterable[Optional[str]], max_age: float = 5.0) -> None:
+        """Start refreshing stale repositories without waiting for them
+
+        Lets several repositories share one budget: their queries run in
+        parallel while the caller works through them one by one.
+
+        Args:
+            repo_paths: Repository paths; None means the current directory
+            max_age: Seconds after which a cached snapshot is refreshed
+        """
+        for repo_path in repo_paths:
+            self.get(repo_path, 0.0, max_age)
+
+    def _refresh(
+        self, key: str, commit_done: threading.Event, done: threading.Event
+    ) -> None:
+        """Run the git queries for one repository and store the results
+
+        The commit and working tree queries run in parallel, and each result
+        is published as soon as its query returns, so a slow ``git status``
+        never holds back the commit. A query that times out leaves the
+        previous cached value in place.
+
+        Args:
+            key: Absolute repository path used as cache key
+            commit_done: Event set once the commit query has finished
+            done: Event set once both queries have finished
+        """
+        try:
+            tree_thread = threading.Thread(
+                target=self._refresh_tree, args=(key,), daemon=True
+            )
+            tree_thread.start()
+            summary = self.git.get_commit_summary(key)
+            if summary is not None:
+                with self._lock:
+                    snapshot = self._editable(key)
+                    snapshot.is_repository, snapshot.commit_message = summary[:2]
+                    snapshot.commit_timestamp = summary[2]
+                    snapshot.checked_at = time.time()
+            commit_done.set()
+            tree_thread.join()
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            commit_done.set()
+            done.set()
+
+    def _refresh_tree(self, key: str) -> None:
+        """Run the working tree query for one repository and store the result
+
+        Args:
+            key: Absolute repository path used as cache key
+        """
+        tree = self.git.get_working_tree_status(key)
+        if tree is None:
+            return
+        with self._lock:
+            snapshot = self._editable(key)
+            snapshot.is_repository = True
+            snapshot.working_tree = tree
+            snapshot.tree_checked_at = time.time()
+
+    def _editable(self, key: str) -> GitSnapshot:
+        """Replace the snapshot of a repository by a copy to update in place
+
+        Readers keep the snapshot they already got unchanged. The caller holds
+        the lock.
+
+        Args:
+            key: Absolute repository path used as cache key
+
+        Returns:
+            The stored copy
+        """
+        previous = self._snapshots.get(key)
+        snapshot = previous.copy() if previous is not None else GitSnapshot()
+        self._snapshots[key] = snapshot
+        self._dirty = True
+        return snapshot
+
+    def pending_repositories(self) -> List[str]:
+        """Get the repositories whose git queries are still running
+
+        Returns:
+            Absolute repository paths
+        """
+        with self._lock:
+            return list(self._pending)
+
+    def finish(self) -> None:
+        """Persist results and hand unfinished git queries to a refresher process
+
+        A shell prompt waits for our process to exit, so queries that ran over
+        budget are not awaited here. Instead a detached ``python -m
+        src.git_cache`` process reruns them and saves the answers for the next
+        call.
+        """
+        self.save()
+        pending = self.pending_repositories()
+        if not pending:
+            return
+
+        sys.stdout.flush()
+        try:
+            subprocess.Popen(  # nosec B603
+                [sys.executable, "-m", "src.git_cache", str(self.cache_path)] + pending,
+                cwd=str(Path(__file__).resolve().parent.parent),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError:
+            pass
+
+
+def refresh_repositories(cache_path: Path, repositories: List[str]) -> None:
+    """Refresh the persisted snapshots of the given repositories
+
+    Args:
+        cache_path: JSON file for persisted snapshots
+        repositories: Absolute repository paths
+    """
+    cache = GitStatusCache(cache_path)
+    for repo in repositories:
+        cache.get(repo, budget=REFRESH_TIMEOUT, max_age=0)
+    cache.save()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        refresh_repositories(Path(sys.argv[1]), sys.argv[2:])
@@ -1,13 +1,164 @@
 # ABOUTME: Git integration functionality for Claude status display script
 # ABOUTME: Handles extraction of git commit messages and repository status checks
 
+import asyncio
+import os
 import subprocess  # nosec B404
-from typing import Optional
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# git status arguments: never take index.lock and reuse the untracked cache
+WORKING_TREE_STATUS_ARGS = [
+    "--no-optional-locks",
+    "-c",
+    "core.untrackedCache=true",
+    "status",
+    "--porcelain=v2",
+    "--branch",
+]
+
+
+class WorkingTreeStatus:
+    """Dirty state and upstream divergence of a git working tree"""
+
+    def __init__(self) -> None:
+        self.branch: Optional[str] = None
+        self.upstream: Optional[str] = None
+        self.ahead = 0
+        self.behind = 0
+        self.staged = 0
+        self.unstaged = 0
+        self.untracked = 0
+        self.conflicted = 0
+
+    @property
+    def changed(self) -> int:
+        """Number of tracked files with staged or unstaged changes"""
+        return self.staged + self.unstaged + self.conflicted
+
+    @property
+    def is_dirty(self) -> bool:
+        """Whether there are any uncommitted or untracked changes"""
+        return bool(self.changed or self.untracked)
+
+    def summary(self) -> str:
+        """Format the status for the multi-line display
+
+        Returns:
+            Text like "main, 3 changed, 1 untracked, ahead 2" or "main, clean"
+        """
+        parts = [self.branch or "(detached)"]
+        if self.conflicted:
+            parts.append(f"{self.conflicted} conflicted")
+        if self.staged:
+            parts.append(f"{self.staged} staged")
+        if self.unstaged:
+            parts.append(f"{self.unstaged} modified")
+        if self.untracked:
+            parts.append(f"{self.untracked} untracked")
+        if not self.is_dirty:
+            parts.append("clean")
+        if self.ahead:
+            parts.append(f"ahead {self.ahead}")
+        if self.behind:
+            parts.append(f"behind {self.behind}")
+        return ", ".join(parts)
+
+    def compact(self) -> str:
+        """Format the status for the two-line display
+
+        Returns:
+            Text like "*3 ?1 +2 -1", or "" for a clean tree in sync with upstream
+        """
+        parts = []
+        if self.changed:
+            parts.append(f"*{self.changed}")
+        if self.untracked:
+            parts.append(f"?{self.untracked}")
+        if self.ahead:
+            parts.append(f"+{self.ahead}")
+        if self.behind:
+            parts.append(f"-{self.behind}")
+        return " ".join(parts)
+
+
+def parse_porcelain_v2(output: str) -> WorkingTreeStatus:
+    """Parse the output of ``git status --porcelain=v2 --branch``
+
+    Args:
+        output: Command output
+
+    Returns:
+        The parsed working tree status
+    """
+    status = WorkingTreeStatus()
+    for line in output.splitlines():
+        if line.startswith("# branch.head "):
+            head = line[len("# branch.head ") :]
+            status.branch = None if head == "(detached)" else head
+        elif line.startswith("# branch.upstream "):
+            status.upstream = line[len("# branch.upstream ") :]
+        elif line.startswith("# branch.ab "):
+            fields = line.split()
+            try:
+                status.ahead = int(fields[2].lstrip("+"))
+                status.behind = int(fields[3].lstrip("-"))
+            except (IndexError, ValueError):
+                pass
+        elif line.startswith(("1 ", "2 ")):
+            xy = line[2:4]
+            if xy[:1] != ".":
+                status.staged += 1
+            if xy[1:2] != ".":
+                status.unstaged += 1
+        elif line.startswith("u "):
+            status.conflicted += 1
+        elif line.startswith("? "):
+            status.untracked += 1
+    return status
+
+
+def find_git_dir(start: Optional[str] = None) -> Optional[Path]:
+    """Find the git directory of a work tree without running git
+
+    Follows the ``gitdir:`` pointer of linked worktrees and submodules.
+
+    Args:
+        start: Directory inside the work tree. If None, uses current directory.
+
+    Returns:
+        The git directory, or None outside a repository
+    """
+    current = Path(os.path.abspath(start or os.getcwd()))
+    for directory in (current, *current.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            try:
+                content = dot_git.read_text(encoding="utf-8").strip()
+            except (IOError, OSError, UnicodeDecodeError):
+                return None
+            if content.startswith("gitdir:"):
+                return (directory / content[len("gitdir:") :].strip()).resolve()
+            return None
+    return None
 
 
 class GitIntegration:
     """Git integration for extracting commit information and repository status"""
 
+    # Seconds a background `git status` may run before it is abandoned
+    WORKING_TREE_TIMEOUT = 10.0
+
+    # Stale-while-revalidate cache shared by every instance in the process:
+    # repository path -> (last known status, time it was computed)
+    _tree_cache: Dict[str, Tuple[WorkingTreeStatus, float]] = {}
+    _tree_refreshing: Dict[str, threading.Thread] = {}
+    _tree_lock = threading.Lock()
+
     def get_last_commit_timestamp(
         self, repo_path: Optional[str] = None
     ) -> Optional[float]:
@@ -127,3 +278,238 @@ class GitIntegration:
             return False
         except Exception:
             return False
+
+    async def _run_git_async(
+        self, args: List[str], repo_path: Optional[str] = None, timeout: float = 10
+    ) -> Tuple[int, str]:
+        """Run a git command without blocking the event loop
+
+        Args:
+            args: Arguments passed to git
+            repo_path: Path to the git repository. If None, uses current directory.
+            timeout: Seconds to wait before killing the command
+
+        Returns:
+            Tuple of (returncode, stdout). Failures return a non-zero returncode.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                "git",
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=str(repo_path) if repo_path else None,
+            )
+        except OSError:
+            return -1, ""
+
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, ""
+
+        returncode = process.returncode if process.returncode is not None else -1
+        return returncode, stdout.decode("utf-8", errors="replace")
+
+    async def get_last_commit_timestamp_async(
+        self, repo_path: Optional[str] = None
+    ) -> Optional[float]:
+        """Async variant of get_last_commit_timestamp
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+
+        Returns:
+            Unix timestamp of the last commit, or None if not available
+        """
+        returncode, stdout = await self._run_git_async(
+            ["log", "-1", "--pretty=format:%ct"], repo_path, timeout=10
+        )
+        if returncode != 0:
+            return None
+        try:
+            return float(stdout.strip())
+        except ValueError:
+            return None
+
+    async def get_last_commit_message_async(
+        self, repo_path: Optional[str] = None
+    ) -> Optional[str]:
+        """Async variant of get_last_commit_message
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+
+        Returns:
+            The last commit message, or None if not available
+        """
+        returncode, stdout = await self._run_git_async(
+            ["log", "-1", "--pretty=format:%s"], repo_path, timeout=10
+        )
+        if returncode != 0:
+            return None
+        return stdout.strip()
+
+    async def is_git_repository_async(self, repo_path: Optional[str] = None) -> bool:
+        """Async variant of is_git_repository
+
+        Args:
+            repo_path: Path to check. If None, uses current directory.
+
+        Returns:
+            True if it's a git repository, False otherwise
+        """
+        returncode, _ = await self._run_git_async(
+            ["rev-parse", "--git-dir"], repo_path, timeout=5
+        )
+        return returncode == 0
+
+    def get_commit_summary(
+        self, repo_path: Optional[str] = None, timeout: float = 10
+    ) -> Optional[Tuple[bool, Optional[str], Optional[float]]]:
+        """Get repository state and last commit with as few git calls as possible
+
+        A single ``git log`` answers the common case; ``git rev-parse`` only runs
+        when it fails, to tell an empty repository from a non-repository.
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+            timeout: Seconds to wait for each git command
+
+        Returns:
+            Tuple of (is_repository, commit_message, commit_timestamp), or None if
+            git timed out and the answer is unknown
+        """
+        try:
+            result = subprocess.run(  # nosec B603
+                ["git", "log", "-1", "--pretty=format:%ct%x00%s"],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                cwd=str(repo_path) if repo_path else None,
+            )
+            if result.returncode == 0:
+                timestamp_str, _, message = result.stdout.partition("\0")
+                try:
+                    timestamp: Optional[float] = float(timestamp_str)
+                except ValueError:
+                    timestamp = None
+                return True, message.strip(), timestamp
+
+        except subprocess.TimeoutExpired:
+            return None
+        except (subprocess.SubprocessError, OSError):
+            return False, None, None
+        except Exception:
+            return False, None, None
+
+        return self.is_git_repository(repo_path), None, None
+
+    def get_working_tree_status(
+        self, repo_path: Optional[str] = None, timeout: float = WORKING_TREE_TIMEOUT
+    ) -> Optional[WorkingTreeStatus]:
+        """Get the dirty, ahead and behind state of the working tree
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+            timeout: Seconds to wait for git status
+
+        Returns:
+            The working tree status, or None if not available
+        """
+        try:
+            result = subprocess.run(  # nosec B603
+                ["git", *WORKING_TREE_STATUS_ARGS],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                cwd=str(repo_path) if repo_path else None,
+            )
+            if result.returncode != 0:
+                return None
+            return parse_porcelain_v2(result.stdout)
+
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+            return None
+        except Exception:
+            return None
+
+    async def get_working_tree_status_async(
+        self, repo_path: Optional[str] = None, timeout: float = WORKING_TREE_TIMEOUT
+    ) -> Optional[WorkingTreeStatus]:
+        """Async variant of get_working_tree_status
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+            timeout: Seconds to wait for git status
+
+        Returns:
+            The working tree status, or None if not available
+        """
+        returncode, stdout = await self._run_git_async(
+            WORKING_TREE_STATUS_ARGS, repo_path, timeout=timeout
+        )
+        if returncode != 0:
+            return None
+        return parse_porcelain_v2(stdout)
+
+    def get_working_tree_status_cached(
+        self,
+        repo_path: Optional[str] = None,
+        max_age: float = 5.0,
+        wait: float = 0.0,
+    ) -> Tuple[Optional[WorkingTreeStatus], Optional[float]]:
+        """Get the last known working tree status without blocking on git
+
+        A value older than ``max_age`` is still returned, but a background
+        refresh is started so the next call sees a fresh value. At most one
+        refresh runs per repository.
+
+        Args:
+            repo_path: Path to the git repository. If None, uses current directory.
+            max_age: Seconds after which the cached value is refreshed
+            wait: Seconds to wait for the refresh when nothing is cached yet
+
+        Returns:
+            Tuple of (status, age_in_seconds), or (None, None) if unknown
+        """
+        key = os.path.abspath(repo_path or os.getcwd())
+        now = time.time()
+
+        with self._tree_lock:
+            cached = self._tree_cache.get(key)
+            refresh = self._tree_refreshing.get(key)
+            if refresh is None and (cached is None or now - cached[1] > max_age):
+                refresh = threading.Thread(
+                    target=self._refresh_working_tree, args=(key,), daemon=True
+                )
+                self._tree_refreshing[key] = refresh
+                refresh.start()
+
+        if cached is None and refresh is not None and wait > 0:
+            refresh.join(wait)
+            with self._tree_lock:
+                cached = self._tree_cache.get(key)
+
+        if cached is None:
+            return None, None
+        return cached[0], max(0.0, time.time() - cached[1])
+
+    def _refresh_working_tree(self, key: str) -> None:
+        """Recompute the cached working tree status in the background
+
+        A failed or timed out refresh keeps the previous value.
+
+        Args:
+            key: Absolute repository path used as cache key
+        """
+        try:
+            status = self.get_working_tree_status(key)
+            if status is not None:
+                with self._tree_lock:
+                    self._tree_cache[key] = (status, time.time())
+        finally:
+            with self._tree_lock:
+                self._tree_refreshing.pop(key, None)
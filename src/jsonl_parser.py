@@ -2,14 +2,264 @@
 # ABOUTME: Handles reading JSONL conversation files and extracting status information
 
 import json
+import re
+from array import array
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from src.compressed import compression_of, iter_lines_reversed, open_session
+from src.extractors import ExtractorRegistry, message_id
+from src.parse_cache import ParseCache
+from src.todos import TodoList
+
+# Only lines containing one of these can hold a prompt or a todo list
+_NEEDLES = (b'"user"', b'odos"')
+
+# sessionId of a line that is skipped without being decoded
+_SESSION_ID = re.compile(rb'"sessionId"\s*:\s*"([^"\\]*)"')
+
+
+def _uuid_key(uuid: str) -> Union[int, str]:
+    """Convert a uuid string to a compact integer key
+
+    Args:
+        uuid: UUID string as written in the JSONL file
+
+    Returns:
+        The 128-bit integer value, or the original string if it is not a UUID
+    """
+    try:
+        return int(uuid.replace("-", ""), 16)
+    except ValueError:
+        return uuid
+
+
+class SessionBranches:
+    """Compact uuid->parent index separating the main chain from sidechains
+
+    Every entry gets a dense integer id. Parents, branch roots and the sidechain
+    flag are stored in flat arrays indexed by that id, so memory grows by a few
+    bytes per entry plus one integer dict key.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[Union[int, str], int] = {}
+        self.parents = array("q")  # parent id per entry, -1 for roots
+        self.roots = array("q")  # id of the branch root per entry
+        self.sidechain = bytearray()  # 1 if the entry is on a sidechain
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def copy(self) -> "SessionBranches":
+        """Make a copy that can be extended independently
+
+        Returns:
+            A new index with the same entries
+        """
+        clone = SessionBranches()
+        clone._ids = dict(self._ids)
+        clone.parents = array("q", self.parents)
+        clone.roots = array("q", self.roots)
+        clone.sidechain = bytearray(self.sidechain)
+        return clone
+
+    def approx_bytes(self) -> int:
+        """Estimate the memory held by this index
+
+        Returns:
+            Approximate size in bytes, dominated by the uuid dict
+        """
+        return 120 * len(self.parents)
+
+    def add(self, uuid: str, parent_uuid: Optional[str], is_sidechain: bool) -> int:
+        """Record one entry and return the id of its branch root
+
+        A sidechain entry whose parent is missing or on the main chain starts a
+        new branch. Every other entry joins the branch of its parent.
+
+        Args:
+            uuid: The entry's uuid
+            parent_uuid: The entry's parentUuid, if any
+            is_sidechain: The entry's isSidechain flag
+
+        Returns:
+            Id of the branch root the entry belongs to
+        """
+        node = len(self.parents)
+        key = _uuid_key(uuid)
+        existing = self._ids.get(key)
+        if existing is not None:
+            return self.roots[existing]
+        self._ids[key] = node
+
+        parent = -1
+        if parent_uuid:
+            parent = self._ids.get(_uuid_key(parent_uuid), -1)
+
+        if parent == -1 or is_sidechain != bool(self.sidechain[parent]):
+            # Crossing between the main chain and a sidechain starts a branch
+            root = node
+        else:
+            root = self.roots[parent]
+
+        self.parents.append(parent)
+        self.roots.append(root)
+        self.sidechain.append(1 if is_sidechain else 0)
+        return root
+
+    def root_of(self, uuid: str) -> Optional[int]:
+        """Get the branch root id for a uuid
+
+        Args:
+            uuid: Entry uuid
+
+        Returns:
+            Branch root id, or None if the uuid is unknown
+        """
+        node = self._ids.get(_uuid_key(uuid))
+        if node is None:
+            return None
+        return self.roots[node]
+
+
+class BranchStatus:
+    """Status of one conversation branch (the main chain or a subagent)"""
+
+    def __init__(self, root: int, is_sidechain: bool):
+        self.root = root
+        self.is_sidechain = is_sidechain
+        self.prompt: Optional[str] = None
+        self.prompt_timestamp: Optional[float] = None
+        self.last_timestamp: Optional[float] = None
+        self.entry_count = 0
+        self.active = True
+
+    def copy(self) -> "BranchStatus":
+        """Make a copy that can be updated independently
+
+        Returns:
+            A new branch status with the same values
+        """
+        clone = BranchStatus(self.root, self.is_sidechain)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def __repr__(self) -> str:
+        kind = "sidechain" if self.is_sidechain else "main"
+        return (
+            f"BranchStatus({kind}, root={self.root}, entries={self.entry_count}, "
+            f"active={self.active})"
+        )
+
+
+class SessionState:
+    """Main-chain prompt and todo state of a session, resumable from an offset"""
+
+    def __init__(self) -> None:
+        self.offset = 0  # bytes of the file consumed so far, including pending
+        self.pending = b""  # unterminated trailing line awaiting more bytes
+        self.malformed_lines = 0  # complete lines that were not valid JSON
+        self.session_id: Optional[str] = None  # sessionId of the latest entry
+        self.prompt: Optional[str] = None  # bounded by the parser's max_prompt_chars
+        self.prompt_length = 0  # length of the full prompt text
+        self.prompt_timestamp: Optional[float] = None
+        self.todos: Optional[TodoList] = None
+        self.raw_todos: Optional[List[Any]] = None  # todos exactly as written
+        self.todos_timestamp: Optional[float] = None
+        self.extracted: Dict[str, Any] = {}  # values of the parser's extractors
+        self.last_message_id: Optional[str] = None  # of the latest assistant entry
+        # Branch index and per-branch status, kept by parsers that track branches
+        self.branch_index: Optional[SessionBranches] = None
+        self.branches: Dict[int, BranchStatus] = {}
+
+    @property
+    def prompt_truncated(self) -> bool:
+        """Whether ``prompt`` holds only a preview of the full prompt"""
+        return self.prompt is not None and len(self.prompt) < self.prompt_length
+
+    @property
+    def partial_line_bytes(self) -> int:
+        """Number of bytes of an in-flight line not yet terminated by a newline"""
+        return len(self.pending)
+
+    def copy(self) -> "SessionState":
+        """Make a shallow copy that can be extended independently
+
+        Returns:
+            A new state with the same values
+        """
+        clone = SessionState()
+        clone.__dict__.update(self.__dict__)
+        clone.extracted = dict(self.extracted)
+        if self.branch_index is not None:
+            clone.branch_index = self.branch_index.copy()
+            clone.branches = {
+                root: branch.copy() for root, branch in self.branches.items()
+            }
+        return clone
+
+    def approx_bytes(self) -> int:
+        """Estimate the memory held by this state
+
+        Returns:
+            Approximate size in bytes, dominated by the prompt and todo texts
+        """
+        size = 256 + len(self.prompt or "") + len(self.pending)
+        if self.todos is not None:
+            # The raw dictionaries hold about as much again as the records
+            size += 2 * self.todos.approx_bytes()
+        if self.branch_index is not None:
+            size += self.branch_index.approx_bytes()
+            size += sum(256 + len(b.prompt or "") for b in self.branches.values())
+        return size + 64 * len(self.extracted)
 
 
 class JSONLParser:
     """Parser for Claude Code JSONL conversation files"""
 
+    def __init__(
+        self,
+        cache: Optional[ParseCache] = None,
+        max_prompt_chars: Optional[int] = None,
+        extractors: Optional[ExtractorRegistry] = None,
+        track_branches: bool = False,
+    ):
+        """Create a parser
+
+        Args:
+            cache: Optional shared cache of parsed session state. Without one,
+                every call parses the file from the start.
+            max_prompt_chars: Keep at most this many characters of the last
+                prompt in parsed state. Pasted prompts can be megabytes long, and
+                callers that only display a preview need not hold on to them.
+            extractors: Extra metrics computed in the same pass as the prompt
+                and todos; their values end up in ``SessionState.extracted``
+            track_branches: Also keep the main chain and subagent sidechains in
+                parsed state, so get_branch_status grows with the cached offset
+                instead of reading the whole file again
+        """
+        self.cache = cache
+        self.max_prompt_chars = max_prompt_chars
+        self.extractors = extractors
+        self.track_branches = track_branches
+
+    def with_branches(self) -> "JSONLParser":
+        """Get a parser like this one that also tracks branches
+
+        Returns:
+            This parser if it tracks branches, else one sharing its cache
+        """
+        if self.track_branches:
+            return self
+        return JSONLParser(
+            cache=self.cache,
+            max_prompt_chars=self.max_prompt_chars,
+            extractors=self.extractors,
+            track_branches=True,
+        )
+
     def _parse_timestamp(self, timestamp_str: str) -> Optional[float]:
         """Parse ISO timestamp string to Unix timestamp
 
@@ -25,151 +275,358 @@ class JSONLParser:
         except (ValueError, TypeError):
             return None
 
+    def extract_user_prompt(self, entry: dict) -> Optional[str]:
+        """Extract the prompt text from a single JSONL entry
+
+        This holds the extraction rules shared by every prompt reader: tool result
+        messages are skipped and, for list content, the last text item wins.
+
+        Args:
+            entry: Decoded JSONL entry
+
+        Returns:
+            The prompt text, or None if the entry is not a user prompt
+        """
+        # Check if this is a user message entry (but not a tool result)
+        if not (
+            entry.get("type") == "user"
+            and isinstance(entry.get("message"), dict)
+            and entry["message"].get("role") == "user"
+            and "toolUseResult" not in entry  # Skip tool result messages
+        ):
+            return None
+
+        content = entry["message"].get("content")
+        if isinstance(content, str):
+            return content
+
+        if not isinstance(content, list):
+            return None
+
+        # Skip if content contains only tool results
+        is_tool_result_only = all(
+            item.get("type") == "tool_result"
+            for item in content
+            if isinstance(item, dict)
+        )
+        if is_tool_result_only:
+            return None
+
+        # Handle content that might be a list (like in example)
+        prompt = None
+        for item in content:
+            if isinstance(item, dict) and item.get("type") == "text":
+                prompt = item.get("text", "")
+            elif isinstance(item, str):
+                prompt = item
+        return prompt
+
+    def extract_todos(self, entry: dict) -> Optional[List[dict]]:
+        """Extract a todo list from a single JSONL entry
+
+        Todo lists come either from an assistant TodoWrite tool call or from the
+        ``newTodos`` field of the matching tool result.
+
+        Args:
+            entry: Decoded JSONL entry
+
+        Returns:
+            The todo list, or None if the entry carries no todos
+        """
+        latest_todos = None
+
+        # Check if this is an assistant message with tool usage
+        if (
+            entry.get("type") == "assistant"
+            and isinstance(entry.get("message"), dict)
+            and entry["message"].get("role") == "assistant"
+        ):
+            content = entry["message"].get("content", [])
+            if isinstance(content, list):
+                for item in content:
+                    if (
+                        isinstance(item, dict)
+                        and item.get("type") == "tool_use"
+                        and item.get("name") == "TodoWrite"
+                    ):
+                        input_data = item.get("input", {})
+                        todos = input_data.get("todos")
+                        if todos and isinstance(todos, list):
+                            latest_todos = todos
+
+        # Also check for tool result with todo data
+        elif entry.get("type") == "user" and "toolUseResult" in entry:
+            tool_result = entry["toolUseResult"]
+            if isinstance(tool_result, dict):
+                new_todos = tool_result.get("newTodos")
+                if new_todos and isinstance(new_todos, list):
+                    latest_todos = new_todos
+
+        return latest_todos
+
+    def parse_session(self, jsonl_path: str | Path) -> Optional[SessionState]:
+        """Parse the main-chain prompt and todo state of a session file
+
+        With a cache attached, an unchanged file is answered from memory and a
+        file that has only grown is parsed from the last cached offset.
+
+        Args:
+            jsonl_path: Path to the JSONL file
+
+        Returns:
+            The session state, or None if the file can't be read
+        """
+        jsonl_path = Path(jsonl_path)
+        try:
+            stat = jsonl_path.stat()
+        except OSError:
+            return None
+
+        path_key = str(jsonl_path)
+        if self.max_prompt_chars is not None:
+            # States with different prompt bounds must not be mixed in a cache
+            path_key += f"\0{self.max_prompt_chars}"
+        if self.extractors is not None:
+            path_key += f"\0{self.extractors.key}"
+        if self.track_branches:
+            path_key += "\0branches"
+        state = None
+        if self.cache is not None:
+            cached, exact = self.cache.get(
+                path_key, stat.st_ino, stat.st_size, stat.st_mtime_ns
+            )
+            if cached is not None and exact:
+                return cached
+            if cached is not None:
+                # Extend a copy so concurrent readers keep a consistent snapshot
+                state = cached.copy()
+
+        if state is None:
+            state = SessionState()
+            if self.extractors is not None:
+                state.extracted = self.extractors.initial()
+            if self.track_branches:
+                state.branch_index = SessionBranches()
+
+        try:
+            with open_session(jsonl_path) as f:
+                self._scan(f, state)
+        except (IOError, OSError):
+            return None
+
+        if self.cache is not None:
+            self.cache.put(
+                path_key,
+                stat.st_ino,
+                stat.st_size,
+                stat.st_mtime_ns,
+                state,
+                state.approx_bytes(),
+            )
+        return state
+
+    def _scan(self, f: BinaryIO, state: SessionState) -> None:
+        """Feed every complete entry after ``state.offset`` into the state
+
+        Claude Code appends to the file while it is read, so the last line may
+        be half written. An unterminated last line that is not yet a whole JSON
+        document is held in ``state.pending`` and completed by the next scan,
+        instead of being counted as malformed and skipped for good.
+
+        Complete lines that can neither hold a prompt or todos nor match an
+        extractor are skipped without being decoded, so ``malformed_lines``
+        only counts lines that were worth decoding. Branch tracking needs
+        every entry and turns the prefilter off.
+
+        Args:
+            f: Session file opened in binary mode
+            state: State to extend
+        """
+        f.seek(state.offset)
+        pending = state.pending
+        prefilter = state.branch_index is None
+        for raw_line in f:
+            state.offset += len(raw_line)
+            if pending:
+                raw_line = pending + raw_line
+                pending = b""
+
+            if prefilter and raw_line.endswith(b"\n") and not self._wants(raw_line):
+                match = _SESSION_ID.search(raw_line)
+                if match:
+                    state.session_id = match.group(1).decode("utf-8", "replace")
+                continue
+
+            stripped = raw_line.strip()
+            if not stripped:
+                continue
+
+            try:
+                entry = json.loads(stripped)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                if not raw_line.endswith(b"\n"):
+                    # Still being written - hold the bytes for the next scan
+                    pending = raw_line
+                else:
+                    state.malformed_lines += 1
+                continue
+            self._feed(state, entry)
+            if state.branch_index is not None:
+                self._feed_branch(state, entry)
+            if self.extractors is not None:
+                current = message_id(entry)
+                repeated = current is not None and current == state.last_message_id
+                self.extractors.feed(state.extracted, entry, repeated)
+                state.last_message_id = current or state.last_message_id
+
+        state.pending = pending
+
+    def _wants(self, raw_line: bytes) -> bool:
+        """Check whether a line can change the state without decoding it
+
+        Args:
+            raw_line: Raw JSONL line
+
+        Returns:
+            False only if neither the prompt, the todos nor an extractor can
+            use the line
+        """
+        if any(needle in raw_line for needle in _NEEDLES):
+            return True
+        return self.extractors is not None and self.extractors.wants(raw_line)
+
+    def _feed(self, state: SessionState, entry: Any) -> None:
+        """Apply one decoded entry to the session state
+
+        Args:
+            state: State to update
+            entry: Decoded JSONL entry
+        """
+        if not isinstance(entry, dict):
+            return
+        session_id = entry.get("sessionId")
+        if isinstance(session_id, str):
+            state.session_id = session_id
+        if entry.get("isSidechain"):
+            # Subagent prompts are reported through the branch index
+            return
+
+        prompt = self.extract_user_prompt(entry)
+        todos = None if prompt is not None else self.extract_todos(entry)
+        if prompt is None and todos is None:
+            return
+
+        timestamp = None
+        timestamp_str = entry.get("timestamp")
+        if timestamp_str:
+            timestamp = self._parse_timestamp(timestamp_str)
+
+        if prompt is not None:
+            state.prompt_length = len(prompt)
+            if self.max_prompt_chars is not None:
+                prompt = prompt[: self.max_prompt_chars]
+            state.prompt = prompt
+            if timestamp is not None:
+                state.prompt_timestamp = timestamp
+        else:
+            # Build records and their summary once, not on every render
+            state.todos = TodoList.from_dicts(todos)
+            state.raw_todos = todos
+            if timestamp is not None:
+                state.todos_timestamp = timestamp
+
     def get_last_user_prompt_with_timestamp(
         self, jsonl_path: str | Path
     ) -> Tuple[Optional[str], Optional[float]]:
         """Extract the last user prompt and its timestamp from a JSONL file
 
+        A compressed file is searched from its end, decompressing only the
+        frames after the last prompt.
+
         Args:
             jsonl_path: Path to the JSONL file
 
         Returns:
             Tuple of (prompt_text, timestamp) or (None, None) if not found
         """
-        jsonl_path = Path(jsonl_path)
-        if not jsonl_path.exists():
+        if compression_of(jsonl_path) is not None:
+            return self._find_last_prompt_from_end(jsonl_path)
+        state = self.parse_session(jsonl_path)
+        if state is None:
             return None, None
+        if state.prompt_truncated:
+            # Only a preview was kept - fetch the full text with a bounded-free scan
+            return JSONLParser().get_last_user_prompt_with_timestamp(jsonl_path)
+        return state.prompt, state.prompt_timestamp
+
+    def _find_last_prompt_from_end(
+        self, jsonl_path: str | Path
+    ) -> Tuple[Optional[str], Optional[float]]:
+        """Find the last main-chain user prompt by reading lines backwards
 
-        last_user_prompt = None
-        last_timestamp = None
+        Args:
+            jsonl_path: Path to a compressed JSONL file
 
+        Returns:
+            Tuple of (prompt_text, timestamp) or (None, None) if not found
+        """
         try:
-            with open(jsonl_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    try:
-                        entry = json.loads(line)
-
-                        # Check if this is a user message entry (but not a tool result)
-                        if (
-                            entry.get("type") == "user"
-                            and "message" in entry
-                            and entry["message"].get("role") == "user"
-                            and "toolUseResult"
-                            not in entry  # Skip tool result messages
-                        ):
-                            content = entry["message"].get("content")
-                            timestamp_str = entry.get("timestamp")
-
-                            # Skip if content contains only tool results
-                            if isinstance(content, list):
-                                # Check if all items are tool results
-                                is_tool_result_only = all(
-                                    isinstance(item, dict)
-                                    and item.get("type") == "tool_result"
-                                    for item in content
-                                    if isinstance(item, dict)
-                                )
-                                if is_tool_result_only:
-                                    continue
-
-                            if isinstance(content, str):
-                                last_user_prompt = content
-                            elif isinstance(content, list):
-                                # Handle content that might be a list (like in example)
-                                for item in content:
-                                    if (
-                                        isinstance(item, dict)
-                                        and item.get("type") == "text"
-                                    ):
-                                        last_user_prompt = item.get("text", "")
-                                    elif isinstance(item, str):
-                                        last_user_prompt = item
-
-                            # Parse timestamp if available
-                            if timestamp_str:
-                                last_timestamp = self._parse_timestamp(timestamp_str)
-
-                    except json.JSONDecodeError:
-                        # Skip malformed JSON lines
-                        continue
-
+            for raw_line in iter_lines_reversed(jsonl_path):
+                if b'"user"' not in raw_line:
+                    continue
+                try:
+                    entry = json.loads(raw_line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(entry, dict) or entry.get("isSidechain"):
+                    continue
+                prompt = self.extract_user_prompt(entry)
+                if prompt is None:
+                    continue
+                timestamp_str = entry.get("timestamp")
+                timestamp = None
+                if timestamp_str:
+                    timestamp = self._parse_timestamp(timestamp_str)
+                return prompt, timestamp
         except (IOError, OSError):
-            return None, None
+            pass
+        return None, None
 
-        return last_user_prompt, last_timestamp
+    def get_last_user_prompt_preview(
+        self, jsonl_path: str | Path, max_chars: int
+    ) -> Tuple[Optional[str], int, Optional[float]]:
+        """Extract a bounded preview of the last user prompt
 
-    def get_last_user_prompt(self, jsonl_path: str | Path) -> Optional[str]:
-        """Extract the last user prompt from a JSONL file
+        The preview is cut from the parsed state, so no full-length copy of a
+        huge prompt is made. If the parser was created with a smaller
+        ``max_prompt_chars``, the preview is limited to that bound.
 
         Args:
             jsonl_path: Path to the JSONL file
+            max_chars: Maximum number of characters in the preview
 
         Returns:
-            The last user prompt text, or None if no user messages found
+            Tuple of (preview, full_length, timestamp) or (None, 0, None)
         """
-        jsonl_path = Path(jsonl_path)
-        if not jsonl_path.exists():
-            return None
+        state = self.parse_session(jsonl_path)
+        if state is None or state.prompt is None:
+            return None, 0, None
+        preview = state.prompt
+        if len(preview) > max_chars:
+            preview = preview[:max_chars]
+        return preview, state.prompt_length, state.prompt_timestamp
 
-        last_user_prompt = None
-
-        try:
-            with open(jsonl_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    try:
-                        entry = json.loads(line)
-
-                        # Check if this is a user message entry (but not a tool result)
-                        if (
-                            entry.get("type") == "user"
-                            and "message" in entry
-                            and entry["message"].get("role") == "user"
-                            and "toolUseResult"
-                            not in entry  # Skip tool result messages
-                        ):
-                            content = entry["message"].get("content")
-
-                            # Skip if content contains only tool results
-                            if isinstance(content, list):
-                                # Check if all items are tool results
-                                is_tool_result_only = all(
-                                    isinstance(item, dict)
-                                    and item.get("type") == "tool_result"
-                                    for item in content
-                                    if isinstance(item, dict)
-                                )
-                                if is_tool_result_only:
-                                    continue
-
-                            if isinstance(content, str):
-                                last_user_prompt = content
-                            elif isinstance(content, list):
-                                # Handle content that might be a list (like in example)
-                                for item in content:
-                                    if (
-                                        isinstance(item, dict)
-                                        and item.get("type") == "text"
-                                    ):
-                                        last_user_prompt = item.get("text", "")
-                                    elif isinstance(item, str):
-                                        last_user_prompt = item
-
-                    except json.JSONDecodeError:
-                        # Skip malformed JSON lines
-                        continue
+    def get_last_user_prompt(self, jsonl_path: str | Path) -> Optional[str]:
+        """Extract the last user prompt from a JSONL file
 
-        except (IOError, OSError):
-            return None
+        Args:
+            jsonl_path: Path to the JSONL file
 
-        return last_user_prompt
+        Returns:
+            The last user prompt text, or None if no user messages found
+        """
+        prompt, _ = self.get_last_user_prompt_with_timestamp(jsonl_path)
+        return prompt
 
     def get_latest_todo_list_with_timestamp(
         self, jsonl_path: str | Path
@@ -180,69 +637,20 @@ class JSONLParser:
             jsonl_path: Path to the JSONL file
 
         Returns:
-            Tuple of (todo_list, timestamp) or (None, None) if not found
+            Tuple of (todo_list, timestamp) or (None, None) if not found. The
+            todos are the dictionaries of the transcript, with every field
+            and value as written.
         """
-        jsonl_path = Path(jsonl_path)
-        if not jsonl_path.exists():
-            return None, None
-
-        latest_todos = None
-        latest_timestamp = None
-
-        try:
-            with open(jsonl_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    try:
-                        entry = json.loads(line)
-                        timestamp_str = entry.get("timestamp")
-
-                        # Check if this is an assistant message with tool usage
-                        if (
-                            entry.get("type") == "assistant"
-                            and "message" in entry
-                            and entry["message"].get("role") == "assistant"
-                        ):
-                            content = entry["message"].get("content", [])
-                            if isinstance(content, list):
-                                for item in content:
-                                    if (
-                                        isinstance(item, dict)
-                                        and item.get("type") == "tool_use"
-                                        and item.get("name") == "TodoWrite"
-                                    ):
-                                        input_data = item.get("input", {})
-                                        todos = input_data.get("todos")
-                                        if todos and isinstance(todos, list):
-                                            latest_todos = todos
-                                            if timestamp_str:
-                                                latest_timestamp = (
-                                                    self._parse_timestamp(timestamp_str)
-                                                )
-
-                        # Also check for tool result with todo data
-                        elif entry.get("type") == "user" and "toolUseResult" in entry:
-                            tool_result = entry["toolUseResult"]
-                            if isinstance(tool_result, dict):
-                                new_todos = tool_result.get("newTodos")
-                                if new_todos and isinstance(new_todos, list):
-                                    latest_todos = new_todos
-                                    if timestamp_str:
-                                        latest_timestamp = self._parse_timestamp(
-                                            timestamp_str
-                                        )
-
-                    except json.JSONDecodeError:
-                        # Skip malformed JSON lines
-                        continue
-
-        except (IOError, OSError):
+        state = self.parse_session(jsonl_path)
+        if state is None:
             return None, None
-
-        return latest_todos, latest_timestamp
+        if state.raw_todos is None:
+            return None, state.todos_timestamp
+        # Copies, so callers cannot change the cached state
+        todos = [
+            dict(todo) if isinstance(todo, dict) else todo for todo in state.raw_todos
+        ]
+        return todos, state.todos_timestamp
 
     def get_latest_todo_list(self, jsonl_path: str | Path) -> Optional[List[dict]]:
         """Extract the latest todo list from a JSONL file
@@ -253,54 +661,96 @@ class JSONLParser:
         Returns:
             The latest todo list, or None if no todo lists found
         """
-        jsonl_path = Path(jsonl_path)
-        if not jsonl_path.exists():
-            return None
+        todos, _ = self.get_latest_todo_list_with_timestamp(jsonl_path)
+        return todos
 
-        latest_todos = None
+    def get_branch_status(self, jsonl_path: str | Path) -> List[BranchStatus]:
+        """Split a session into its main chain and subagent sidechains
 
-        try:
-            with open(jsonl_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    try:
-                        entry = json.loads(line)
-
-                        # Check if this is an assistant message with tool usage
-                        if (
-                            entry.get("type") == "assistant"
-                            and "message" in entry
-                            and entry["message"].get("role") == "assistant"
-                        ):
-                            content = entry["message"].get("content", [])
-                            if isinstance(content, list):
-                                for item in content:
-                                    if (
-                                        isinstance(item, dict)
-                                        and item.get("type") == "tool_use"
-                                        and item.get("name") == "TodoWrite"
-                                    ):
-                                        input_data = item.get("input", {})
-                                        todos = input_data.get("todos")
-                                        if todos and isinstance(todos, list):
-                                            latest_todos = todos
-
-                        # Also check for tool result with todo data
-                        elif entry.get("type") == "user" and "toolUseResult" in entry:
-                            tool_result = entry["toolUseResult"]
-                            if isinstance(tool_result, dict):
-                                new_todos = tool_result.get("newTodos")
-                                if new_todos and isinstance(new_todos, list):
-                                    latest_todos = new_todos
-
-                    except json.JSONDecodeError:
-                        # Skip malformed JSON lines
-                        continue
+        The branches are tracked by the same incremental scan as the prompt
+        and todos, so with a cache attached only appended lines are read.
 
-        except (IOError, OSError):
-            return None
+        Args:
+            jsonl_path: Path to the JSONL file
 
-        return latest_todos
+        Returns:
+            List of branch statuses with the main chain (if any) first, then
+            sidechains in order of appearance. Empty if the file can't be read.
+        """
+        state = self.with_branches().parse_session(jsonl_path)
+        if state is None:
+            return []
+
+        # Every main chain root shares the session, so merge them into one
+        main: Optional[BranchStatus] = None
+        sidechains = []
+        for branch in state.branches.values():
+            if branch.is_sidechain:
+                sidechains.append(branch)
+            elif main is None:
+                main = branch.copy()
+            else:
+                main.entry_count += branch.entry_count
+                if branch.prompt is not None:
+                    main.prompt = branch.prompt
+                    main.prompt_timestamp = branch.prompt_timestamp
+                if branch.last_timestamp is not None:
+                    main.last_timestamp = branch.last_timestamp
+                main.active = branch.active
+
+        return ([main] if main else []) + sidechains
+
+    def _feed_branch(self, state: SessionState, entry: Any) -> None:
+        """Add one decoded entry to the branch index of the session state
+
+        Args:
+            state: State with a branch index
+            entry: Decoded JSONL entry
+        """
+        if not isinstance(entry, dict):
+            return
+        uuid = entry.get("uuid")
+        if not uuid or not isinstance(uuid, str):
+            return
+        is_sidechain = bool(entry.get("isSidechain"))
+        parent = entry.get("parentUuid")
+        root = state.branch_index.add(
+            uuid, parent if isinstance(parent, str) else None, is_sidechain
+        )
+        branch = state.branches.get(root)
+        if branch is None:
+            branch = state.branches[root] = BranchStatus(root, is_sidechain)
+        self._update_branch(branch, entry)
+
+    def _update_branch(self, branch: BranchStatus, entry: dict) -> None:
+        """Fold one entry into the status of its branch
+
+        A branch counts as finished once its latest entry is an assistant
+        message with no pending tool call.
+
+        Args:
+            branch: Branch the entry belongs to
+            entry: Decoded JSONL entry
+        """
+        branch.entry_count += 1
+        timestamp_str = entry.get("timestamp")
+        timestamp = self._parse_timestamp(timestamp_str) if timestamp_str else None
+        if timestamp is not None:
+            branch.last_timestamp = timestamp
+
+        prompt = self.extract_user_prompt(entry)
+        if prompt is not None:
+            # The first prompt of a sidechain is the task handed to the subagent
+            if not branch.is_sidechain or branch.prompt is None:
+                branch.prompt = prompt
+                branch.prompt_timestamp = timestamp
+
+        if entry.get("type") == "assistant" and isinstance(entry.get("message"), dict):
+            content = entry["message"].get("content")
+            has_tool_use = isinstance(content, list) and any(
+                isinstance(item, dict) and item.get("type") == "tool_use"
+                for item in content
+            )
+            branch.active = has_tool_use
+        else:
+            branch.active = True
@@ -0,0 +1,141 @@
+# ABOUTME: Bounded in-process LRU cache of parsed session state for JSONLParser
+# ABOUTME: Keys entries by file identity and reports hit, miss and eviction statistics
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Default bounds for a cache shared by long-running embedders
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+class ParseCache:
+    """LRU cache of parse results keyed by (path, inode, size, mtime)
+
+    An entry whose file has only grown since it was cached can still be used as
+    the starting point of an incremental parse; such lookups count as
+    extensions rather than hits or misses.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        """Create an empty cache
+
+        Args:
+            max_entries: Maximum number of cached files
+            max_bytes: Maximum approximate size of all cached values
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self.evictions = 0
+        self._bytes = 0
+        # path -> (inode, size, mtime_ns, value, nbytes)
+        self._entries: "OrderedDict[str, Tuple[int, int, int, Any, int]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, path: str, inode: int, size: int, mtime_ns: int
+    ) -> Tuple[Optional[Any], bool]:
+        """Look up the cached value for a file
+
+        Args:
+            path: File path
+            inode: Current inode of the file
+            size: Current size of the file in bytes
+            mtime_ns: Current modification time in nanoseconds
+
+        Returns:
+            Tuple of (value, exact). ``exact`` is True when the file is unchanged.
+            When the file has only grown, the stale value is returned with
+            ``exact`` False so the caller can extend it. Otherwise (None, False).
+        """
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is None:
+                self.misses += 1
+                return None, False
+
+            cached_inode, cached_size, cached_mtime, value, _ = cached
+            if cached_inode == inode and cached_size == size:
+                if cached_mtime == mtime_ns:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return value, True
+            elif cached_inode == inode and cached_size < size:
+                self._entries.move_to_end(path)
+                self.extensions += 1
+                return value, False
+
+            # Replaced, truncated or rewritten in place
+            self._remove(path)
+            self.misses += 1
+            return None, False
+
+    def put(
+        self, path: str, inode: int, size: int, mtime_ns: int, value: Any, nbytes: int
+    ) -> None:
+        """Store the value for a file, evicting least recently used entries
+
+        Args:
+            path: File path
+            inode: Inode of the file the value was parsed from
+            size: Size of the file the value was parsed from
+            mtime_ns: Modification time of the file the value was parsed from
+            value: Parse result to cache
+            nbytes: Approximate memory held by the value
+        """
+        with self._lock:
+            self._remove(path)
+            if nbytes > self.max_bytes:
+                # Never cache a value that would evict everything else
+                return
+            self._entries[path] = (inode, size, mtime_ns, value, nbytes)
+            self._bytes += nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, path: str) -> None:
+        """Drop an entry if present (caller holds the lock)
+
+        Args:
+            path: File path
+        """
+        cached = self._entries.pop(path, None)
+        if cached is not None:
+            self._bytes -= cached[4]
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache statistics for sizing the bounds
+
+        Returns:
+            Dictionary of hits, misses, extensions, evictions, entries and bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "extensions": self.extensions,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,26 @@
+# ABOUTME: Shared filesystem locations used by the Claude status display script
+# ABOUTME: Resolves the Claude projects directory and the local cache directory
+
+import os
+from pathlib import Path
+
+
+def get_projects_dir() -> Path:
+    """Get the directory holding Claude Code project folders
+
+    Returns:
+        Path to ~/.claude/projects
+    """
+    return Path.home() / ".claude" / "projects"
+
+
+def get_cache_dir() -> Path:
+    """Get the directory used for claude_status caches and indexes
+
+    Returns:
+        Path to $XDG_CACHE_HOME/claude_status (default ~/.cache/claude_status)
+    """
+    base = os.environ.get("XDG_CACHE_HOME")
+    if base:
+        return Path(base) / "claude_status"
+    return Path.home() / ".cache" / "claude_status"
@@ -0,0 +1,172 @@
+# ABOUTME: Adaptive polling of watched files, each on its own interval
+# ABOUTME: Polls changing files quickly and backs off exponentially on quiet ones
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Shortest interval between two checks of a file that just changed
+MIN_POLL_INTERVAL = 0.5
+
+# Factor applied to a file's interval each time it is found unchanged
+BACKOFF_FACTOR = 2.0
+
+# (inode, size, mtime_ns) of a file, or None while it does not exist
+Signature = Optional[Tuple[int, int, int]]
+
+
+def file_signature(path: Path) -> Signature:
+    """Get what a poll compares to tell whether a file changed
+
+    Args:
+        path: File or directory to check
+
+    Returns:
+        Inode, size and modification time, or None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class _Watch:
+    """Schedule of one watched path"""
+
+    __slots__ = ("signature", "interval", "due")
+
+    def __init__(self, signature: Signature, interval: float, due: float):
+        self.signature = signature
+        self.interval = interval
+        self.due = due
+
+
+class AdaptivePoller:
+    """Checks watched paths with stat, each on its own adaptive schedule
+
+    A path found changed is checked again after ``min_interval``; every
+    unchanged check multiplies its interval by ``backoff`` up to
+    ``max_interval``. A session file written every second is thus noticed
+    within half a second, while a repository nobody touched for hours costs
+    one stat per ``max_interval``. This works on any filesystem, including
+    network mounts where change notifications are unavailable.
+    """
+
+    def __init__(
+        self,
+        max_interval: float,
+        min_interval: float = MIN_POLL_INTERVAL,
+        backoff: float = BACKOFF_FACTOR,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create a poller
+
+        Args:
+            max_interval: Longest interval between two checks of a path
+            min_interval: Interval after a change was seen
+            backoff: Factor applied to the interval after an unchanged check
+            clock: Monotonic time source
+        """
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self._watches: Dict[Path, _Watch] = {}
+
+    def watch(self, path: Path) -> None:
+        """Start watching a path; watching it again keeps its schedule
+
+        Args:
+            path: File or directory, which need not exist yet
+        """
+        path = Path(path)
+        if path not in self._watches:
+            self._watches[path] = _Watch(
+                file_signature(path),
+                self.min_interval,
+                self.clock() + self.min_interval,
+            )
+
+    def unwatch(self, path: Path) -> None:
+        """Stop watching a path
+
+        Args:
+            path: Previously watched path
+        """
+        self._watches.pop(Path(path), None)
+
+    @property
+    def watched(self) -> List[Path]:
+        """Watched paths"""
+        return list(self._watches)
+
+    def interval(self, path: Path) -> Optional[float]:
+        """Get the current polling interval of a path
+
+        Args:
+            path: Watched path
+
+        Returns:
+            Seconds between checks, or None if the path is not watched
+        """
+        watch = self._watches.get(Path(path))
+        return watch.interval if watch is not None else None
+
+    def time_until_due(self) -> float:
+        """Get the seconds until the next path is due for a check
+
+        Returns:
+            Seconds, 0 if a check is overdue, max_interval with nothing watched
+        """
+        if not self._watches:
+            return self.max_interval
+        due = min(watch.due for watch in self._watches.values())
+        return max(0.0, due - self.clock())
+
+    def poll(self) -> List[Path]:
+        """Check the paths that are due and reschedule them
+
+        Returns:
+            Paths whose signature changed since their previous check
+        """
+        now = self.clock()
+        changed = []
+        for path, watch in self._watches.items():
+            if watch.due > now:
+                continue
+            signature = file_signature(path)
+            if signature != watch.signature:
+                watch.signature = signature
+                watch.interval = self.min_interval
+                changed.append(path)
+            else:
+                watch.interval = min(watch.interval * self.backoff, self.max_interval)
+            watch.due = now + watch.interval
+        return changed
+
+    def wait(
+        self,
+        timeout: float,
+        sleep: Optional[Callable[[float], None]] = None,
+    ) -> List[Path]:
+        """Sleep until a watched path changes or the timeout passes
+
+        Args:
+            timeout: Longest time to wait in seconds
+            sleep: Sleep function. If None, uses time.sleep
+
+        Returns:
+            Changed paths, or an empty list if the timeout passed first
+        """
+        sleep = sleep or time.sleep
+        deadline = self.clock() + timeout
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return []
+            sleep(min(self.time_until_due(), remaining))
+            changed = self.poll()
+            if changed:
+                return changed
@@ -0,0 +1,225 @@
+# ABOUTME: Persistent mapping between real project paths and Claude project folders
+# ABOUTME: Reads each folder's recorded cwd once and refreshes only when folders change
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.compressed import SESSION_PATTERNS, open_session
+from src.paths import get_cache_dir, get_projects_dir
+
+# Lines read from the start of a session file while looking for its cwd
+CWD_SCAN_LINES = 20
+
+
+def project_folder_name(cwd: str) -> str:
+    """Convert a project path to its folder name under ~/.claude/projects
+
+    Args:
+        cwd: Project directory
+
+    Returns:
+        Folder name, e.g. /var/home/a/Code/ClaudeStatus -> -var-home-a-Code-ClaudeStatus
+    """
+    return cwd.replace("/", "-")
+
+
+def read_session_cwd(jsonl_path: Path) -> Optional[str]:
+    """Read the project directory recorded at the start of a session file
+
+    The first lines may be summaries without a ``cwd`` field, so a few lines
+    are tried before giving up.
+
+    Args:
+        jsonl_path: Path to the JSONL session file
+
+    Returns:
+        The recorded working directory, or None if none was found
+    """
+    try:
+        with open_session(jsonl_path) as f:
+            for _ in range(CWD_SCAN_LINES):
+                raw_line = f.readline()
+                if not raw_line:
+                    break
+                try:
+                    entry = json.loads(raw_line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if isinstance(entry, dict) and isinstance(entry.get("cwd"), str):
+                    return entry["cwd"]
+    except (IOError, OSError):
+        pass
+    return None
+
+
+class ProjectIndex:
+    """Maps real project paths to folder names under ~/.claude/projects
+
+    Folder names replace every "/" with "-", so they cannot be turned back into
+    paths: /a/b-c and /a/b/c share one name. The index instead records the
+    ``cwd`` written into each folder's sessions. It is saved in the cache dir
+    and only rescanned when the projects directory itself changes, i.e. when
+    folders are added or removed.
+    """
+
+    def __init__(
+        self,
+        index_path: Optional[Path] = None,
+        projects_dir: Optional[Path] = None,
+    ):
+        """Create an index, loading the saved mapping
+
+        Args:
+            index_path: JSON file for the saved mapping. Defaults to the cache dir.
+            projects_dir: Root of the Claude project folders
+        """
+        self.index_path = Path(index_path or get_cache_dir() / "projects.json")
+        self.projects_dir = Path(projects_dir or get_projects_dir())
+        self._folders: Dict[str, Optional[str]] = {}  # folder name -> cwd
+        self._scanned_mtime_ns = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Load the saved mapping, ignoring a missing or corrupt file"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("folders"), dict):
+            return
+        if str(data.get("projects_dir")) != str(self.projects_dir):
+            return
+        self._folders = dict(data["folders"])
+        self._scanned_mtime_ns = int(data.get("mtime_ns") or 0)
+
+    def _save(self) -> None:
+        """Save the mapping atomically"""
+        data = {
+            "projects_dir": str(self.projects_dir),
+            "mtime_ns": self._scanned_mtime_ns,
+            "folders": self._folders,
+        }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(
+                f".{self.index_path.name}.{os.getpid()}.tmp"
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except (IOError, OSError):
+            pass
+
+    def refresh(self) -> bool:
+        """Bring the mapping up to date with the projects directory
+
+        Costs a single stat when no folder was added or removed. Otherwise only
+        new folders, and folders whose cwd is still unknown, are read.
+
+        Returns:
+            True if the mapping changed
+        """
+        try:
+            mtime_ns = self.projects_dir.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime_ns == self._scanned_mtime_ns:
+            # Folders created before their first session was written
+            changed = False
+            for name, cwd in self._folders.items():
+                if cwd is None:
+                    cwd = self._scan_folder(self.projects_dir / name)
+                    if cwd is not None:
+                        self._folders[name] = cwd
+                        changed = True
+            if changed:
+                self._save()
+            return changed
+
+        folders: Dict[str, Optional[str]] = {}
+        try:
+            entries = list(os.scandir(self.projects_dir))
+        except OSError:
+            return False
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            cwd = self._folders.get(entry.name)
+            if cwd is None:
+                cwd = self._scan_folder(Path(entry.path))
+            folders[entry.name] = cwd
+
+        changed = folders != self._folders
+        self._folders = folders
+        self._scanned_mtime_ns = mtime_ns
+        self._save()
+        return changed
+
+    def _scan_folder(self, folder: Path) -> Optional[str]:
+        """Find the project directory of one folder
+
+        Args:
+            folder: Claude project folder
+
+        Returns:
+            The recorded cwd of its most recent session that has one
+        """
+        try:
+            sessions = sorted(
+                (path for pattern in SESSION_PATTERNS for path in folder.glob(pattern)),
+                key=lambda p: p.stat().st_mtime,
+                reverse=True,
+            )
+        except OSError:
+            return None
+        for session in sessions:
+            cwd = read_session_cwd(session)
+            if cwd:
+                return cwd
+        return None
+
+    def projects(self) -> Dict[str, str]:
+        """Get every known project
+
+        Returns:
+            Mapping of real project path to folder name
+        """
+        self.refresh()
+        return {cwd: folder for folder, cwd in sorted(self._folders.items()) if cwd}
+
+    def folder_for(self, path: str) -> Optional[str]:
+        """Find the folder holding the sessions of a project or its subdirectory
+
+        A project recorded at exactly this path wins, then a folder named
+        after the path. Only if neither exists is the closest enclosing
+        project used, never one at the filesystem root or the home directory,
+        which enclose nearly everything.
+
+        Args:
+            path: Project directory or any directory below it
+
+        Returns:
+            The folder name, or None if the path belongs to no known project
+        """
+        path = os.path.normpath(os.path.abspath(path))
+        projects = {
+            os.path.normpath(cwd): folder for cwd, folder in self.projects().items()
+        }
+        if path in projects:
+            return projects[path]
+        folder = project_folder_name(path)
+        if (self.projects_dir / folder).is_dir():
+            return folder
+
+        too_broad = {os.sep, os.path.normpath(os.path.expanduser("~"))}
+        best: Optional[str] = None
+        best_length = -1
+        for cwd, folder in projects.items():
+            if cwd in too_broad or not path.startswith(cwd.rstrip(os.sep) + os.sep):
+                continue
+            if len(cwd) > best_length:
+                best, best_length = folder, len(cwd)
+        return best
@@ -0,0 +1,355 @@
+# ABOUTME: Full-text search index over user prompts and todos from all Claude sessions
+# ABOUTME: Stores an incrementally updated SQLite FTS5 index keyed by file offsets
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from src.compressed import compression_of, list_sessions, open_session
+from src.jsonl_parser import JSONLParser
+from src.paths import get_cache_dir, get_projects_dir
+from src.session_archive import SessionArchive, SessionSummary
+
+# Bump when the schema changes; an older index is then rebuilt from scratch
+SCHEMA_VERSION = 2
+
+
+class SearchIndexError(Exception):
+    """Raised when the index cannot be opened, updated or searched"""
+
+
+def _index_error(error: sqlite3.DatabaseError, index_path: Path) -> SearchIndexError:
+    """Describe an SQLite failure in terms a user can act on
+
+    Args:
+        error: Error raised by SQLite
+        index_path: Location of the index
+
+    Returns:
+        The error to raise instead
+    """
+    message = str(error)
+    if "fts5" in message:
+        reason = "Python's SQLite library was built without the FTS5 extension"
+    elif "locked" in message or "busy" in message:
+        reason = "the index is locked by another process; try again shortly"
+    elif not isinstance(error, sqlite3.OperationalError):
+        # e.g. "file is not a database" or "database disk image is malformed"
+        reason = (
+            f"{message}; the index only holds copies of the sessions, so delete "
+            "it and the next search rebuilds it"
+        )
+    else:
+        reason = message
+    return SearchIndexError(f"cannot use the search index {index_path}: {reason}")
+
+
+class SearchResult(NamedTuple):
+    """A single search hit"""
+
+    kind: str  # "prompt" or "todo"
+    snippet: str
+    project: str
+    session_id: str
+    timestamp: Optional[float]
+    path: str
+
+
+class SearchIndex:
+    """Incremental FTS5 index of prompts and todo contents across sessions"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            inode INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            offset INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS todos_seen (
+            path TEXT NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (path, content)
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+            text,
+            kind UNINDEXED,
+            project UNINDEXED,
+            session_id UNINDEXED,
+            timestamp UNINDEXED,
+            path UNINDEXED
+        );
+    """
+
+    def __init__(
+        self,
+        index_path: Optional[Path] = None,
+        projects_dir: Optional[Path] = None,
+        archive: Optional[SessionArchive] = None,
+    ):
+        """Open (or create) the search index
+
+        Args:
+            index_path: Location of the SQLite index. Defaults to the cache dir.
+            projects_dir: Root of the Claude project folders to index
+            archive: Summaries of compacted sessions, read instead of the raw
+                files. Defaults to the archive next to the index.
+
+        Raises:
+            SearchIndexError: If SQLite lacks FTS5, or the index is locked or
+                damaged
+        """
+        self.index_path = Path(index_path or get_cache_dir() / "search.db")
+        self.projects_dir = Path(projects_dir or get_projects_dir())
+        self.archive = archive or SessionArchive(
+            self.index_path.parent / "archive", self.projects_dir
+        )
+        self.parser = JSONLParser()
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.index_path))
+        try:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # The index only holds derived data: rebuild instead of migrating
+                self.conn.executescript(
+                    "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS todos_seen; "
+                    "DROP TABLE IF EXISTS docs;"
+                )
+            self.conn.executescript(self.SCHEMA)
+            self.conn.execute(
+                f"PRAGMA user_version = {SCHEMA_VERSION}"  # nosec B608
+            )
+        except sqlite3.DatabaseError as e:
+            self.conn.close()
+            raise _index_error(e, self.index_path) from e
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        self.conn.close()
+
+    def update(self) -> int:
+        """Bring the index up to date with all session files
+
+        Only bytes appended since the last update are read. Files that were
+        replaced or truncated, and compressed files that changed, are
+        reindexed from the start.
+
+        Returns:
+            Number of documents added to the index
+
+        Raises:
+            SearchIndexError: If the index is locked or damaged
+        """
+        if not self.projects_dir.exists():
+            return 0
+
+        added = 0
+        try:
+            with self.conn:
+                for jsonl_path in list_sessions(self.projects_dir, "*/"):
+                    added += self._index_file(jsonl_path)
+        except sqlite3.DatabaseError as e:
+            raise _index_error(e, self.index_path) from e
+        return added
+
+    def _index_file(self, jsonl_path: Path) -> int:
+        """Index the unread tail of one session file
+
+        The tail is streamed line by line, so a large backlog of new entries
+        is never held in memory at once. A read error keeps what was indexed
+        up to that point.
+
+        Args:
+            jsonl_path: Path to the session file, plain or compressed
+
+        Returns:
+            Number of documents added for this file
+        """
+        path_key = str(jsonl_path)
+        try:
+            stat = jsonl_path.stat()
+        except OSError:
+            return 0
+
+        row = self.conn.execute(
+            "SELECT inode, size, offset FROM files WHERE path = ?", (path_key,)
+        ).fetchone()
+        offset = 0
+        if row is not None:
+            inode, size, offset = row
+            if inode == stat.st_ino and size == stat.st_size:
+                return 0
+            if (
+                inode != stat.st_ino
+                or stat.st_size < size
+                or compression_of(jsonl_path) is not None
+            ):
+                # File was replaced, truncated or recompressed - start over
+                self._forget_file(path_key)
+                offset = 0
+
+        if offset == 0:
+            summary = self.archive.load(jsonl_path, stat)
+            if summary is not None:
+                # Compacted session: no need to reparse the raw JSON
+                return self._index_summary(summary, path_key, stat)
+
+        project = jsonl_path.parent.name
+        added = 0
+        start = offset
+        try:
+            with open_session(jsonl_path) as f:
+                f.seek(offset)
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        break  # still being written; index it on the next update
+                    offset += len(raw_line)
+                    try:
+                        entry = json.loads(raw_line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue
+                    if isinstance(entry, dict):
+                        added += self._index_entry(entry, path_key, project)
+        except (IOError, OSError):
+            pass
+        if offset == start:
+            return added
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, inode, size, offset) "
+            "VALUES (?, ?, ?, ?)",
+            (path_key, stat.st_ino, stat.st_size, offset),
+        )
+        return added
+
+    def _index_entry(self, entry: dict, path_key: str, project: str) -> int:
+        """Add the searchable parts of one entry to the index
+
+        Args:
+            entry: Decoded JSONL entry
+            path_key: Session file path the entry came from
+            project: Project folder name
+
+        Returns:
+            Number of documents added
+        """
+        session_id = entry.get("sessionId", "")
+        timestamp_str = entry.get("timestamp")
+        timestamp = None
+        if timestamp_str:
+            timestamp = self.parser._parse_timestamp(timestamp_str)
+
+        documents = []
+        prompt = self.parser.extract_user_prompt(entry)
+        if prompt:
+            documents.append(("prompt", prompt))
+
+        todos = self.parser.extract_todos(entry)
+        for todo in todos or []:
+            content = todo.get("content") if isinstance(todo, dict) else None
+            if not content:
+                continue
+            # Todo lists are rewritten on every change; index each content once
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO todos_seen (path, content) VALUES (?, ?)",
+                (path_key, content),
+            )
+            if cursor.rowcount:
+                documents.append(("todo", content))
+
+        for kind, text in documents:
+            self.conn.execute(
+                "INSERT INTO docs (text, kind, project, session_id, timestamp, path) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (text, kind, project, session_id, timestamp, path_key),
+            )
+        return len(documents)
+
+    def _index_summary(
+        self, summary: SessionSummary, path_key: str, stat: os.stat_result
+    ) -> int:
+        """Index a session from its compacted summary
+
+        Args:
+            summary: Current summary of the session file
+            path_key: Session file path
+            stat: Current stat of the session file
+
+        Returns:
+            Number of documents added
+        """
+        project = Path(path_key).parent.name
+        documents = []
+        prompts = summary.prompts
+        for text, timestamp in zip(prompts["text"], prompts["timestamp"]):
+            documents.append(("prompt", text, timestamp))
+
+        todos = summary.todos
+        for content, timestamp in zip(todos["content"], todos["timestamp"]):
+            if not content:
+                continue
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO todos_seen (path, content) VALUES (?, ?)",
+                (path_key, content),
+            )
+            if cursor.rowcount:
+                documents.append(("todo", content, timestamp))
+
+        self.conn.executemany(
+            "INSERT INTO docs (text, kind, project, session_id, timestamp, path) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (text, kind, project, summary.session_id, timestamp, path_key)
+                for kind, text, timestamp in documents
+            ],
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, inode, size, offset) "
+            "VALUES (?, ?, ?, ?)",
+            (path_key, stat.st_ino, stat.st_size, summary.offset),
+        )
+        return len(documents)
+
+    def _forget_file(self, path_key: str) -> None:
+        """Drop every indexed document for a file
+
+        Args:
+            path_key: Session file path
+        """
+        self.conn.execute("DELETE FROM docs WHERE path = ?", (path_key,))
+        self.conn.execute("DELETE FROM todos_seen WHERE path = ?", (path_key,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path_key,))
+
+    def search(self, terms: str, limit: int = 20) -> List[SearchResult]:
+        """Search prompts and todos for the given terms
+
+        Every whitespace-separated term must match. Terms are quoted so that FTS5
+        operators in user input are treated as plain text.
+
+        Args:
+            terms: Search terms
+            limit: Maximum number of results
+
+        Returns:
+            Matching documents, best match first
+
+        Raises:
+            SearchIndexError: If the index is locked or damaged
+        """
+        words = terms.split()
+        if not words:
+            return []
+        query = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+        try:
+            rows = self.conn.execute(
+                "SELECT kind, snippet(docs, 0, '[', ']', '...', 16), project, "
+                "session_id, timestamp, path FROM docs WHERE docs MATCH ? "
+                "ORDER BY rank LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        except sqlite3.DatabaseError as e:
+            raise _index_error(e, self.index_path) from e
+        return [SearchResult(*row) for row in rows]
@@ -0,0 +1,415 @@
+# ABOUTME: Plugin interface for extra status sections such as CI or test results
+# ABOUTME: Runs sections concurrently with per-section TTL caches and timeouts
+
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from importlib.metadata import EntryPoint, entry_points
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.paths import get_cache_dir
+
+# Entry point group under which installed packages register sections
+ENTRY_POINT_GROUP = "claude_status.sections"
+
+# Seconds a section value stays fresh unless the section says otherwise
+DEFAULT_TTL = 60.0
+
+# Seconds a render waits for a section that has no value yet
+DEFAULT_TIMEOUT = 1.0
+
+# Bump when the saved value layout changes; older caches are then ignored
+CACHE_VERSION = 1
+
+# Bump when the saved entry point list layout changes
+ENTRY_POINT_CACHE_VERSION = 1
+
+
+class Section(ABC):
+    """An extra status section supplied by a plugin
+
+    Subclasses set ``name``, optionally ``ttl`` and ``timeout``, and implement
+    collect(); a subclass without it cannot be instantiated. A value is reused
+    until it is ``ttl`` seconds old; refreshing it never delays a render that
+    already has a value, and a render with no value waits at most ``timeout``
+    seconds for it.
+    """
+
+    name: str = "Section"
+    ttl: float = DEFAULT_TTL
+    timeout: float = DEFAULT_TIMEOUT
+
+    @abstractmethod
+    def collect(self, project_path: str) -> Optional[str]:
+        """Compute the text shown for a project
+
+        Runs in a worker thread. Exceptions are caught and shown as errors.
+
+        Args:
+            project_path: Absolute project directory
+
+        Returns:
+            Text to show, or None to hide the section for this project
+        """
+
+
+class FunctionSection(Section):
+    """Section whose value comes from a plain function"""
+
+    def __init__(
+        self,
+        function: Callable[[str], Optional[str]],
+        name: str,
+        ttl: float = DEFAULT_TTL,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.function = function
+        self.name = name
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def collect(self, project_path: str) -> Optional[str]:
+        return self.function(project_path)
+
+
+def section(
+    name: str, ttl: float = DEFAULT_TTL, timeout: float = DEFAULT_TIMEOUT
+) -> Callable[[Callable[[str], Optional[str]]], FunctionSection]:
+    """Turn a function of the project directory into a section
+
+    Args:
+        name: Label of the section
+        ttl: Seconds a value stays fresh
+        timeout: Seconds a render waits for a first value
+
+    Returns:
+        Decorator creating a FunctionSection
+    """
+
+    def decorate(function: Callable[[str], Optional[str]]) -> FunctionSection:
+        return FunctionSection(function, name, ttl, timeout)
+
+    return decorate
+
+
+class SectionValue(NamedTuple):
+    """Last known value of one section for one project"""
+
+    name: str
+    text: Optional[str]  # None while pending, on error, or when hidden
+    error: Optional[str]  # exception raised by the last collect
+    fetched_at: Optional[float]  # None if no value has arrived yet
+
+
+def _as_sections(obj: Any) -> List[Section]:
+    """Normalize what a plugin exports into section instances
+
+    Args:
+        obj: Section instance or subclass, list of them, or a factory
+
+    Returns:
+        Section instances
+
+    Raises:
+        TypeError: If the object provides no sections
+    """
+    if isinstance(obj, Section):
+        return [obj]
+    if isinstance(obj, type) and issubclass(obj, Section):
+        return [obj()]
+    if isinstance(obj, (list, tuple)):
+        return [item for element in obj for item in _as_sections(element)]
+    if callable(obj):
+        return _as_sections(obj())
+    raise TypeError(f"{obj!r} is not a status section")
+
+
+def load_section_spec(spec: str) -> List[Section]:
+    """Load the sections named by a ``module`` or ``module:attribute`` spec
+
+    A bare module must define ``SECTIONS``.
+
+    Args:
+        spec: Import path, e.g. ``ci_status:CISection``
+
+    Returns:
+        Section instances
+
+    Raises:
+        ImportError: If the module or attribute does not exist
+        TypeError: If the attribute provides no sections
+    """
+    module_name, _, attribute = spec.partition(":")
+    module = importlib.import_module(module_name)
+    try:
+        obj = getattr(module, attribute or "SECTIONS")
+    except AttributeError as e:
+        raise ImportError(f"{spec}: {e}") from e
+    return _as_sections(obj)
+
+
+def _path_stamp() -> List[list]:
+    """Get the modification times of the directories on sys.path
+
+    Installing, upgrading or removing a package adds or removes a metadata
+    directory, which changes the mtime of its parent.
+
+    Returns:
+        Pairs of path and mtime in nanoseconds, None if it does not exist
+    """
+    stamp = []
+    for entry in sys.path:
+        if not entry:
+            continue  # the working directory differs between runs
+        try:
+            stamp.append([entry, os.stat(entry).st_mtime_ns])
+        except OSError:
+            stamp.append([entry, None])
+    return stamp
+
+
+def _scan_entry_points() -> List[Tuple[str, str]]:
+    """Scan the metadata of every installed distribution for sections
+
+    Returns:
+        Name and ``module:attribute`` value of each registered entry point
+    """
+    found = entry_points(group=ENTRY_POINT_GROUP)
+    return [(entry_point.name, entry_point.value) for entry_point in found]
+
+
+def find_entry_points(cache_path: Optional[Path] = None) -> List[EntryPoint]:
+    """Find the entry points of sections registered by installed packages
+
+    Scanning every distribution's metadata takes tens of milliseconds, too
+    much for a shell prompt, so the result is saved and reused until a
+    directory on sys.path changes.
+
+    Args:
+        cache_path: JSON file for the saved list. Defaults to the cache dir.
+
+    Returns:
+        The registered entry points
+    """
+    cache_path = Path(cache_path or get_cache_dir() / "entry_points.json")
+    stamp = _path_stamp()
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (IOError, OSError, json.JSONDecodeError):
+        data = None
+
+    if (
+        isinstance(data, dict)
+        and data.get("version") == ENTRY_POINT_CACHE_VERSION
+        and data.get("stamp") == stamp
+    ):
+        found = [tuple(pair) for pair in data.get("entry_points") or []]
+    else:
+        found = _scan_entry_points()
+        data = {
+            "version": ENTRY_POINT_CACHE_VERSION,
+            "stamp": stamp,
+            "entry_points": [list(pair) for pair in found],
+        }
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+        except (IOError, OSError):
+            pass
+
+    return [
+        EntryPoint(name=name, value=value, group=ENTRY_POINT_GROUP)
+        for name, value in found
+    ]
+
+
+def load_entry_point_sections(cache_path: Optional[Path] = None) -> List[Section]:
+    """Load the sections registered by installed packages
+
+    Plugins that fail to load are reported on stderr and skipped.
+
+    Args:
+        cache_path: JSON file for the saved entry point list. Defaults to the
+            cache dir.
+
+    Returns:
+        Section instances
+    """
+    sections = []
+    for entry_point in find_entry_points(cache_path):
+        try:
+            sections.extend(_as_sections(entry_point.load()))
+        except Exception as e:  # a broken plugin must not break the display
+            print(
+                f"claude_status: ignoring section plugin {entry_point.name}: {e}",
+                file=sys.stderr,
+            )
+    return sections
+
+
+class SectionRunner:
+    """Collects plugin sections concurrently behind per-section TTL caches
+
+    Each stale value is refreshed in its own daemon thread, at most one per
+    section and project, so a slow or hung plugin only ever delays its own
+    value. Values are saved to disk so a short-lived process, such as a shell
+    prompt, starts with the answers of the previous one.
+    """
+
+    def __init__(
+        self,
+        sections: Iterable[Section],
+        cache_path: Optional[Path] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Create a runner, loading previous values from disk
+
+        Args:
+            sections: Sections to collect, in display order
+            cache_path: JSON file for persisted values. Defaults to the cache dir.
+            clock: Wall-clock time source
+        """
+        self.sections = list(sections)
+        self.cache_path = Path(cache_path or get_cache_dir() / "sections.json")
+        self.clock = clock
+        # "name\0project" -> (text, error, fetched_at)
+        self._values: Dict[str, Tuple[Optional[str], Optional[str], float]] = {}
+        # "name\0project" -> (refresh thread, deadline of the first wait)
+        self._refreshing: Dict[str, Tuple[threading.Thread, float]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    @property
+    def min_ttl(self) -> Optional[float]:
+        """Shortest TTL of any section, or None without sections"""
+        return min((s.ttl for s in self.sections), default=None)
+
+    def load(self) -> None:
+        """Load persisted values, keeping newer ones already in memory"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return
+        with self._lock:
+            for key, value in (data.get("values") or {}).items():
+                if not (isinstance(value, list) and len(value) == 3):
+                    continue
+                current = self._values.get(key)
+                if current is None or current[2] < value[2]:
+                    self._values[key] = (value[0], value[1], float(value[2]))
+
+    def save(self) -> None:
+        """Persist values if any changed since the last save
+
+        Values saved by other processes in the meantime are merged, keeping
+        the newest one of every section and project.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+        self.load()
+        with self._lock:
+            values = {key: list(value) for key, value in self._values.items()}
+        data = {"version": CACHE_VERSION, "values": values}
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f".{self.cache_path.name}.{os.getpid()}.tmp"
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except (IOError, OSError):
+            pass
+
+    def collect(self, project_path: Optional[str] = None) -> List[SectionValue]:
+        """Get the value of every section for a project
+
+        Fresh values are returned as they are. Stale ones are returned too,
+        while a background refresh runs; only sections without any value are
+        waited for, each up to its own timeout and all at the same time.
+
+        Args:
+            project_path: Project directory. If None, uses current directory.
+
+        Returns:
+            Values in section order, without sections that chose to hide
+        """
+        project = os.path.abspath(project_path or os.getcwd())
+        now = self.clock()
+        waits = []
+        with self._lock:
+            for s in self.sections:
+                key = f"{s.name}\0{project}"
+                cached = self._values.get(key)
+                if cached is not None and now - cached[2] < s.ttl:
+                    continue
+                if key not in self._refreshing:
+                    thread = threading.Thread(
+                        target=self._refresh, args=(s, project, key), daemon=True
+                    )
+                    self._refreshing[key] = (thread, now + s.timeout)
+                    thread.start()
+                if cached is None:
+                    waits.append(self._refreshing[key])
+
+        for thread, deadline in waits:
+            thread.join(max(0.0, deadline - self.clock()))
+
+        values = []
+        with self._lock:
+            for s in self.sections:
+                cached = self._values.get(f"{s.name}\0{project}")
+                if cached is None:
+                    values.append(SectionValue(s.name, None, None, None))
+                elif cached[0] is not None or cached[1] is not None:
+                    values.append(SectionValue(s.name, *cached))
+        return values
+
+    def _refresh(self, s: Section, project: str, key: str) -> None:
+        """Recompute one section value in the background
+
+        Args:
+            s: Section to collect
+            project: Absolute project directory
+            key: Cache key of the value
+        """
+        try:
+            try:
+                text = s.collect(project)
+                value = (None if text is None else str(text), None)
+            except Exception as e:  # plugin errors are shown, not raised
+                value = (None, f"{type(e).__name__}: {e}")
+            with self._lock:
+                self._values[key] = (*value, self.clock())
+                self._dirty = True
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def finish(self) -> None:
+        """Give running refreshes until their timeout, then persist values
+
+        Lets a short-lived process hand its refreshed values to the next one
+        without waiting on a hung plugin.
+        """
+        with self._lock:
+            running = list(self._refreshing.values())
+        for thread, deadline in running:
+            thread.join(max(0.0, deadline - self.clock()))
+        self.save()
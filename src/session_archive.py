@@ -0,0 +1,418 @@
+# ABOUTME: Compacts finished Claude sessions into small columnar summary files
+# ABOUTME: Lets search and aggregate scans read summaries instead of reparsing raw JSONL
+
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.compressed import (
+    GZIP,
+    list_sessions,
+    open_session,
+    save_frame_index,
+    session_stem,
+    write_framed,
+)
+from src.extractors import message_id
+from src.jsonl_parser import JSONLParser
+from src.paths import get_cache_dir, get_projects_dir
+
+# Bump when the summary layout changes; older summaries are then ignored
+SUMMARY_VERSION = 3
+
+# Seconds per activity slot; a slot with any timestamped entry counts as active
+ACTIVE_SLOT = 300
+
+# A session untouched for this long is considered finished
+DEFAULT_FINISHED_AFTER = 24 * 3600
+
+# Token counters summed from assistant message usage blocks
+USAGE_TOKEN_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+class SessionSummary:
+    """Columnar summary of one session file
+
+    Prompts and todos are stored as parallel columns (one list per field)
+    rather than as a list of records, which keeps the JSON small and lets a
+    reader pick out single columns.
+    """
+
+    def __init__(self, data: dict):
+        """Wrap decoded summary data
+
+        Args:
+            data: Summary dictionary as written by build_summary
+        """
+        self.data = data
+
+    @property
+    def offset(self) -> int:
+        """Bytes of the source file covered by the summary"""
+        return self.data["offset"]
+
+    @property
+    def session_id(self) -> str:
+        """Session id of the source file"""
+        return self.data.get("session_id") or ""
+
+    @property
+    def prompts(self) -> Dict[str, list]:
+        """Prompt columns: offset, timestamp, sidechain and text"""
+        return self.data["prompts"]
+
+    @property
+    def todos(self) -> Dict[str, list]:
+        """Todo columns, one row per todo of each TodoWrite event
+
+        Columns are event, offset, timestamp, sidechain, id, content and status.
+        """
+        return self.data["todos"]
+
+    @property
+    def active(self) -> List[int]:
+        """Sorted ACTIVE_SLOT slots holding any timestamped entry"""
+        return self.data["active"]
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        """Entry, message, tool use and token counters"""
+        return self.data["usage"]
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """Check whether the summary still describes a file
+
+        Args:
+            stat: Current stat of the source file
+
+        Returns:
+            True if the file has not been replaced or changed
+        """
+        source = self.data.get("source") or {}
+        return (
+            source.get("inode") == stat.st_ino
+            and source.get("size") == stat.st_size
+            and source.get("mtime_ns") == stat.st_mtime_ns
+        )
+
+
+class CompactResult(NamedTuple):
+    """Outcome of a compaction run"""
+
+    sessions: int  # sessions (re)summarized
+    raw_bytes: int  # bytes of JSONL they cover
+    summary_bytes: int  # bytes of the summaries written
+    failed: Tuple[Tuple[str, str], ...] = ()  # (path, error) of skipped sessions
+
+
+def build_summary(jsonl_path: Path, parser: Optional[JSONLParser] = None) -> dict:
+    """Scan a session file once and build its summary
+
+    Args:
+        jsonl_path: Path to the session file, plain or compressed
+        parser: Parser providing the prompt and todo extraction rules
+
+    Returns:
+        Summary dictionary
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    parser = parser or JSONLParser()
+    stat = jsonl_path.stat()
+    prompts: Dict[str, list] = {
+        "offset": [],
+        "timestamp": [],
+        "sidechain": [],
+        "text": [],
+    }
+    todos: Dict[str, list] = {
+        "event": [],
+        "offset": [],
+        "timestamp": [],
+        "sidechain": [],
+        "id": [],
+        "content": [],
+        "status": [],
+    }
+    usage = {"entries": 0, "user": 0, "assistant": 0, "tool_uses": 0}
+    usage.update({field: 0 for field in USAGE_TOKEN_FIELDS})
+    session_id = None
+    first_timestamp = last_timestamp = None
+    active = set()
+    events = 0
+    last_message = None
+
+    offset = 0
+    with open_session(jsonl_path) as f:
+        for raw_line in f:
+            line_offset = offset
+            try:
+                entry = json.loads(raw_line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                if not raw_line.endswith(b"\n"):
+                    break  # still being written; left for the raw reader
+                offset += len(raw_line)
+                continue
+            offset += len(raw_line)
+            if not isinstance(entry, dict):
+                continue
+
+            usage["entries"] += 1
+            session_id = session_id or entry.get("sessionId")
+            timestamp = None
+            if entry.get("timestamp"):
+                timestamp = parser._parse_timestamp(entry["timestamp"])
+                if timestamp is not None:
+                    first_timestamp = first_timestamp or timestamp
+                    last_timestamp = timestamp
+                    active.add(int(timestamp // ACTIVE_SLOT))
+            sidechain = bool(entry.get("isSidechain"))
+
+            message = entry.get("message")
+            if entry.get("type") in ("user", "assistant"):
+                usage[entry["type"]] += 1
+            if entry.get("type") == "assistant" and isinstance(message, dict):
+                content = message.get("content")
+                if isinstance(content, list):
+                    usage["tool_uses"] += sum(
+                        1
+                        for item in content
+                        if isinstance(item, dict) and item.get("type") == "tool_use"
+                    )
+                # The entries of one response repeat its usage; count it once
+                current = message_id(entry)
+                repeated = current is not None and current == last_message
+                last_message = current or last_message
+                message_usage = message.get("usage")
+                if isinstance(message_usage, dict) and not repeated:
+                    for field in USAGE_TOKEN_FIELDS:
+                        value = message_usage.get(field)
+                        if isinstance(value, int):
+                            usage[field] += value
+
+            prompt = parser.extract_user_prompt(entry)
+            if prompt:
+                prompts["offset"].append(line_offset)
+                prompts["timestamp"].append(timestamp)
+                prompts["sidechain"].append(sidechain)
+                prompts["text"].append(prompt)
+                continue
+
+            entry_todos = parser.extract_todos(entry)
+            if entry_todos:
+                for todo in entry_todos:
+                    if not isinstance(todo, dict):
+                        continue
+                    todos["event"].append(events)
+                    todos["offset"].append(line_offset)
+                    todos["timestamp"].append(timestamp)
+                    todos["sidechain"].append(sidechain)
+                    todos["id"].append(str(todo.get("id") or ""))
+                    todos["content"].append(str(todo.get("content", "")))
+                    todos["status"].append(str(todo.get("status", "unknown")))
+                events += 1
+
+    return {
+        "version": SUMMARY_VERSION,
+        "source": {
+            "path": str(jsonl_path),
+            "inode": stat.st_ino,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        },
+        "offset": offset,
+        "session_id": session_id,
+        "first_timestamp": first_timestamp,
+        "last_timestamp": last_timestamp,
+        "active": sorted(active),
+        "prompts": prompts,
+        "todos": todos,
+        "usage": usage,
+    }
+
+
+class SessionArchive:
+    """Summary files for finished sessions, kept under the cache directory"""
+
+    def __init__(
+        self,
+        archive_dir: Optional[Path] = None,
+        projects_dir: Optional[Path] = None,
+    ):
+        """Create an archive
+
+        Args:
+            archive_dir: Where summaries live. Defaults to the cache dir.
+            projects_dir: Root of the Claude project folders
+        """
+        self.archive_dir = Path(archive_dir or get_cache_dir() / "archive")
+        self.projects_dir = Path(projects_dir or get_projects_dir())
+        self.parser = JSONLParser()
+
+    def summary_path(self, jsonl_path: Path) -> Path:
+        """Get the summary location for a session file
+
+        Args:
+            jsonl_path: Path to the JSONL session file
+
+        Returns:
+            Path of the gzip-compressed summary
+        """
+        return (
+            self.archive_dir
+            / jsonl_path.parent.name
+            / (session_stem(jsonl_path) + ".summary.json.gz")
+        )
+
+    def load(
+        self, jsonl_path: Path, stat: Optional[os.stat_result] = None
+    ) -> Optional[SessionSummary]:
+        """Load the summary of a session file if it is still current
+
+        Args:
+            jsonl_path: Path to the JSONL session file
+            stat: Current stat of the file, if already known
+
+        Returns:
+            The summary, or None if there is none or the file changed since
+        """
+        try:
+            stat = stat or jsonl_path.stat()
+            with gzip.open(self.summary_path(jsonl_path), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, EOFError, json.JSONDecodeError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != SUMMARY_VERSION:
+            return None
+        summary = SessionSummary(data)
+        return summary if summary.matches(stat) else None
+
+    def finished_sessions(
+        self, finished_after: float = DEFAULT_FINISHED_AFTER
+    ) -> List[Path]:
+        """Find session files that have not been written to for a while
+
+        Args:
+            finished_after: Seconds without modification after which a
+                session counts as finished
+
+        Returns:
+            Paths of finished session files
+        """
+        if not self.projects_dir.exists():
+            return []
+        cutoff = time.time() - finished_after
+        finished = []
+        for jsonl_path in list_sessions(self.projects_dir, "*/"):
+            try:
+                if jsonl_path.stat().st_mtime <= cutoff:
+                    finished.append(jsonl_path)
+            except OSError:
+                continue
+        return finished
+
+    def compact(
+        self,
+        finished_after: float = DEFAULT_FINISHED_AFTER,
+        keep_gzip_copy: bool = False,
+    ) -> CompactResult:
+        """Summarize every finished session that lacks a current summary
+
+        Original session files are never modified or removed. A session
+        that cannot be read or whose summary cannot be written is skipped and
+        listed in the result, so one bad file does not stop the run.
+
+        Args:
+            finished_after: Seconds without modification after which a
+                session counts as finished
+            keep_gzip_copy: Also store a gzip copy of each original next to its
+                summary
+
+        Returns:
+            Counts of sessions and bytes processed, and the sessions skipped
+        """
+        sessions = raw_bytes = summary_bytes = 0
+        failed = []
+        for jsonl_path in self.finished_sessions(finished_after):
+            if self.load(jsonl_path) is not None:
+                continue
+            target = self.summary_path(jsonl_path)
+            try:
+                summary = build_summary(jsonl_path, self.parser)
+                summary_bytes += self._write_atomic(
+                    target,
+                    gzip.compress(
+                        json.dumps(summary, separators=(",", ":")).encode("utf-8")
+                    ),
+                )
+            except (IOError, OSError) as e:
+                failed.append((str(jsonl_path), str(e)))
+                continue
+
+            if keep_gzip_copy:
+                self._gzip_copy(
+                    jsonl_path, target.with_name(session_stem(jsonl_path) + ".jsonl.gz")
+                )
+            sessions += 1
+            raw_bytes += summary["source"]["size"]
+        return CompactResult(sessions, raw_bytes, summary_bytes, tuple(failed))
+
+    def _write_atomic(self, path: Path, data: bytes) -> int:
+        """Replace a file atomically
+
+        Args:
+            path: Destination file
+            data: File content
+
+        Returns:
+            Number of bytes written
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent)
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        return len(data)
+
+    def _gzip_copy(self, source: Path, target: Path) -> None:
+        """Store a gzip-compressed copy of a session file
+
+        The copy is written as independent gzip members, so reading its last
+        prompt only decompresses the final members.
+
+        Args:
+            source: Session file, plain or compressed
+            target: Destination ``.jsonl.gz`` file
+        """
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{target.name}.", suffix=".tmp", dir=str(target.parent)
+        )
+        try:
+            with open_session(source) as src, os.fdopen(fd, "wb") as dst:
+                frames = write_framed(src, dst, GZIP)
+            os.replace(tmp_name, target)
+            save_frame_index(target, frames)
+        except (IOError, OSError):
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
@@ -0,0 +1,347 @@
+# ABOUTME: Collects the status of a Claude project from its JSONL file and git repo
+# ABOUTME: Offers a serial collector and an asyncio collector for many projects at once
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.activity import STALE_AFTER, Activity, get_activity
+from src.compressed import session_stem
+from src.git_cache import GitStatusCache
+from src.git_integration import GitIntegration, WorkingTreeStatus
+from src.jsonl_parser import BranchStatus, JSONLParser
+from src.sections import SectionRunner, SectionValue
+from src.todos import TodoList
+
+# Default number of projects collected concurrently by collect_many_async
+DEFAULT_CONCURRENCY = 16
+
+
+@dataclass
+class ProjectStatus:
+    """Everything the status display needs to know about one project"""
+
+    project_path: Optional[str] = None
+    jsonl_path: Optional[Path] = None
+    session_id: Optional[str] = None
+    last_activity: Optional[float] = None  # modification time of the session file
+    prompt: Optional[str] = None  # may be a preview; see prompt_length
+    prompt_length: int = 0
+    prompt_timestamp: Optional[float] = None
+    todos: Optional[TodoList] = None
+    todos_timestamp: Optional[float] = None
+    subagents: List[BranchStatus] = field(default_factory=list)
+    is_git_repository: bool = False
+    commit_message: Optional[str] = None
+    commit_timestamp: Optional[float] = None
+    working_tree: Optional[WorkingTreeStatus] = None
+    working_tree_age: Optional[float] = None  # seconds since it was computed
+    git_pending: bool = False  # git ran out of budget with nothing cached
+    metrics: Dict[str, Any] = field(default_factory=dict)  # parser extractors
+    activity: Optional[Activity] = None  # from the tail of the session file
+    sections: List[SectionValue] = field(default_factory=list)  # plugin sections
+
+    def __post_init__(self) -> None:
+        if isinstance(self.todos, list):
+            # Accept raw TodoWrite JSON from embedders
+            self.todos = TodoList.from_dicts(self.todos)
+
+
+def _parse_session(
+    status: ProjectStatus,
+    jsonl_path: Optional[Path],
+    include_subagents: bool,
+    parser: Optional[JSONLParser] = None,
+) -> None:
+    """Fill in the prompt, todos, metrics, activity and subagents from a session
+
+    Args:
+        status: Status to fill in
+        jsonl_path: Path to the JSONL file, or None
+        include_subagents: Whether to scan for active subagents
+        parser: Parser to use, e.g. one with a cache attached
+    """
+    if not jsonl_path:
+        return
+
+    parser = parser or JSONLParser()
+    if include_subagents:
+        # Branches are tracked in the same cached pass as the prompt and todos
+        parser = parser.with_branches()
+    state = parser.parse_session(jsonl_path)
+    if state is None:
+        return
+
+    status.session_id = state.session_id or session_stem(jsonl_path)
+    try:
+        status.last_activity = os.stat(jsonl_path).st_mtime
+    except OSError:
+        pass
+    status.prompt = state.prompt
+    status.prompt_length = state.prompt_length
+    status.prompt_timestamp = state.prompt_timestamp
+    status.todos = state.todos
+    status.todos_timestamp = state.todos_timestamp
+    status.metrics = dict(state.extracted)
+    status.activity = get_activity(jsonl_path)
+    if include_subagents:
+        # An interrupted subagent never writes its result; stop listing it
+        # once it has been quiet for as long as a stale session
+        cutoff = time.time() - STALE_AFTER
+        status.subagents = [
+            branch
+            for branch in state.branches.values()
+            if branch.is_sidechain
+            and branch.active
+            and (branch.last_timestamp is None or branch.last_timestamp >= cutoff)
+        ]
+
+
+def collect_status(
+    project_path: Optional[str],
+    jsonl_path: Optional[Path],
+    include_subagents: bool = False,
+    parser: Optional[JSONLParser] = None,
+    include_working_tree: bool = False,
+    working_tree_wait: float = 0.0,
+    git_cache: Optional[GitStatusCache] = None,
+    git_budget: float = 0.0,
+    sections: Optional[SectionRunner] = None,
+) -> ProjectStatus:
+    """Collect the status of one project serially
+
+    Args:
+        project_path: Project (git) directory. If None, uses current directory.
+        jsonl_path: Session JSONL file for the project
+        include_subagents: Whether to report active subagents
+        parser: Parser to use, e.g. one with a cache attached
+        include_working_tree: Whether to report dirty and ahead/behind state
+        working_tree_wait: Seconds to wait for the first working tree status
+        git_cache: Budgeted git cache
+        git_budget: Seconds allowed for all git work when using ``git_cache``
+        sections: Runner of the plugin sections to include
+
+    Returns:
+        The collected project status
+    """
+    status = ProjectStatus(project_path=project_path, jsonl_path=jsonl_path)
+    _parse_session(status, jsonl_path, include_subagents, parser)
+    if sections is not None:
+        status.sections = sections.collect(project_path)
+
+    if git_cache is not None:
+        _apply_git_snapshot(status, git_cache, git_budget, include_working_tree)
+        return status
+
+    git = GitIntegration()
+    status.is_git_repository = git.is_git_repository(project_path)
+    if status.is_git_repository:
+        status.commit_message = git.get_last_commit_message(project_path)
+        status.commit_timestamp = git.get_last_commit_timestamp(project_path)
+        if include_working_tree:
+            status.working_tree, status.working_tree_age = (
+                git.get_working_tree_status_cached(project_path, wait=working_tree_wait)
+            )
+    return status
+
+
+def collect_sessions(
+    project_path: Optional[str],
+    jsonl_paths: List[Path],
+    include_subagents: bool = False,
+    parser: Optional[JSONLParser] = None,
+    include_working_tree: bool = False,
+    working_tree_wait: float = 0.0,
+    git_cache: Optional[GitStatusCache] = None,
+    git_budget: float = 0.0,
+    sections: Optional[SectionRunner] = None,
+) -> List[ProjectStatus]:
+    """Collect the status of several sessions running in one project
+
+    The session files are parsed in worker threads while the git state of
+    the project is collected once and shared by all sessions.
+
+    Args:
+        project_path: Project (git) directory. If None, uses current directory.
+        jsonl_paths: Session JSONL files of the project
+        include_subagents: Whether to report active subagents
+        parser: Parser shared by all sessions, e.g. one with a cache attached
+        include_working_tree: Whether to report dirty and ahead/behind state
+        working_tree_wait: Seconds to wait for the first working tree status
+        git_cache: Budgeted git cache
+        git_budget: Seconds allowed for all git work when using ``git_cache``
+        sections: Runner of the plugin sections, collected once for all sessions
+
+    Returns:
+        Statuses in the same order as ``jsonl_paths``; a single status without
+        session data if there are no paths
+    """
+    if not jsonl_paths:
+        return [
+            collect_status(
+                project_path,
+                None,
+                include_working_tree=include_working_tree,
+                working_tree_wait=working_tree_wait,
+                git_cache=git_cache,
+                git_budget=git_budget,
+                sections=sections,
+            )
+        ]
+
+    parser = parser or JSONLParser()
+    statuses = [
+        ProjectStatus(project_path=project_path, jsonl_path=jsonl_path)
+        for jsonl_path in jsonl_paths
+    ]
+    with ThreadPoolExecutor(
+        max_workers=min(len(statuses), DEFAULT_CONCURRENCY)
+    ) as pool:
+        parsing = [
+            pool.submit(
+                _parse_session, status, status.jsonl_path, include_subagents, parser
+            )
+            for status in statuses
+        ]
+        git_status = collect_status(
+            project_path,
+            None,
+            include_working_tree=include_working_tree,
+            working_tree_wait=working_tree_wait,
+            git_cache=git_cache,
+            git_budget=git_budget,
+            sections=sections,
+        )
+        for future in parsing:
+            future.result()
+
+    for status in statuses:
+        status.is_git_repository = git_status.is_git_repository
+        status.commit_message = git_status.commit_message
+        status.commit_timestamp = git_status.commit_timestamp
+        status.working_tree = git_status.working_tree
+        status.working_tree_age = git_status.working_tree_age
+        status.git_pending = git_status.git_pending
+        status.sections = git_status.sections
+    return statuses
+
+
+def _apply_git_snapshot(
+    status: ProjectStatus,
+    git_cache: GitStatusCache,
+    git_budget: float,
+    include_working_tree: bool,
+) -> None:
+    """Fill in git details from the budgeted cache
+
+    Args:
+        status: Status to update
+        git_cache: Budgeted git cache
+        git_budget: Seconds allowed for all git work
+        include_working_tree: Whether to report dirty and ahead/behind state
+    """
+    snapshot = git_cache.get(status.project_path, git_budget)
+    if snapshot is None:
+        status.git_pending = True
+        return
+
+    if snapshot.checked_at:
+        status.is_git_repository = snapshot.is_repository
+        status.commit_message = snapshot.commit_message
+        status.commit_timestamp = snapshot.commit_timestamp
+    else:
+        # Only the working tree has answered so far
+        status.git_pending = True
+    if include_working_tree and snapshot.working_tree is not None:
+        status.working_tree = snapshot.working_tree
+        status.working_tree_age = snapshot.tree_age
+
+
+async def collect_status_async(
+    project_path: Optional[str],
+    jsonl_path: Optional[Path],
+    include_subagents: bool = False,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    parser: Optional[JSONLParser] = None,
+    include_working_tree: bool = False,
+) -> ProjectStatus:
+    """Collect the status of one project without blocking the event loop
+
+    The git queries run as concurrent subprocesses while the JSONL file is
+    parsed in a worker thread. The working tree status comes from the
+    stale-while-revalidate cache and never delays the result.
+
+    Args:
+        project_path: Project (git) directory. If None, uses current directory.
+        jsonl_path: Session JSONL file for the project
+        include_subagents: Whether to report active subagents
+        semaphore: Optional semaphore bounding concurrent collections
+        parser: Parser to use, e.g. one with a cache attached
+        include_working_tree: Whether to report dirty and ahead/behind state
+
+    Returns:
+        The collected project status
+    """
+    if semaphore is not None:
+        async with semaphore:
+            return await collect_status_async(
+                project_path,
+                jsonl_path,
+                include_subagents,
+                parser=parser,
+                include_working_tree=include_working_tree,
+            )
+
+    git = GitIntegration()
+    status = ProjectStatus(project_path=project_path, jsonl_path=jsonl_path)
+    _, is_repo, message, timestamp = await asyncio.gather(
+        asyncio.to_thread(
+            _parse_session, status, jsonl_path, include_subagents, parser
+        ),
+        git.is_git_repository_async(project_path),
+        git.get_last_commit_message_async(project_path),
+        git.get_last_commit_timestamp_async(project_path),
+    )
+    status.is_git_repository = is_repo
+    if is_repo:
+        status.commit_message = message
+        status.commit_timestamp = timestamp
+        if include_working_tree:
+            status.working_tree, status.working_tree_age = (
+                git.get_working_tree_status_cached(project_path)
+            )
+    return status
+
+
+async def collect_many_async(
+    projects: Iterable[Tuple[Optional[str], Optional[Path]]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    include_subagents: bool = False,
+    parser: Optional[JSONLParser] = None,
+) -> List[ProjectStatus]:
+    """Collect the status of many projects from one event loop
+
+    Args:
+        projects: Pairs of (project_path, jsonl_path)
+        concurrency: Maximum number of projects collected at the same time
+        include_subagents: Whether to report active subagents
+        parser: Parser shared by all projects, e.g. one with a cache attached
+
+    Returns:
+        Statuses in the same order as the input projects
+    """
+    semaphore = asyncio.BoundedSemaphore(concurrency)
+    return list(
+        await asyncio.gather(
+            *(
+                collect_status_async(
+                    project_path, jsonl_path, include_subagents, semaphore, parser
+                )
+                for project_path, jsonl_path in projects
+            )
+        )
+    )
@@ -0,0 +1,59 @@
+# ABOUTME: Atomic writer for precomputed status files read by shell prompts and tmux
+# ABOUTME: Replaces a file only when its rendered content actually changes
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+
+class StatusFileWriter:
+    """Writes rendered status text to files atomically and only on change
+
+    Readers such as ``cat`` in a shell prompt or a tmux ``#()`` call always see
+    either the previous or the new content, never a partial write.
+    """
+
+    def __init__(self) -> None:
+        self._last_content: Dict[str, str] = {}
+
+    def write(self, path: str | Path, content: str) -> bool:
+        """Write content to path unless it already holds exactly that content
+
+        Args:
+            path: Destination file
+            content: Text to write
+
+        Returns:
+            True if the file was (re)written, False if it was already current
+        """
+        path = Path(path)
+        key = str(path)
+        if self._last_content.get(key) == content:
+            return False
+
+        try:
+            if path.read_text(encoding="utf-8") == content:
+                self._last_content[key] = content
+                return False
+        except (IOError, OSError, UnicodeDecodeError):
+            pass
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent)
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+        self._last_content[key] = content
+        return True
@@ -0,0 +1,413 @@
+# ABOUTME: Records changed status snapshots into a downsampled SQLite time series
+# ABOUTME: Batches writes and thins old samples to per-minute and per-hour rows
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.activity import STALE_AFTER, WORKING
+from src.paths import get_cache_dir
+from src.status_collector import ProjectStatus
+from src.todos import TodoStatus
+
+# Snapshots buffered before they are written in one transaction
+BATCH_SIZE = 32
+
+# Seconds a snapshot may wait in the buffer before the batch is written anyway
+FLUSH_INTERVAL = 30.0
+
+# (source resolution, target resolution, age in seconds): samples older than
+# the age are merged into one row per target-resolution bucket. A resolution
+# of 0 marks raw snapshots.
+DOWNSAMPLE_LEVELS = ((0, 60, 86400), (60, 3600, 7 * 86400))
+
+# Seconds between two downsampling passes
+DOWNSAMPLE_INTERVAL = 3600.0
+
+# Snapshot columns compared to decide whether anything changed
+SNAPSHOT_COLUMNS = (
+    "prompt_hash",
+    "todos_completed",
+    "todos_in_progress",
+    "todos_pending",
+    "commit_hash",
+    "activity",
+)
+
+# Columns written for each recorded snapshot; the time-weighted columns
+# "seconds" and "working_seconds" are only filled in by downsampling
+RECORD_COLUMNS = (
+    "project",
+    "session_id",
+    "time",
+    "resolution",
+    "count",
+    "working",
+    *SNAPSHOT_COLUMNS,
+)
+
+# Columns added after the first release, created in older databases on open
+ADDED_COLUMNS = ("seconds", "working_seconds")
+
+
+class TrendPoint(NamedTuple):
+    """Aggregated history of one project over one step of time"""
+
+    start: float  # start of the step
+    samples: int  # snapshots recorded, including those merged by downsampling
+    prompts: int  # distinct prompts seen
+    commits: int  # distinct commits seen
+    todos_completed: Optional[int]  # at the last snapshot of the step
+    todos_total: Optional[int]
+    working: float  # share of the recorded time in which the agent was working
+
+
+def _digest(*parts: object) -> Optional[str]:
+    """Hash the given values into a short, stable identifier
+
+    Args:
+        parts: Values to hash; all None gives None
+
+    Returns:
+        First 16 hex digits of the SHA-1, or None
+    """
+    if all(part is None for part in parts):
+        return None
+    text = "\0".join("" if part is None else str(part) for part in parts)
+    return hashlib.sha1(text.encode("utf-8"), usedforsecurity=False).hexdigest()[:16]
+
+
+def snapshot_of(status: ProjectStatus) -> Tuple:
+    """Reduce a collected status to the values the history keeps
+
+    Args:
+        status: Collected project status
+
+    Returns:
+        Values in SNAPSHOT_COLUMNS order
+    """
+    counts = status.todos.counts if status.todos else {}
+    activity = status.activity.state if status.activity is not None else None
+    return (
+        _digest(status.prompt, status.prompt_timestamp),
+        counts.get(TodoStatus.COMPLETED.value, 0),
+        counts.get(TodoStatus.IN_PROGRESS.value, 0),
+        counts.get(TodoStatus.PENDING.value, 0),
+        _digest(status.commit_message, status.commit_timestamp),
+        activity,
+    )
+
+
+class StatusHistory:
+    """Time series of status snapshots per project and session
+
+    Only snapshots that differ from the previous one of the same session are
+    kept. They are buffered and written in batches, so a refresh loop costs
+    no disk write most of the time. A snapshot's state lasts until the next
+    snapshot of its session, so the time the agent was working is weighted by
+    these spans rather than by the number of snapshots. Old snapshots are
+    merged into one row per minute after a day and one row per hour after a
+    week; each merged row keeps the last snapshot of its bucket, the number
+    of snapshots it stands for, how many of them had the agent working and
+    the seconds, in total and working, that they covered.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS samples (
+            project TEXT NOT NULL,
+            session_id TEXT NOT NULL,
+            time REAL NOT NULL,
+            resolution INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            working INTEGER NOT NULL,
+            prompt_hash TEXT,
+            todos_completed INTEGER,
+            todos_in_progress INTEGER,
+            todos_pending INTEGER,
+            commit_hash TEXT,
+            activity TEXT,
+            seconds REAL,
+            working_seconds REAL
+        );
+        CREATE INDEX IF NOT EXISTS samples_by_time
+            ON samples (project, resolution, time);
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Open (or create) the history database
+
+        Args:
+            db_path: Location of the SQLite database. Defaults to the cache dir.
+            batch_size: Snapshots buffered before a write
+            flush_interval: Longest time a snapshot stays buffered
+            clock: Wall-clock time source
+        """
+        self.db_path = Path(db_path or get_cache_dir() / "history.db")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending: List[Tuple] = []
+        self._last: Dict[Tuple[str, str], Tuple] = {}
+        self._last_flush = clock()
+        self._last_downsample: Optional[float] = None
+        # The status server records from its refresh thread
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(samples)")}
+        for column in ADDED_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE samples ADD COLUMN {column} REAL")
+
+    def close(self) -> None:
+        """Write buffered snapshots and close the database connection"""
+        self.flush()
+        with self._lock:
+            self.conn.close()
+
+    def record(self, status: ProjectStatus, now: Optional[float] = None) -> bool:
+        """Buffer a snapshot of a status if it changed
+
+        Args:
+            status: Freshly collected status
+            now: Time of the snapshot. If None, uses the clock.
+
+        Returns:
+            True if the snapshot differed from the previous one and was kept
+        """
+        now = self.clock() if now is None else now
+        project = status.project_path or os.getcwd()
+        key = (project, status.session_id or "")
+        snapshot = snapshot_of(status)
+        with self._lock:
+            if key not in self._last:
+                self._last[key] = self._latest_snapshot(*key)
+            if self._last[key] == snapshot:
+                return False
+            self._last[key] = snapshot
+            working = 1 if snapshot[-1] == WORKING else 0
+            self._pending.append((*key, now, 0, 1, working, *snapshot))
+            due = (
+                len(self._pending) >= self.batch_size
+                or now - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush(now)
+        return True
+
+    def _latest_snapshot(self, project: str, session_id: str) -> Optional[Tuple]:
+        """Load the newest stored snapshot of a session, e.g. after a restart
+
+        Args:
+            project: Project directory
+            session_id: Session id, empty if unknown
+
+        Returns:
+            Values in SNAPSHOT_COLUMNS order, or None if there is none
+        """
+        row = self.conn.execute(
+            f"SELECT {', '.join(SNAPSHOT_COLUMNS)} FROM samples "  # nosec B608
+            "WHERE project = ? AND session_id = ? ORDER BY time DESC LIMIT 1",
+            (project, session_id),
+        ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """Write the buffered snapshots in one transaction
+
+        Also downsamples old rows when the last pass is more than
+        DOWNSAMPLE_INTERVAL ago.
+
+        Args:
+            now: Current time. If None, uses the clock.
+
+        Returns:
+            Number of snapshots written
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = now
+            if rows:
+                with self.conn:
+                    self.conn.executemany(
+                        f"INSERT INTO samples ({', '.join(RECORD_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(RECORD_COLUMNS))})",
+                        rows,
+                    )
+            downsample = (
+                self._last_downsample is None
+                or now - self._last_downsample >= DOWNSAMPLE_INTERVAL
+            )
+        if downsample:
+            self.downsample(now)
+        return len(rows)
+
+    def downsample(self, now: Optional[float] = None) -> int:
+        """Merge old rows into coarser buckets, per DOWNSAMPLE_LEVELS
+
+        Each merged row also stores the seconds its rows covered, each row
+        lasting until the next one of its session, and how many of those the
+        agent was working. The working time of one snapshot is capped at
+        STALE_AFTER, after which the activity reads idle anyway.
+
+        Args:
+            now: Current time. If None, uses the clock.
+
+        Returns:
+            Number of rows removed
+        """
+        now = self.clock() if now is None else now
+        removed = 0
+        columns = ", ".join(SNAPSHOT_COLUMNS)
+        with self._lock, self.conn:
+            for source, target, age in DOWNSAMPLE_LEVELS:
+                # Whole buckets only, so a bucket is never merged twice
+                cutoff = (now - age) // target * target
+                before = self.conn.total_changes
+                self.conn.execute(
+                    f"""
+                    WITH spans AS (
+                        SELECT *,
+                            CAST(time / :target AS INTEGER) * :target AS bucket,
+                            COALESCE(
+                                seconds,
+                                COALESCE(
+                                    LEAD(time) OVER (
+                                        PARTITION BY project, session_id
+                                        ORDER BY time
+                                    ),
+                                    :now
+                                ) - time
+                            ) AS span
+                        FROM samples
+                    )
+                    INSERT INTO samples (
+                        {", ".join(RECORD_COLUMNS)}, seconds, working_seconds
+                    )
+                    SELECT project, session_id, bucket, :target, total,
+                        total_working, {columns}, total_seconds,
+                        total_working_seconds
+                    FROM (
+                        SELECT *,
+                            SUM(count) OVER buckets AS total,
+                            SUM(working) OVER buckets AS total_working,
+                            SUM(span) OVER buckets AS total_seconds,
+                            SUM(
+                                COALESCE(
+                                    working_seconds,
+                                    MIN(span, :stale) * working / count
+                                )
+                            ) OVER buckets AS total_working_seconds,
+                            ROW_NUMBER() OVER (buckets ORDER BY time DESC) AS rank
+                        FROM spans
+                        WHERE resolution = :source AND time < :cutoff
+                        WINDOW buckets AS (PARTITION BY project, session_id, bucket)
+                    )
+                    WHERE rank = 1
+                    """,  # nosec B608
+                    {
+                        "target": target,
+                        "now": now,
+                        "stale": STALE_AFTER,
+                        "source": source,
+                        "cutoff": cutoff,
+                    },
+                )
+                inserted = self.conn.total_changes - before
+                self.conn.execute(
+                    "DELETE FROM samples WHERE resolution = ? AND time < ?",
+                    (source, cutoff),
+                )
+                removed += self.conn.total_changes - before - 2 * inserted
+            self._last_downsample = now
+        return removed
+
+    def trend(
+        self,
+        project: str,
+        since: float,
+        until: Optional[float] = None,
+        step: float = 86400,
+        utc_offset: float = 0,
+    ) -> List[TrendPoint]:
+        """Summarize the history of a project in fixed steps
+
+        A snapshot counts towards the step it was recorded in, lasting until
+        the next snapshot of its session or the end of the period.
+
+        Args:
+            project: Project directory
+            since: Start of the period
+            until: End of the period. If None, uses the clock.
+            step: Seconds per returned point
+            utc_offset: Seconds east of UTC of the zone whose day or hour
+                boundaries the steps follow
+
+        Returns:
+            One point per step that has samples, oldest first
+        """
+        self.flush()
+        until = self.clock() if until is None else until
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT CAST((time + ?) / ? AS INTEGER) * ? - ? AS start,
+                    count, working, seconds, working_seconds,
+                    COALESCE(
+                        LEAD(time) OVER (PARTITION BY session_id ORDER BY time), ?
+                    ) - time AS span,
+                    prompt_hash, commit_hash, todos_completed,
+                    todos_completed + todos_in_progress + todos_pending
+                FROM samples
+                WHERE project = ? AND time >= ? AND time <= ?
+                ORDER BY time
+                """,
+                (utc_offset, step, step, utc_offset, until, project, since, until),
+            ).fetchall()
+
+        points: List[TrendPoint] = []
+        prompts: set = set()
+        commits: set = set()
+        working = 0
+        recorded = working_time = 0.0
+        for row in rows:
+            start, count, busy, seconds, busy_seconds, span = row[:6]
+            prompt, commit, completed, total = row[6:]
+            if not points or points[-1].start != start:
+                prompts, commits, working = set(), set(), 0
+                recorded = working_time = 0.0
+                points.append(TrendPoint(start, 0, 0, 0, None, None, 0.0))
+            prompts.add(prompt)
+            commits.add(commit)
+            working += busy
+            if seconds is None:
+                seconds = span
+            if busy_seconds is None:
+                busy_seconds = min(span, STALE_AFTER) * busy / count
+            recorded += seconds
+            working_time += busy_seconds
+            samples = points[-1].samples + count
+            points[-1] = TrendPoint(
+                start,
+                samples,
+                len(prompts - {None}),
+                len(commits - {None}),
+                completed,
+                total,
+                # A step holding only its last instant falls back to snapshots
+                working_time / recorded if recorded else working / samples,
+            )
+        return points
@@ -0,0 +1,266 @@
+# ABOUTME: Read-only HTTP server publishing project status as JSON and live events
+# ABOUTME: Serves cached documents with ETags so polling dashboards get cheap 304s
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_INTERVAL = 15.0
+
+
+def make_etag(body: bytes) -> str:
+    """Compute a strong ETag for a response body
+
+    Args:
+        body: Response body
+
+    Returns:
+        Quoted entity tag
+    """
+    return '"' + hashlib.sha1(body, usedforsecurity=False).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against the current ETag
+
+    Args:
+        if_none_match: Header value, possibly a comma-separated list or ``*``
+        etag: Current entity tag
+
+    Returns:
+        True if the client already holds the current representation
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+class StatusBoard:
+    """Latest status documents of all served projects
+
+    The board does no parsing or git work itself. ``render`` is called on every
+    refresh and should reuse warm parsers and cached git state; a test or a
+    local stand-in can pass any callable returning JSON documents.
+    """
+
+    def __init__(self, render: Callable[[], Dict[str, str]]):
+        """Create an empty board
+
+        Args:
+            render: Returns one JSON document (a single line) per project path,
+                in display order
+        """
+        self.render = render
+        self.version = 0
+        self._documents: Dict[str, Tuple[bytes, str]] = {}
+        self._projects: Tuple[bytes, str] = (b"", "")
+        self._changed = threading.Condition()
+
+    def refresh(self) -> bool:
+        """Render all projects and publish the result if anything changed
+
+        Returns:
+            True if a new version was published
+        """
+        rendered = self.render()
+        documents = {}
+        for project, document in rendered.items():
+            body = document.encode("utf-8")
+            documents[project] = (body, make_etag(body))
+        projects_body = (
+            b'{"projects": ['
+            + b", ".join(body.rstrip(b"\n") for body, _ in documents.values())
+            + b"]}\n"
+        )
+        projects_etag = make_etag(projects_body)
+
+        with self._changed:
+            if self.version and projects_etag == self._projects[1]:
+                return False
+            self._documents = documents
+            self._projects = (projects_body, projects_etag)
+            self.version += 1
+            self._changed.notify_all()
+            return True
+
+    def document(self, project: Optional[str] = None) -> Optional[Tuple[bytes, str]]:
+        """Get the status document of one project
+
+        Args:
+            project: Project path. If None, the first project is used.
+
+        Returns:
+            Tuple of (body, etag), or None if the project is not served
+        """
+        with self._changed:
+            if project is None:
+                return next(iter(self._documents.values()), None)
+            return self._documents.get(project)
+
+    def all_documents(self) -> Tuple[bytes, str]:
+        """Get the status documents of every project as one JSON document
+
+        Returns:
+            Tuple of (body, etag)
+        """
+        with self._changed:
+            return self._projects
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Block until a version newer than ``version`` is published
+
+        Args:
+            version: Last version the caller has seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            The current version, which equals ``version`` on timeout
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Serves /status, /projects and /events from the server's StatusBoard"""
+
+    server: "StatusServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:
+        """Keep the terminal quiet; dashboards poll constantly"""
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/status":
+            project = parse_qs(url.query).get("project", [None])[0]
+            found = self.server.board.document(project)
+            if found is None:
+                self._send_error(404, "Unknown project")
+            else:
+                self._send_document(*found)
+        elif url.path == "/projects":
+            self._send_document(*self.server.board.all_documents())
+        elif url.path == "/events":
+            self._stream_events()
+        else:
+            self._send_error(404, "Not found")
+
+    def _send_document(self, body: bytes, etag: str) -> None:
+        """Send a JSON document, or 304 if the client's copy is current
+
+        Args:
+            body: JSON body
+            etag: Entity tag of the body
+        """
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, code: int, message: str) -> None:
+        """Send a short plain-text error
+
+        Args:
+            code: HTTP status code
+            message: Error text
+        """
+        body = (message + "\n").encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_events(self) -> None:
+        """Push the status of all projects whenever it changes
+
+        The current state is sent right away, then one ``status`` event per new
+        version. Idle streams get a comment line so proxies keep them open.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        board = self.server.board
+        seen = -1
+        try:
+            while not self.server.stopping.is_set():
+                version = board.wait_for_change(seen, self.server.heartbeat)
+                if version == seen:
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    body, _ = board.all_documents()
+                    self.wfile.write(
+                        f"id: {version}\nevent: status\ndata: ".encode("utf-8")
+                        + body.rstrip(b"\n")
+                        + b"\n\n"
+                    )
+                    seen = version
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class StatusServer(ThreadingHTTPServer):
+    """HTTP server whose board is refreshed by a background thread"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        board: StatusBoard,
+        interval: float,
+        heartbeat: float = HEARTBEAT_INTERVAL,
+    ):
+        """Bind the server and publish a first version of the board
+
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            board: Board holding the served documents
+            interval: Seconds between board refreshes
+            heartbeat: Seconds between keep-alive comments on event streams
+        """
+        super().__init__(address, StatusRequestHandler)
+        self.board = board
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.stopping = threading.Event()
+        board.refresh()
+        self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        """Refresh the board until the server shuts down"""
+        while not self.stopping.wait(self.interval):
+            try:
+                self.board.refresh()
+            except Exception:  # nosec B110
+                # Keep serving the last good state
+                pass
+
+    def shutdown(self) -> None:
+        """Stop serving, refreshing and streaming"""
+        self.stopping.set()
+        super().shutdown()
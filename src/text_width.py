@@ -0,0 +1,166 @@
+# ABOUTME: Terminal display width helpers for wide Unicode characters and ANSI escapes
+# ABOUTME: Truncates text to a cell budget while scanning only as far as the budget
+
+import unicodedata
+from functools import lru_cache
+
+ESCAPE = "\x1b"
+RESET = "\x1b[0m"
+
+# Characters folded to spaces when text must fit on a single line
+LINE_BREAKS = {"\n": " ", "\r": " ", "\t": " "}
+
+
+@lru_cache(maxsize=4096)
+def char_width(char: str) -> int:
+    """Get the number of terminal cells a character occupies
+
+    Args:
+        char: A single character
+
+    Returns:
+        0 for combining and zero-width characters, 2 for wide East Asian
+        characters and most emoji, 1 otherwise
+    """
+    if char in LINE_BREAKS:
+        return 1
+    if unicodedata.combining(char):
+        return 0
+    category = unicodedata.category(char)
+    if category in ("Mn", "Me", "Cf", "Cc"):
+        return 0
+    if unicodedata.east_asian_width(char) in ("W", "F"):
+        return 2
+    return 1
+
+
+def _escape_end(text: str, start: int) -> int:
+    """Find the end of the ANSI escape sequence starting at ``start``
+
+    Args:
+        text: Text containing the escape sequence
+        start: Index of the ESC character
+
+    Returns:
+        Index just past the escape sequence
+    """
+    index = start + 1
+    if index < len(text) and text[index] == "[":
+        # CSI sequence: parameters and intermediates up to a final byte @-~
+        index += 1
+        while index < len(text) and not ("@" <= text[index] <= "~"):
+            index += 1
+        return min(index + 1, len(text))
+    # Two-character escape such as ESC c
+    return min(index + 1, len(text))
+
+
+def display_width(text: str) -> int:
+    """Get the number of terminal cells needed to show text
+
+    Args:
+        text: Text that may contain wide characters and ANSI escapes
+
+    Returns:
+        Width in cells
+    """
+    width = 0
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == ESCAPE:
+            index = _escape_end(text, index)
+            continue
+        width += char_width(char)
+        index += 1
+    return width
+
+
+def exceeds_width(text: str, width: int) -> bool:
+    """Check whether text is wider than ``width`` cells
+
+    Scanning stops as soon as the answer is known, so the cost is bounded by
+    the width rather than the length of the text.
+
+    Args:
+        text: Text that may contain wide characters and ANSI escapes
+        width: Available cells
+
+    Returns:
+        True if the text does not fit
+    """
+    used = 0
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == ESCAPE:
+            index = _escape_end(text, index)
+            continue
+        used += char_width(char)
+        if used > width:
+            return True
+        index += 1
+    return False
+
+
+def truncate_to_width(
+    text: str, width: int, ellipsis: str = "...", single_line: bool = False
+) -> str:
+    """Truncate text to fit in ``width`` terminal cells
+
+    Wide characters are never split and escape sequences are never cut. If an
+    escape sequence was kept, a reset is appended so colors don't leak. Only
+    the first ``width`` cells' worth of characters are examined, so
+    megabyte-long prompts cost no more than short ones.
+
+    Args:
+        text: Text that may contain wide characters and ANSI escapes
+        width: Available cells
+        ellipsis: Marker appended when the text is cut
+        single_line: Replace newlines, carriage returns and tabs with spaces
+
+    Returns:
+        The text itself if it fits, otherwise a prefix plus the ellipsis
+    """
+    if width <= 0:
+        return ""
+
+    ellipsis_width = display_width(ellipsis)
+    if ellipsis_width > width:
+        ellipsis, ellipsis_width = "", 0
+    cut_budget = width - ellipsis_width
+
+    pieces = []
+    used = 0
+    cut_index = 0  # number of pieces that fit together with the ellipsis
+    saw_escape = False
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == ESCAPE:
+            end = _escape_end(text, index)
+            pieces.append(text[index:end])
+            saw_escape = True
+            if used <= cut_budget:
+                cut_index = len(pieces)
+            index = end
+            continue
+
+        cells = char_width(char)
+        if used + cells > width:
+            # Does not fit: keep what fits beside the ellipsis
+            result = "".join(pieces[:cut_index]) + ellipsis
+            return result + RESET if saw_escape else result
+
+        used += cells
+        pieces.append(LINE_BREAKS.get(char, char) if single_line else char)
+        if used <= cut_budget:
+            cut_index = len(pieces)
+        index += 1
+
+    if not single_line:
+        return text
+    return "".join(pieces)
@@ -0,0 +1,182 @@
+# ABOUTME: Compact todo records built once from TodoWrite JSON when a session is parsed
+# ABOUTME: Precomputes status counts and the current todo so rendering never rescans
+
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class TodoStatus(str, Enum):
+    """Status of a todo item"""
+
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    UNKNOWN = "unknown"
+
+
+class TodoPriority(str, Enum):
+    """Priority of a todo item"""
+
+    HIGH = "high"
+    MEDIUM = "medium"
+    LOW = "low"
+    NONE = ""
+
+
+# Members by value; a malformed value falls back instead of raising ValueError
+_STATUSES = {status.value: status for status in TodoStatus}
+_PRIORITIES = {priority.value: priority for priority in TodoPriority}
+
+
+class Todo:
+    """A single todo item"""
+
+    __slots__ = ("id", "content", "status", "priority")
+
+    def __init__(
+        self,
+        content: str,
+        status: TodoStatus = TodoStatus.PENDING,
+        priority: TodoPriority = TodoPriority.NONE,
+        id: Optional[str] = None,
+    ):
+        self.id = id
+        self.content = content
+        self.status = status
+        self.priority = priority
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Todo":
+        """Create a todo from its TodoWrite JSON form
+
+        Args:
+            data: Todo dictionary with content, status and optional priority
+
+        Returns:
+            The todo. Unrecognized statuses become UNKNOWN and unrecognized
+            priorities NONE.
+        """
+        status = data.get("status")
+        priority = data.get("priority") or ""
+        status = (
+            _STATUSES.get(status, TodoStatus.UNKNOWN)
+            if isinstance(status, str)
+            else TodoStatus.UNKNOWN
+        )
+        priority = (
+            _PRIORITIES.get(priority.lower(), TodoPriority.NONE)
+            if isinstance(priority, str)
+            else TodoPriority.NONE
+        )
+        todo_id = data.get("id")
+        return cls(
+            str(data.get("content", "Unknown todo")),
+            status,
+            priority,
+            str(todo_id) if todo_id is not None else None,
+        )
+
+    def to_dict(self) -> dict:
+        """Convert back to the TodoWrite JSON form
+
+        Returns:
+            Dictionary with content, status and, when set, priority and id
+        """
+        data = {"content": self.content, "status": self.status.value}
+        if self.priority is not TodoPriority.NONE:
+            data["priority"] = self.priority.value
+        if self.id is not None:
+            data["id"] = self.id
+        return data
+
+    @property
+    def is_completed(self) -> bool:
+        """Whether the todo is done"""
+        return self.status is TodoStatus.COMPLETED
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Todo):
+            return NotImplemented
+        return (self.id, self.content, self.status, self.priority) == (
+            other.id,
+            other.content,
+            other.status,
+            other.priority,
+        )
+
+    def __repr__(self) -> str:
+        return f"Todo({self.content!r}, {self.status.value})"
+
+
+class TodoList:
+    """An immutable todo list with its summary computed up front"""
+
+    __slots__ = ("items", "counts", "current")
+
+    def __init__(self, items: Tuple[Todo, ...]):
+        """Create a todo list and compute its summary
+
+        Args:
+            items: Todos in list order
+        """
+        self.items = items
+
+        # Counts keep first-seen status order, matching the list order
+        counts: Dict[str, int] = {}
+        first_in_progress = first_pending = None
+        for todo in items:
+            counts[todo.status.value] = counts.get(todo.status.value, 0) + 1
+            if first_in_progress is None and todo.status is TodoStatus.IN_PROGRESS:
+                first_in_progress = todo
+            elif first_pending is None and todo.status is TodoStatus.PENDING:
+                first_pending = todo
+        self.counts = counts
+
+        # The todo being worked on, else the next one up, else the last one
+        self.current: Optional[Todo] = (
+            first_in_progress or first_pending or (items[-1] if items else None)
+        )
+
+    @classmethod
+    def from_dicts(cls, todos: List[dict]) -> "TodoList":
+        """Create a todo list from TodoWrite JSON
+
+        Args:
+            todos: Todo dictionaries; entries that are not dictionaries are skipped
+
+        Returns:
+            The todo list
+        """
+        return cls(
+            tuple(Todo.from_dict(todo) for todo in todos if isinstance(todo, dict))
+        )
+
+    def to_dicts(self) -> List[dict]:
+        """Convert back to TodoWrite JSON
+
+        Returns:
+            List of todo dictionaries
+        """
+        return [todo.to_dict() for todo in self.items]
+
+    @property
+    def current_completed(self) -> bool:
+        """Whether the current todo is done; only when nothing is left to do"""
+        return self.current is not None and self.current.is_completed
+
+    def approx_bytes(self) -> int:
+        """Estimate the memory held by this list
+
+        Returns:
+            Approximate size in bytes, dominated by the todo texts
+        """
+        return 64 + sum(96 + len(todo.content) for todo in self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Todo]:
+        return iter(self.items)
+
+    def __getitem__(self, index: int) -> Todo:
+        return self.items[index]
@@ -0,0 +1,322 @@
+# ABOUTME: Measures how long each tool call takes by joining tool_use and tool_result
+# ABOUTME: Streams session files incrementally and aggregates per-tool latency stats
+
+import json
+import math
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.compressed import compression_of, open_session
+from src.jsonl_parser import JSONLParser
+from src.paths import get_cache_dir
+
+# Bump when the cached scan state layout changes; older caches are then ignored
+CACHE_VERSION = 2
+
+# Calls awaiting their result; the oldest is dropped (and counted as
+# unanswered) when a session holds more, e.g. after a crash mid-call
+MAX_PENDING = 1000
+
+# Only lines containing one of these can start or finish a tool call
+_NEEDLES = (b'"tool_use"', b'"tool_result"')
+
+
+class ToolStats(NamedTuple):
+    """Latency statistics of one tool"""
+
+    tool: str
+    count: int  # calls that got a result
+    total: float  # seconds spent in timed calls
+    p50: Optional[float]
+    p95: Optional[float]
+    max: Optional[float]
+    error_rate: float  # share of answered calls whose result was an error
+    unanswered: int  # calls dropped from the pending map without a result
+
+
+def new_scan_state(inode: int = 0) -> dict:
+    """Create the state of a scan that has not read anything yet
+
+    Args:
+        inode: Inode of the file being scanned
+
+    Returns:
+        JSON-serializable scan state
+    """
+    return {
+        "inode": inode,
+        "size": 0,  # file size when last scanned
+        "offset": 0,  # uncompressed bytes scanned
+        "pending": [],  # [tool_use id, tool name, timestamp] in call order
+        "calls": {},  # tool -> answered calls
+        "errors": {},  # tool -> answered calls with is_error
+        "unanswered": {},  # tool -> calls evicted from the pending map
+        "durations": {},  # tool -> seconds of each timed call
+    }
+
+
+def scan_tool_calls(
+    jsonl_path: Path,
+    state: Optional[dict] = None,
+    max_pending: int = MAX_PENDING,
+) -> dict:
+    """Pair tool uses with their results, continuing a previous scan
+
+    Only the bytes after the previous scan's offset are read. A replaced,
+    truncated or changed compressed file is scanned again from the start.
+
+    Args:
+        jsonl_path: Path to the session file, plain or compressed
+        state: State returned by an earlier scan of the same file
+        max_pending: Maximum number of calls awaiting a result
+
+    Returns:
+        The updated scan state
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    stat = os.stat(jsonl_path)
+    if (
+        state is not None
+        and state["inode"] == stat.st_ino
+        and state["size"] == stat.st_size
+    ):
+        return state
+    if (
+        state is None
+        or state["inode"] != stat.st_ino
+        or state["offset"] > stat.st_size
+        or compression_of(jsonl_path) is not None
+    ):
+        state = new_scan_state(stat.st_ino)
+
+    parser = JSONLParser()
+    pending: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict(
+        (tool_id, (name, timestamp)) for tool_id, name, timestamp in state["pending"]
+    )
+    calls = state["calls"]
+    errors = state["errors"]
+    unanswered = state["unanswered"]
+    durations = state["durations"]
+
+    offset = state["offset"]
+    with open_session(jsonl_path) as f:
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                break  # still being written; read it on the next scan
+            offset += len(raw_line)
+            if not any(needle in raw_line for needle in _NEEDLES):
+                continue
+            try:
+                entry = json.loads(raw_line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if not isinstance(entry, dict):
+                continue
+            message = entry.get("message")
+            content = message.get("content") if isinstance(message, dict) else None
+            if not isinstance(content, list):
+                continue
+            timestamp = None
+            if isinstance(entry.get("timestamp"), str):
+                timestamp = parser._parse_timestamp(entry["timestamp"])
+
+            for item in content:
+                if not isinstance(item, dict):
+                    continue
+                if item.get("type") == "tool_use" and isinstance(item.get("id"), str):
+                    name = item.get("name")
+                    pending[item["id"]] = (
+                        name if isinstance(name, str) else "unknown",
+                        timestamp,
+                    )
+                    if len(pending) > max_pending:
+                        _, (evicted, _) = pending.popitem(last=False)
+                        unanswered[evicted] = unanswered.get(evicted, 0) + 1
+                elif item.get("type") == "tool_result":
+                    call = pending.pop(item.get("tool_use_id"), None)
+                    if call is None:
+                        continue
+                    name, started = call
+                    calls[name] = calls.get(name, 0) + 1
+                    if item.get("is_error") is True:
+                        errors[name] = errors.get(name, 0) + 1
+                    if started is not None and timestamp is not None:
+                        durations.setdefault(name, []).append(
+                            round(max(0.0, timestamp - started), 3)
+                        )
+
+    state["size"] = stat.st_size
+    state["offset"] = offset
+    state["pending"] = [
+        [tool_id, name, timestamp] for tool_id, (name, timestamp) in pending.items()
+    ]
+    return state
+
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Get a nearest-rank percentile
+
+    Args:
+        sorted_values: Values in ascending order
+        percent: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or None for no values
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(states: Iterable[dict]) -> List[ToolStats]:
+    """Combine scan states into per-tool statistics
+
+    Args:
+        states: Scan states of one or more sessions
+
+    Returns:
+        Statistics per tool, the tools taking the most time first
+    """
+    calls: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    unanswered: Dict[str, int] = {}
+    durations: Dict[str, List[float]] = {}
+    for state in states:
+        for totals, counts in (
+            (calls, state["calls"]),
+            (errors, state["errors"]),
+            (unanswered, state["unanswered"]),
+        ):
+            for tool, count in counts.items():
+                totals[tool] = totals.get(tool, 0) + count
+        for tool, values in state["durations"].items():
+            durations.setdefault(tool, []).extend(values)
+
+    stats = []
+    for tool in set(calls) | set(unanswered):
+        values = sorted(durations.get(tool, []))
+        count = calls.get(tool, 0)
+        stats.append(
+            ToolStats(
+                tool=tool,
+                count=count,
+                total=round(sum(values), 3),
+                p50=_percentile(values, 50),
+                p95=_percentile(values, 95),
+                max=values[-1] if values else None,
+                error_rate=errors.get(tool, 0) / count if count else 0.0,
+                unanswered=unanswered.get(tool, 0),
+            )
+        )
+    stats.sort(key=lambda s: (-s.total, -s.count, s.tool))
+    return stats
+
+
+def _scan_job(job: Tuple[str, Optional[dict]]) -> Tuple[str, Optional[dict]]:
+    """Scan one file in a worker process
+
+    Args:
+        job: Path and its previous scan state
+
+    Returns:
+        Path and its new scan state, or None if it could not be read
+    """
+    path, state = job
+    try:
+        return path, scan_tool_calls(Path(path), state)
+    except (IOError, OSError):
+        return path, None
+
+
+class ToolLatencyCache:
+    """Scan states of session files, saved so reruns only read appended bytes"""
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        """Create a cache, loading the saved states
+
+        Args:
+            cache_path: JSON file for the saved states. Defaults to the cache dir.
+        """
+        self.cache_path = Path(cache_path or get_cache_dir() / "tool_latency.json")
+        self.states: Dict[str, dict] = {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.states = dict(data.get("files") or {})
+
+    def save(self) -> None:
+        """Save the states atomically"""
+        data = {"version": CACHE_VERSION, "files": self.states}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f".{self.cache_path.name}.{os.getpid()}.tmp"
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except (IOError, OSError):
+            pass
+
+    def _is_current(self, path: str) -> bool:
+        """Check whether a file has nothing new since its cached scan
+
+        Args:
+            path: Session file path
+
+        Returns:
+            True if the cached state covers the whole file
+        """
+        state = self.states.get(path)
+        if state is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return state["inode"] == stat.st_ino and state["size"] == stat.st_size
+
+    def analyze(
+        self, jsonl_paths: Iterable[Path], workers: Optional[int] = None
+    ) -> List[ToolStats]:
+        """Bring the states of several sessions up to date and summarize them
+
+        Files with new bytes are scanned in a process pool when there are
+        several of them; unchanged files cost a single stat.
+
+        Args:
+            jsonl_paths: Session files to include
+            workers: Worker processes. If None, uses the number of CPUs; 1
+                scans in this process.
+
+        Returns:
+            Statistics per tool across the sessions
+        """
+        paths = [str(path) for path in jsonl_paths]
+        jobs = [(path, self.states.get(path)) for path in paths]
+        jobs = [job for job in jobs if not self._is_current(job[0])]
+
+        if len(jobs) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_scan_job, jobs, chunksize=4))
+        else:
+            results = [_scan_job(job) for job in jobs]
+
+        for path, state in results:
+            if state is None:
+                self.states.pop(path, None)
+            else:
+                self.states[path] = state
+        if results:
+            self.save()
+        return summarize(self.states[path] for path in paths if path in self.states)
@@ -0,0 +1,403 @@
+# ABOUTME: Historical per-project report of prompts, completed todos and active time
+# ABOUTME: Scans session files in a process pool and caches each file's aggregate
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.compressed import SESSION_PATTERNS, compression_of, open_session
+from src.jsonl_parser import JSONLParser
+from src.paths import get_cache_dir, get_projects_dir
+from src.session_archive import ACTIVE_SLOT, SessionArchive, SessionSummary
+from src.todos import TodoStatus
+
+# Bump when the cached aggregate layout changes; older caches are then ignored
+CACHE_VERSION = 1
+
+# Only lines containing one of these can hold a prompt or a todo list
+_NEEDLES = (b'"user"', b'odos"')
+
+
+class DayStats(NamedTuple):
+    """Activity of one project on one local calendar day"""
+
+    day: str  # YYYY-MM-DD
+    sessions: int  # sessions with at least one active slot that day
+    prompts: int  # main-chain user prompts
+    todos_completed: int  # main-chain todos that became completed
+    active_hours: float  # active slots across all sessions, overlaps counted once
+
+
+def new_aggregate(stat: Optional[os.stat_result] = None) -> dict:
+    """Create the aggregate of a file that has not been read yet
+
+    Args:
+        stat: Stat of the file being scanned
+
+    Returns:
+        JSON-serializable aggregate
+    """
+    return {
+        "inode": stat.st_ino if stat else 0,
+        "size": stat.st_size if stat else 0,
+        "mtime_ns": stat.st_mtime_ns if stat else 0,
+        "offset": 0,
+        "prompts": {},  # slot -> main-chain prompts
+        "completed": {},  # slot -> todos that became completed
+        "active": [],  # sorted slots holding any timestamped entry
+        "statuses": {},  # todo id or content -> last main-chain status
+    }
+
+
+def scan_session_activity(jsonl_path: Path, aggregate: Optional[dict] = None) -> dict:
+    """Aggregate the activity of a session file, continuing a previous scan
+
+    Prompts and todos follow the extraction rules of JSONLParser. A plain
+    file that has only grown is read from the previous offset; a replaced,
+    truncated or compressed file is read again from the start.
+
+    Args:
+        jsonl_path: Path to the session file
+        aggregate: Aggregate returned by an earlier scan of the same file
+
+    Returns:
+        The updated aggregate
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    stat = os.stat(jsonl_path)
+    if (
+        aggregate is None
+        or aggregate["inode"] != stat.st_ino
+        or aggregate["offset"] > stat.st_size
+        or compression_of(jsonl_path) is not None
+    ):
+        aggregate = new_aggregate(stat)
+
+    parser = JSONLParser()
+    prompts = aggregate["prompts"]
+    completed = aggregate["completed"]
+    statuses = aggregate["statuses"]
+    active = set(aggregate["active"])
+
+    offset = aggregate["offset"]
+    with open_session(jsonl_path) as f:
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                break  # still being written; read it on the next scan
+            offset += len(raw_line)
+            try:
+                entry = json.loads(raw_line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if not isinstance(entry, dict) or not isinstance(
+                entry.get("timestamp"), str
+            ):
+                continue
+            timestamp = parser._parse_timestamp(entry["timestamp"])
+            if timestamp is None:
+                continue
+            active.add(int(timestamp // ACTIVE_SLOT))
+            slot = str(int(timestamp // ACTIVE_SLOT))  # JSON object keys
+            if entry.get("isSidechain") or not any(
+                needle in raw_line for needle in _NEEDLES
+            ):
+                continue
+
+            if parser.extract_user_prompt(entry) is not None:
+                prompts[slot] = prompts.get(slot, 0) + 1
+                continue
+            todos = parser.extract_todos(entry)
+            for todo in todos or []:
+                if not isinstance(todo, dict):
+                    continue
+                key = str(todo.get("id") or todo.get("content", ""))
+                status = todo.get("status")
+                if (
+                    status == TodoStatus.COMPLETED.value
+                    and statuses.get(key) != TodoStatus.COMPLETED.value
+                ):
+                    completed[slot] = completed.get(slot, 0) + 1
+                statuses[key] = status
+
+    aggregate.update(
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        offset=offset,
+        active=sorted(active),
+    )
+    return aggregate
+
+
+def aggregate_summary(summary: SessionSummary, stat: os.stat_result) -> dict:
+    """Build the aggregate of a compacted session from its summary
+
+    Gives the same result as scanning the file with scan_session_activity,
+    without reparsing its JSON.
+
+    Args:
+        summary: Current summary of the session file
+        stat: Current stat of the session file
+
+    Returns:
+        The aggregate, continuing from the end of the summary
+    """
+    aggregate = new_aggregate(stat)
+    aggregate["offset"] = summary.offset
+    aggregate["active"] = list(summary.active)
+    prompts = aggregate["prompts"]
+    completed = aggregate["completed"]
+    statuses = aggregate["statuses"]
+
+    columns = summary.prompts
+    for timestamp, sidechain in zip(columns["timestamp"], columns["sidechain"]):
+        if timestamp is None or sidechain:
+            continue
+        slot = str(int(timestamp // ACTIVE_SLOT))
+        prompts[slot] = prompts.get(slot, 0) + 1
+
+    columns = summary.todos
+    for timestamp, sidechain, todo_id, content, status in zip(
+        columns["timestamp"],
+        columns["sidechain"],
+        columns["id"],
+        columns["content"],
+        columns["status"],
+    ):
+        if timestamp is None or sidechain:
+            continue
+        key = todo_id or content
+        if (
+            status == TodoStatus.COMPLETED.value
+            and statuses.get(key) != TodoStatus.COMPLETED.value
+        ):
+            slot = str(int(timestamp // ACTIVE_SLOT))
+            completed[slot] = completed.get(slot, 0) + 1
+        statuses[key] = status
+    return aggregate
+
+
+def summarize(
+    aggregates: Dict[str, Iterable[dict]], since: float, until: Optional[float] = None
+) -> Dict[str, List[DayStats]]:
+    """Merge file aggregates into per-project daily statistics
+
+    Args:
+        aggregates: Project name -> aggregates of its session files
+        since: Start of the report period
+        until: End of the report period. If None, uses the current time.
+
+    Returns:
+        Project name -> statistics per local day, oldest first. Projects
+        without activity in the period are left out.
+    """
+    until = time.time() if until is None else until
+    first_slot = int(since // ACTIVE_SLOT)
+    last_slot = int(until // ACTIVE_SLOT)
+
+    def day_of(slot: int) -> str:
+        return time.strftime("%Y-%m-%d", time.localtime(slot * ACTIVE_SLOT))
+
+    report = {}
+    for project, project_aggregates in aggregates.items():
+        sessions: Dict[str, int] = {}
+        prompts: Dict[str, int] = {}
+        completed: Dict[str, int] = {}
+        active = set()
+        for aggregate in project_aggregates:
+            days = set()
+            for slot in aggregate["active"]:
+                if first_slot <= slot <= last_slot:
+                    active.add(slot)
+                    days.add(day_of(slot))
+            for day in days:
+                sessions[day] = sessions.get(day, 0) + 1
+            for totals, counts in (
+                (prompts, aggregate["prompts"]),
+                (completed, aggregate["completed"]),
+            ):
+                for slot, count in counts.items():
+                    if first_slot <= int(slot) <= last_slot:
+                        day = day_of(int(slot))
+                        totals[day] = totals.get(day, 0) + count
+
+        hours: Dict[str, float] = {}
+        for slot in active:
+            day = day_of(slot)
+            hours[day] = hours.get(day, 0.0) + ACTIVE_SLOT / 3600
+        days = sorted(set(sessions) | set(prompts) | set(completed))
+        if days:
+            report[project] = [
+                DayStats(
+                    day,
+                    sessions.get(day, 0),
+                    prompts.get(day, 0),
+                    completed.get(day, 0),
+                    round(hours.get(day, 0.0), 2),
+                )
+                for day in days
+            ]
+    return report
+
+
+def _scan_job(job: Tuple[str, Optional[dict]]) -> Tuple[str, Optional[dict]]:
+    """Scan one file in a worker process
+
+    Args:
+        job: Path and its previous aggregate
+
+    Returns:
+        Path and its new aggregate, or None if it could not be read
+    """
+    path, aggregate = job
+    try:
+        return path, scan_session_activity(Path(path), aggregate)
+    except (IOError, OSError):
+        return path, None
+
+
+class UsageReportCache:
+    """Per-file activity aggregates, saved so reruns only read changed files"""
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = None,
+        projects_dir: Optional[Path] = None,
+        archive: Optional[SessionArchive] = None,
+    ):
+        """Create a cache, loading the saved aggregates
+
+        Args:
+            cache_path: JSON file for the saved aggregates. Defaults to the
+                cache dir.
+            projects_dir: Root of the Claude project folders
+            archive: Summaries of compacted sessions, read instead of the raw
+                files. Defaults to the archive next to the cache.
+        """
+        self.cache_path = Path(cache_path or get_cache_dir() / "usage_report.json")
+        self.projects_dir = Path(projects_dir or get_projects_dir())
+        self.archive = archive or SessionArchive(
+            self.cache_path.parent / "archive", self.projects_dir
+        )
+        self.files: Dict[str, dict] = {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self.files = dict(data.get("files") or {})
+
+    def save(self) -> None:
+        """Save the aggregates atomically"""
+        data = {"version": CACHE_VERSION, "files": self.files}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(
+                f".{self.cache_path.name}.{os.getpid()}.tmp"
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except (IOError, OSError):
+            pass
+
+    def session_files(self, since: float) -> List[Tuple[str, os.stat_result]]:
+        """Find session files that may hold activity after a point in time
+
+        Args:
+            since: Start of the report period
+
+        Returns:
+            Paths and stats of files modified since then
+        """
+        found = []
+        for pattern in SESSION_PATTERNS:
+            for path in self.projects_dir.glob(f"*/{pattern}"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if stat.st_mtime >= since:
+                    found.append((str(path), stat))
+        found.sort()
+        return found
+
+    def _is_current(self, path: str, stat: os.stat_result) -> bool:
+        """Check whether a file is unchanged since its cached aggregate
+
+        Args:
+            path: Session file path
+            stat: Current stat of the file
+
+        Returns:
+            True if the cached aggregate covers the file as it is
+        """
+        aggregate = self.files.get(path)
+        return aggregate is not None and (
+            aggregate["inode"],
+            aggregate["size"],
+            aggregate["mtime_ns"],
+        ) == (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def report(
+        self,
+        since: float,
+        until: Optional[float] = None,
+        workers: Optional[int] = None,
+    ) -> Dict[str, List[DayStats]]:
+        """Bring the aggregates up to date and build the report
+
+        Changed files are scanned in a process pool when there are several of
+        them, except compacted sessions, which are read from their summary.
+        Unchanged files cost a single stat, and files not modified during the
+        period are not even looked up.
+
+        Args:
+            since: Start of the report period
+            until: End of the report period. If None, uses the current time.
+            workers: Worker processes. If None, uses the number of CPUs; 1
+                scans in this process.
+
+        Returns:
+            Project folder name -> statistics per local day
+        """
+        files = self.session_files(since)
+        jobs = []
+        summarized = False
+        for path, stat in files:
+            if self._is_current(path, stat):
+                continue
+            summary = self.archive.load(Path(path), stat)
+            if summary is not None:
+                self.files[path] = aggregate_summary(summary, stat)
+                summarized = True
+            else:
+                jobs.append((path, self.files.get(path)))
+
+        if len(jobs) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_scan_job, jobs, chunksize=4))
+        else:
+            results = [_scan_job(job) for job in jobs]
+
+        for path, aggregate in results:
+            if aggregate is None:
+                self.files.pop(path, None)
+            else:
+                self.files[path] = aggregate
+        if results or summarized:
+            self.save()
+
+        by_project: Dict[str, List[dict]] = {}
+        for path, _ in files:
+            if path in self.files:
+                by_project.setdefault(Path(path).parent.name, []).append(
+                    self.files[path]
+                )
+        return summarize(by_project, since, until)
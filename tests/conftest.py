@@ -0,0 +1,26 @@
+# ABOUTME: Shared pytest configuration for the Claude status test suite
+# ABOUTME: Isolates caches and ~/.claude; skips the performance tier unless requested
+
+import os
+
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked ``performance`` unless explicitly requested"""
+    if os.environ.get("CLAUDE_STATUS_PERF"):
+        return
+    skip = pytest.mark.skip(reason="set CLAUDE_STATUS_PERF=1 to run performance tests")
+    for item in items:
+        if "performance" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """Keep caches and ~/.claude of the user out of reach of every test"""
+    home = tmp_path / "home"
+    home.mkdir()
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(home / ".cache"))
+    return home
@@ -0,0 +1,187 @@
+# ABOUTME: Test suite for agent activity detection from the tail of a session file
+# ABOUTME: Tests working, waiting and idle classification and the bounded tail read
+
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from src.activity import (
+    IDLE,
+    TAIL_BYTES,
+    UNKNOWN,
+    WAITING,
+    WORKING,
+    Activity,
+    classify,
+    get_activity,
+)
+
+# 2025-06-29T14:00:00Z
+BASE = 1751205600.0
+
+
+def _timestamp(seconds: int) -> str:
+    return f"2025-06-29T14:{seconds // 60:02d}:{seconds % 60:02d}.000Z"
+
+
+def _prompt(text: str, at: int = 0) -> dict:
+    return {
+        "type": "user",
+        "message": {"role": "user", "content": text},
+        "timestamp": _timestamp(at),
+    }
+
+
+def _assistant(content: list, at: int = 0, sidechain: bool = False) -> dict:
+    return {
+        "type": "assistant",
+        "isSidechain": sidechain,
+        "message": {"role": "assistant", "content": content},
+        "timestamp": _timestamp(at),
+    }
+
+
+def _tool_use(tool_id: str, name: str) -> dict:
+    return {"type": "tool_use", "id": tool_id, "name": name, "input": {}}
+
+
+def _tool_result(tool_id: str, at: int = 0) -> dict:
+    return {
+        "type": "user",
+        "message": {
+            "role": "user",
+            "content": [{"type": "tool_result", "tool_use_id": tool_id}],
+        },
+        "timestamp": _timestamp(at),
+    }
+
+
+class TestClassify:
+    def test_new_prompt_is_working(self):
+        """Test that a prompt without an answer yet means the agent is working"""
+        activity = classify([_prompt("Fix the bug", at=10)], now=BASE + 20)
+
+        assert activity == Activity(WORKING, BASE + 10)
+
+    def test_unanswered_tool_use_is_waiting(self):
+        """Test that a tool use without a result means waiting on that tool"""
+        entries = [
+            _prompt("Run the tests"),
+            _assistant([{"type": "text", "text": "Running"}, _tool_use("t1", "Bash")]),
+        ]
+
+        activity = classify(entries, now=BASE + 30)
+
+        assert activity.state == WAITING
+        assert activity.tool_name == "Bash"
+        assert activity.describe() == "waiting on Bash"
+
+    def test_partially_answered_parallel_tools(self):
+        """Test that one outstanding call among parallel calls is still waiting"""
+        entries = [
+            _prompt("Look around"),
+            _assistant([_tool_use("t1", "Read")]),
+            _assistant([_tool_use("t2", "Grep")]),
+            _tool_result("t1"),
+        ]
+
+        assert classify(entries, now=BASE).tool_name == "Grep"
+
+    def test_delivered_tool_results_are_working(self):
+        """Test that answered tool calls mean the next turn is being generated"""
+        entries = [
+            _prompt("Look around"),
+            _assistant([_tool_use("t1", "Read")]),
+            _tool_result("t1", at=5),
+        ]
+
+        assert classify(entries, now=BASE + 10) == Activity(WORKING, BASE + 5)
+
+    def test_final_answer_is_idle_with_minutes(self):
+        """Test that a text-only assistant reply means the agent is idle"""
+        entries = [
+            _prompt("Explain"),
+            _assistant([{"type": "text", "text": "Done."}], at=60),
+        ]
+
+        activity = classify(entries, now=BASE + 60 + 12 * 60)
+
+        assert activity.state == IDLE
+        assert activity.describe(now=BASE + 60 + 12 * 60) == "idle for 12 minutes"
+
+    def test_interrupted_request_is_idle(self):
+        """Test that an interrupted request is reported as idle"""
+        entries = [
+            _prompt("Do it"),
+            _prompt("[Request interrupted by user]", at=3),
+        ]
+
+        assert classify(entries, now=BASE + 5).state == IDLE
+
+    def test_stale_waiting_becomes_idle(self):
+        """Test that a session silent for a long time is no longer busy"""
+        entries = [_prompt("Run"), _assistant([_tool_use("t1", "Bash")])]
+
+        assert classify(entries, now=BASE + 3 * 3600).state == IDLE
+
+    def test_sidechain_entries_are_ignored(self):
+        """Test that subagent chatter does not hide the outstanding Task call"""
+        entries = [
+            _prompt("Delegate"),
+            _assistant([_tool_use("t1", "Task")]),
+            _assistant([{"type": "text", "text": "sub done"}], sidechain=True),
+        ]
+
+        assert classify(entries, now=BASE).tool_name == "Task"
+
+    def test_no_messages_is_unknown(self):
+        """Test that entries without messages give no classification"""
+        assert classify([{"type": "summary", "summary": "x"}]).state == UNKNOWN
+
+
+class TestGetActivity:
+    def test_reads_only_the_tail(self):
+        """Test that a long session is classified from its last bytes"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            with open(path, "w") as f:
+                for i in range(2000):
+                    f.write(json.dumps(_prompt(f"Prompt {i}")) + "\n")
+                f.write(json.dumps(_assistant([_tool_use("t1", "Edit")])) + "\n")
+
+            reads = []
+            real_open = open
+
+            def recording_open(*args, **kwargs):
+                handle = real_open(*args, **kwargs)
+                real_read = handle.read
+
+                def read(*read_args):
+                    data = real_read(*read_args)
+                    reads.append(len(data))
+                    return data
+
+                handle.read = read
+                return handle
+
+            with patch("builtins.open", side_effect=recording_open):
+                activity = get_activity(path, now=BASE)
+
+            assert activity.tool_name == "Edit"
+            assert sum(reads) <= TAIL_BYTES
+
+    def test_grows_window_past_huge_line(self):
+        """Test that a final line longer than the window is still found"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            with open(path, "w") as f:
+                f.write(json.dumps(_prompt("Paste")) + "\n")
+                answer = {"type": "text", "text": "x" * (TAIL_BYTES * 3)}
+                f.write(json.dumps(_assistant([answer])) + "\n")
+
+            assert get_activity(path, now=BASE).state == IDLE
+
+    def test_missing_file_is_unknown(self):
+        """Test that a missing file gives no classification"""
+        assert get_activity("/nonexistent/session.jsonl").state == UNKNOWN
@@ -1,10 +1,29 @@
 # ABOUTME: Test file for the main claude_status.py script functionality
 # ABOUTME: Tests CLI argument parsing, JSONL file detection, and update mode behavior
 
+import json
+import os
+import tempfile
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from claude_status import get_default_jsonl_path, main
+import pytest
+
+from claude_status import (
+    get_default_jsonl_path,
+    get_session_paths,
+    main,
+    render_sessions,
+    render_status,
+    render_status_json,
+    write_status_files,
+)
+from src.activity import Activity
+from src.project_index import ProjectIndex
+from src.sections import FunctionSection, SectionValue
+from src.status_collector import ProjectStatus
+from src.status_file import StatusFileWriter
 
 
 class TestClaudeStatus:
@@ -70,47 +89,110 @@ class TestClaudeStatus:
             # Verify the folder name was constructed correctly
             mock_projects_dir.__truediv__.assert_called_with(expected_folder)
 
+    def test_get_default_jsonl_path_from_subdirectory(self):
+        """Test that a project index resolves a subdirectory to its project"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / ".claude" / "projects"
+            folder = projects_dir / "-work-my-app"
+            folder.mkdir(parents=True)
+            session = folder / "session.jsonl"
+            session.write_text(json.dumps({"cwd": "/work/my-app"}) + "\n")
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+
+            with patch("claude_status.Path.home", return_value=Path(tmp)):
+                assert get_default_jsonl_path("/work/my-app/src", index) == session
+                assert get_default_jsonl_path("/work/my-app/src") is None
+
+    def test_get_session_paths_within_window(self):
+        """Test that only sessions modified within the window are returned"""
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp) / ".claude" / "projects" / "-work-app"
+            folder.mkdir(parents=True)
+            now = time.time()
+            ages = {"old": 3 * 3600, "recent": 600, "newest": 5}
+            for name, age in ages.items():
+                path = folder / f"{name}.jsonl"
+                path.write_text("{}\n")
+                os.utime(path, (now - age, now - age))
+
+            with patch("claude_status.Path.home", return_value=Path(tmp)):
+                recent = get_session_paths("/work/app", within=3600)
+                everything = get_session_paths("/work/app")
+
+            assert [p.stem for p in recent] == ["newest", "recent"]
+            assert [p.stem for p in everything] == ["newest", "recent", "old"]
+
+    def test_get_session_paths_includes_compressed_sessions(self):
+        """Test that gzip and zstd archived sessions are discovered"""
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = Path(tmp) / ".claude" / "projects" / "-work-app"
+            folder.mkdir(parents=True)
+            now = time.time()
+            names = ["live.jsonl", "old.jsonl.gz", "older.jsonl.zst", "notes.txt"]
+            for age, name in enumerate(names):
+                path = folder / name
+                path.write_bytes(b"")
+                os.utime(path, (now - age, now - age))
+
+            with patch("claude_status.Path.home", return_value=Path(tmp)):
+                paths = get_session_paths("/work/app")
+
+            assert [p.name for p in paths] == names[:3]
+
     def test_file_freshness_check_in_update_mode(self):
-        """Test that update mode checks for newer JSONL files"""
-        with (
-            patch("claude_status.get_default_jsonl_path") as mock_get_path,
-            patch("claude_status.display_status") as mock_display,
-            patch("claude_status.time.sleep") as mock_sleep,
-            patch("claude_status.os.system"),
-        ):
-            # Mock initial path
-            initial_path = Path("/path/to/initial.jsonl")
-            newer_path = Path("/path/to/newer.jsonl")
+        """Test that update mode switches to a session created in the folder"""
+        with tempfile.TemporaryDirectory() as tmp:
+            initial_path = Path(tmp) / "initial.jsonl"
+            newer_path = Path(tmp) / "newer.jsonl"
+            initial_path.write_text("{}\n")
+            real_sleep = time.sleep
 
-            # Simulate path change after first iteration
-            mock_get_path.side_effect = [initial_path, newer_path, newer_path]
+            with (
+                patch("claude_status.get_default_jsonl_path") as mock_get_path,
+                patch("claude_status.display_status") as mock_display,
+                patch("claude_status.time.sleep") as mock_sleep,
+                patch("claude_status.os.system"),
+            ):
+                mock_get_path.side_effect = [initial_path, newer_path]
 
-            # Mock sleep to only allow a few iterations before KeyboardInterrupt
-            mock_sleep.side_effect = [None, KeyboardInterrupt()]
+                def sleep(seconds):
+                    # A new session appears, then stop after the next display
+                    if mock_display.call_count >= 2:
+                        raise KeyboardInterrupt()
+                    newer_path.write_text("{}\n")
+                    real_sleep(seconds)
 
-            # Test update mode without explicit file (should use auto-detection)
-            with patch("claude_status.argparse.ArgumentParser.parse_args") as mock_args:
-                mock_args.return_value = MagicMock(
-                    file=None,  # No explicit file - should use auto-detection
-                    two_line=False,
-                    update=5,
-                )
+                mock_sleep.side_effect = sleep
 
-                try:
-                    main()
-                except KeyboardInterrupt:
-                    pass
+                # Test update mode without explicit file (uses auto-detection)
+                with patch(
+                    "claude_status.argparse.ArgumentParser.parse_args"
+                ) as mock_args:
+                    mock_args.return_value = MagicMock(
+                        file=None,  # No explicit file - should use auto-detection
+                        two_line=False,
+                        update=5,
+                        command=None,
+                        budget_ms=None,
+                        write_status_file=None,
+                        serve=None,
+                        all_projects=False,
+                        sessions=None,
+                        record_history=False,
+                        section=None,
+                        json=False,
+                    )
 
-                # Verify get_default_jsonl_path was called multiple times
-                # (checking for newer files)
-                assert mock_get_path.call_count >= 2
+                    try:
+                        main()
+                    except KeyboardInterrupt:
+                        pass
 
-                # Verify display_status was called with the updated path
+                # The folder change triggered a check for a newer session file
+                assert mock_get_path.call_count == 2
                 calls = mock_display.call_args_list
-                assert len(calls) >= 1
-                # First call should use initial path, second call should use newer path
-                if len(calls) >= 2:
-                    assert calls[1][0][0] == newer_path
+                assert calls[0][0][0] == initial_path
+                assert calls[1][0][0] == newer_path
 
     def test_explicit_file_no_freshness_check(self):
         """Test that explicit file path doesn't trigger freshness check"""
@@ -131,6 +213,15 @@ class TestClaudeStatus:
                     file=explicit_file,  # Explicit file provided
                     two_line=False,
                     update=5,
+                    command=None,
+                    budget_ms=None,
+                    write_status_file=None,
+                    serve=None,
+                    all_projects=False,
+                    sessions=None,
+                    record_history=False,
+                    section=None,
+                    json=False,
                 )
 
                 try:
@@ -147,3 +238,311 @@ class TestClaudeStatus:
                 calls = mock_display.call_args_list
                 assert len(calls) >= 1
                 assert str(calls[0][0][0]) == explicit_file
+
+    def test_update_mode_redraws_every_interval(self):
+        """Test that --update waits at most its interval, and at least 1s"""
+        for update, ttl, expected in ((3, None, 3), (120, None, 60), (5, 0, 1.0)):
+            plugins = []
+            if ttl is not None:
+                plugins.append(FunctionSection(lambda project: "ok", "CI", ttl=ttl))
+            with (
+                patch("claude_status.get_default_jsonl_path", return_value=None),
+                patch("claude_status.get_project_folder", return_value=None),
+                patch("claude_status.display_status"),
+                patch("claude_status.os.system"),
+                patch("claude_status.load_entry_point_sections", return_value=plugins),
+                patch("claude_status.SectionRunner.save"),
+                patch("claude_status.AdaptivePoller") as poller,
+                patch(
+                    "claude_status.argparse.ArgumentParser.parse_args",
+                    return_value=MagicMock(
+                        file=None,
+                        two_line=True,
+                        update=update,
+                        command=None,
+                        budget_ms=None,
+                        write_status_file=None,
+                        serve=None,
+                        all_projects=False,
+                        sessions=None,
+                        record_history=False,
+                        section=None,
+                        json=False,
+                    ),
+                ),
+            ):
+                poller.return_value.wait.side_effect = KeyboardInterrupt()
+                main()
+
+            poller.return_value.wait.assert_called_once_with(expected)
+
+    def test_idle_update_mode_redraws_less_often(self):
+        """Test that --update backs off while idle and not after a change"""
+        with (
+            patch("claude_status.get_default_jsonl_path", return_value=None),
+            patch("claude_status.get_project_folder", return_value=None),
+            patch("claude_status.display_status") as display,
+            patch("claude_status.os.system"),
+            patch("claude_status.load_entry_point_sections", return_value=[]),
+            patch("claude_status.AdaptivePoller") as poller,
+            patch(
+                "claude_status.argparse.ArgumentParser.parse_args",
+                return_value=MagicMock(
+                    file=None,
+                    two_line=True,
+                    update=5,
+                    command=None,
+                    budget_ms=None,
+                    write_status_file=None,
+                    serve=None,
+                    all_projects=False,
+                    sessions=None,
+                    record_history=False,
+                    section=None,
+                    json=False,
+                ),
+            ),
+        ):
+            idle = [[]] * 6
+            poller.return_value.wait.side_effect = idle + [
+                [Path("session.jsonl")],
+                [],
+                KeyboardInterrupt(),
+            ]
+            main()
+
+        waits = [c.args[0] for c in poller.return_value.wait.call_args_list]
+        assert waits == [5, 10, 20, 40, 60, 60, 60, 5, 10]
+        assert display.call_count == 9
+
+    def test_tools_all_sessions_includes_compressed_transcripts(self):
+        """Test that tools --all-sessions also analyzes .jsonl.gz and .jsonl.zst"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            folder = projects_dir / "-work-a"
+            folder.mkdir(parents=True)
+            for name in ("a.jsonl", "b.jsonl.gz", "c.jsonl.zst", "notes.txt"):
+                (folder / name).touch()
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+
+            with (
+                patch("claude_status.ProjectIndex", return_value=index),
+                patch("claude_status.run_tools") as run_tools,
+                patch(
+                    "claude_status.argparse.ArgumentParser.parse_args",
+                    return_value=MagicMock(
+                        command="tools", all_sessions=True, workers=1
+                    ),
+                ),
+            ):
+                main()
+
+            analyzed = run_tools.call_args[0][0]
+            assert [path.name for path in analyzed] == [
+                "a.jsonl",
+                "b.jsonl.gz",
+                "c.jsonl.zst",
+            ]
+
+    def test_render_status_two_line(self):
+        """Test rendering a collected status in two-line format"""
+        status = ProjectStatus(
+            prompt="Fix the\nlogin bug",
+            prompt_timestamp=1000.0,
+            todos=[{"content": "Write test", "status": "in_progress"}],
+            todos_timestamp=1001.0,
+            is_git_repository=True,
+            commit_message="Add login form",
+            commit_timestamp=900.0,
+        )
+
+        rendered = render_status(status, two_line=True, terminal_width=80)
+
+        assert rendered.split("\n") == [
+            "Fix the login bug",
+            "[ ] Write test --- Add login form",
+        ]
+
+    def test_render_status_without_session_or_repository(self):
+        """Test rendering placeholders when nothing is known"""
+        rendered = render_status(ProjectStatus(), two_line=True, terminal_width=80)
+
+        assert rendered.split("\n") == ["No user prompt found", "No git repository"]
+
+    def test_render_status_marks_truncated_prompt(self):
+        """Test that a prompt preview says how much of the prompt is hidden"""
+        status = ProjectStatus(prompt="abc", prompt_length=10)
+
+        rendered = render_status(status, two_line=False, terminal_width=80)
+
+        assert "abc... [7 more characters]" in rendered
+
+    def test_render_status_shows_agent_activity(self):
+        """Test that the multi-line and JSON output report agent activity"""
+        status = ProjectStatus(
+            prompt="Run tests", activity=Activity("waiting", 1000.0, "Bash")
+        )
+
+        rendered = render_status(status, two_line=False, terminal_width=80)
+        document = json.loads(render_status_json(status))
+
+        assert "Agent\033[0m: waiting on Bash" in rendered
+        assert document["activity"] == {
+            "state": "waiting",
+            "since": 1000.0,
+            "tool": "Bash",
+        }
+
+    def test_render_status_shows_plugin_sections(self):
+        """Test that section values, pending sections and errors are shown"""
+        status = ProjectStatus(
+            sections=[
+                SectionValue("CI", "passing", None, 1000.0),
+                SectionValue("Tests", None, None, None),
+                SectionValue("Deploy", None, "TimeoutError: slow", 1000.0),
+            ]
+        )
+
+        rendered = render_status(status, two_line=False, terminal_width=80)
+        document = json.loads(render_status_json(status))
+
+        assert "CI\033[0m: passing" in rendered
+        assert "Tests\033[0m: Checking..." in rendered
+        assert "Deploy\033[0m: error: TimeoutError: slow" in rendered
+        assert document["sections"]["CI"] == {
+            "value": "passing",
+            "error": None,
+            "fetched_at": 1000.0,
+        }
+
+    def test_render_sessions_labels_each_session(self):
+        """Test that each session gets a labelled block and git is shown once"""
+        statuses = [
+            ProjectStatus(
+                jsonl_path=Path(f"/s/{n}.jsonl"),
+                session_id=f"{n}abcdef0123",
+                last_activity=time.time() - 120,
+                prompt=f"Prompt {n}",
+                is_git_repository=True,
+                commit_message="Add login form",
+            )
+            for n in (1, 2)
+        ]
+
+        rendered = render_sessions(statuses, two_line=False, terminal_width=80)
+        compact = render_sessions(statuses, two_line=True, terminal_width=80)
+
+        assert "Session 1abcdef0 (2 minutes ago)" in rendered
+        assert "Session 2abcdef0 (2 minutes ago)" in rendered
+        assert rendered.count("Add login form") == 1
+        assert rendered.index("Prompt 2") < rendered.index("Add login form")
+        assert compact.split("\n") == [
+            "[1abcdef0] Prompt 1",
+            "           Add login form",
+            "[2abcdef0] Prompt 2",
+            "           Add login form",
+        ]
+
+    def test_render_status_json(self):
+        """Test that JSON output holds absolute timestamps and todo counts"""
+        status = ProjectStatus(
+            project_path="/repo",
+            prompt="Fix bug",
+            prompt_timestamp=1000.0,
+            todos=[
+                {"content": "Write test", "status": "completed"},
+                {"content": "Fix code", "status": "in_progress"},
+            ],
+            todos_timestamp=1001.0,
+        )
+
+        document = json.loads(render_status_json(status))
+
+        assert document["prompt"] == "Fix bug"
+        assert document["todos"]["current"] == "Fix code"
+        assert document["todos"]["counts"] == {"completed": 1, "in_progress": 1}
+        assert document["commit"] is None
+
+    def test_write_status_files_for_several_projects(self):
+        """Test that one pass writes one status file per project"""
+        statuses = {
+            "/work/a": ProjectStatus(project_path="/work/a", prompt="Prompt A"),
+            "/work/b": ProjectStatus(project_path="/work/b", prompt="Prompt B"),
+        }
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("claude_status.get_default_jsonl_path", return_value=None),
+            patch(
+                "claude_status.collect_status",
+                side_effect=lambda project, *args, **kwargs: statuses[project],
+            ),
+        ):
+            template = str(Path(tmp) / "{project}.status")
+            writer = StatusFileWriter()
+
+            written = write_status_files(
+                ["/work/a", "/work/b"], template, writer, two_line=True
+            )
+            assert written == 2
+            assert (Path(tmp) / "-work-a.status").read_text().startswith("Prompt A")
+            assert (Path(tmp) / "-work-b.status").read_text().startswith("Prompt B")
+
+            # Nothing changed, so nothing is rewritten
+            assert (
+                write_status_files(
+                    ["/work/a", "/work/b"], template, writer, two_line=True
+                )
+                == 0
+            )
+
+    def test_write_status_files_skips_unwritable_projects(self, capsys):
+        """Test that a failed write is reported and the other projects written"""
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("claude_status.get_default_jsonl_path", return_value=None),
+            patch(
+                "claude_status.collect_status",
+                side_effect=lambda project, *args, **kwargs: ProjectStatus(
+                    project_path=project
+                ),
+            ),
+        ):
+            # A file where the first project's directory should be
+            (Path(tmp) / "-work-a").touch()
+            template = str(Path(tmp) / "{project}" / "status")
+
+            written = write_status_files(
+                ["/work/a", "/work/b"], template, StatusFileWriter(), two_line=True
+            )
+
+            assert written == 1
+            assert (Path(tmp) / "-work-b" / "status").exists()
+        assert "Could not write" in capsys.readouterr().err
+
+    def test_write_status_files_share_one_git_budget(self):
+        """Test that all projects of a pass draw from a single git budget"""
+        budgets = []
+        clock = iter([100.0, 100.3, 100.9, 101.5])
+
+        def collect(project, *args, **kwargs):
+            budgets.append(kwargs["git_budget"])
+            return ProjectStatus(project_path=project)
+
+        git_cache = MagicMock()
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("claude_status.get_default_jsonl_path", return_value=None),
+            patch("claude_status.collect_status", side_effect=collect),
+            patch("claude_status.time.monotonic", side_effect=lambda: next(clock)),
+        ):
+            write_status_files(
+                ["/work/a", "/work/b", "/work/c"],
+                str(Path(tmp) / "{project}.status"),
+                StatusFileWriter(),
+                git_cache=git_cache,
+                git_budget=1.0,
+            )
+
+        # Every project's git refresh starts before the first one is awaited
+        git_cache.start.assert_called_once_with(["/work/a", "/work/b", "/work/c"])
+        assert budgets == pytest.approx([0.7, 0.1, 0.0])
@@ -0,0 +1,244 @@
+# ABOUTME: Test suite for the cached commit timeline and its join with todo progress
+# ABOUTME: Tests incremental history walks, rewrites and todo work periods
+
+import json
+import os
+import shutil
+import subprocess  # nosec B404
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.commit_timeline import (
+    Commit,
+    CommitTimeline,
+    correlate,
+    read_todo_events,
+    todo_work_periods,
+)
+from src.session_archive import SessionArchive
+from src.todos import Todo, TodoStatus
+
+needs_git = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def _git(repo: str, *args: str, when: int = 1751200000) -> str:
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="Test",
+        GIT_AUTHOR_EMAIL="test@example.com",
+        GIT_COMMITTER_NAME="Test",
+        GIT_COMMITTER_EMAIL="test@example.com",
+        GIT_AUTHOR_DATE=f"@{when} +0000",
+        GIT_COMMITTER_DATE=f"@{when} +0000",
+    )
+    return subprocess.run(  # nosec B603 B607
+        ["git", *args], cwd=repo, env=env, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def _commit(repo: str, subject: str, when: int) -> None:
+    _git(repo, "commit", "-q", "--allow-empty", "-m", subject, when=when)
+
+
+def _todos(*pairs) -> list:
+    return [Todo(content, TodoStatus(status)) for content, status in pairs]
+
+
+@needs_git
+class TestCommitTimeline:
+    def test_refresh_walks_only_new_commits(self):
+        """Test that a second refresh streams just the commits since the head"""
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = os.path.join(tmp, "repo")
+            os.mkdir(repo)
+            _git(repo, "init", "-q")
+            _commit(repo, "First", 1000)
+            _commit(repo, "Second", 2000)
+            cache_dir = Path(tmp) / "cache"
+
+            timeline = CommitTimeline(repo, cache_dir)
+            assert timeline.refresh() is True
+            assert [c.subject for c in timeline.commits] == ["Second", "First"]
+            old_head = timeline.head
+
+            _commit(repo, "Third", 3000)
+            reloaded = CommitTimeline(repo, cache_dir)
+            with patch.object(
+                CommitTimeline, "_stream_log", wraps=reloaded._stream_log
+            ) as stream:
+                assert reloaded.refresh() is True
+            stream.assert_called_once_with([reloaded.head, f"^{old_head}"])
+            assert [c.subject for c in reloaded.commits] == [
+                "Third",
+                "Second",
+                "First",
+            ]
+
+            with patch.object(CommitTimeline, "_stream_log") as stream:
+                assert reloaded.refresh() is False
+                stream.assert_not_called()
+
+    def test_rewritten_history_is_rebuilt(self):
+        """Test that a reset to another line of history drops stale commits"""
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = os.path.join(tmp, "repo")
+            os.mkdir(repo)
+            _git(repo, "init", "-q")
+            _commit(repo, "First", 1000)
+            _commit(repo, "Doomed", 2000)
+            timeline = CommitTimeline(repo, Path(tmp) / "cache")
+            timeline.refresh()
+
+            _git(repo, "reset", "-q", "--hard", "HEAD~1")
+            _commit(repo, "Replacement", 3000)
+            timeline.refresh()
+
+            assert [c.subject for c in timeline.commits] == ["Replacement", "First"]
+
+    def test_between_is_inclusive(self):
+        """Test looking up commits by time"""
+        with tempfile.TemporaryDirectory() as tmp:
+            timeline = CommitTimeline(tmp, Path(tmp) / "cache")
+            timeline.commits = [
+                Commit("c", 300.0, "C"),
+                Commit("b", 200.0, "B"),
+                Commit("a", 100.0, "A"),
+            ]
+
+            assert [c.sha for c in timeline.between(100, 200)] == ["a", "b"]
+            assert [c.sha for c in timeline.between(150)] == ["b", "c"]
+
+            # The sorted commits and their bisect keys are built only once
+            keys = timeline._timestamps
+            assert keys == [100.0, 200.0, 300.0]
+            with patch("src.commit_timeline.sorted", create=True) as resort:
+                assert [c.sha for c in timeline.between(250, 300)] == ["c"]
+                resort.assert_not_called()
+            assert timeline._timestamps is keys
+
+
+class TestTodoWorkPeriods:
+    def test_periods_follow_status_transitions(self):
+        """Test in-progress periods, direct completions and open work"""
+        events = [
+            (100.0, _todos(("Write test", "in_progress"), ("Fix bug", "pending"))),
+            (200.0, _todos(("Write test", "completed"), ("Fix bug", "pending"))),
+            (300.0, _todos(("Write test", "completed"), ("Fix bug", "completed"))),
+            (400.0, _todos(("Write docs", "in_progress"))),
+        ]
+
+        periods = todo_work_periods(events)
+
+        assert [(p.content, p.started, p.finished, p.status) for p in periods] == [
+            ("Write test", 100.0, 200.0, TodoStatus.COMPLETED),
+            ("Fix bug", 200.0, 300.0, TodoStatus.COMPLETED),
+            ("Write docs", 400.0, None, TodoStatus.IN_PROGRESS),
+        ]
+
+    def test_correlate_attaches_commits_by_time(self):
+        """Test that each period lists the commits made during it"""
+        with tempfile.TemporaryDirectory() as tmp:
+            timeline = CommitTimeline(tmp, Path(tmp) / "cache")
+            timeline.commits = [Commit("b", 250.0, "Docs"), Commit("a", 150.0, "Test")]
+            events = [
+                (100.0, [Todo("Write test", TodoStatus.IN_PROGRESS)]),
+                (200.0, [Todo("Write test", TodoStatus.COMPLETED)]),
+            ]
+
+            periods = correlate(timeline, todo_work_periods(events))
+
+            assert [c.subject for c in periods[0].commits] == ["Test"]
+
+    def _compacted_session(self, tmp: str, writes: list) -> tuple:
+        """Write a finished session of TodoWrite calls and compact it"""
+        session = Path(tmp) / "projects" / "-work-app" / "s.jsonl"
+        session.parent.mkdir(parents=True)
+        with open(session, "w") as f:
+            for n, todos in enumerate(writes):
+                f.write(
+                    json.dumps(
+                        {
+                            "type": "assistant",
+                            "timestamp": f"2025-06-29T14:0{n}:00.000Z",
+                            "message": {
+                                "role": "assistant",
+                                "content": [
+                                    {
+                                        "type": "tool_use",
+                                        "name": "TodoWrite",
+                                        "input": {"todos": todos},
+                                    }
+                                ],
+                            },
+                        }
+                    )
+                    + "\n"
+                )
+        os.utime(session, (0, 0))
+        archive = SessionArchive(Path(tmp) / "archive", Path(tmp) / "projects")
+        raw = read_todo_events(session, archive)
+        archive.compact(finished_after=60)
+
+        with patch("src.commit_timeline.open", side_effect=AssertionError):
+            summarized = read_todo_events(session, archive)
+        return raw, summarized
+
+    def test_events_from_summary_match_raw_scan(self):
+        """Test that a compacted summary yields the same todo events"""
+        with tempfile.TemporaryDirectory() as tmp:
+            raw, summarized = self._compacted_session(
+                tmp,
+                [
+                    [{"id": "1", "content": "Ship it", "status": status}]
+                    for status in ["in_progress", "completed"]
+                ],
+            )
+
+            def flatten(events):
+                return [
+                    (t, [(x.id, x.content, x.status) for x in todos])
+                    for t, todos in events
+                ]
+
+            assert flatten(summarized) == flatten(raw)
+            assert len(raw) == 2
+
+    def test_periods_from_summary_keep_todo_ids(self):
+        """Test that a todo reworded mid-task stays one period after compaction"""
+        with tempfile.TemporaryDirectory() as tmp:
+            raw, summarized = self._compacted_session(
+                tmp,
+                [
+                    [
+                        {"id": "1", "content": "Fix login", "status": "in_progress"},
+                        {"content": "Write docs", "status": "pending"},
+                    ],
+                    [
+                        {
+                            "id": "1",
+                            "content": "Fix OAuth login",
+                            "status": "completed",
+                        },
+                        {"content": "Write docs", "status": "in_progress"},
+                    ],
+                    [
+                        {
+                            "id": "1",
+                            "content": "Fix OAuth login",
+                            "status": "completed",
+                        },
+                        {"content": "Write docs", "status": "completed"},
+                    ],
+                ],
+            )
+
+            periods = todo_work_periods(summarized)
+
+            assert periods == todo_work_periods(raw)
+            assert [(p.content, p.status) for p in periods] == [
+                ("Fix login", TodoStatus.COMPLETED),
+                ("Write docs", TodoStatus.COMPLETED),
+            ]
@@ -0,0 +1,207 @@
+# ABOUTME: Test suite for reading gzip and zstd compressed session transcripts
+# ABOUTME: Tests framed writing, seeking, the frame index and tail-first prompt lookup
+
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src import compressed
+from src.activity import WAITING, get_activity
+from src.compressed import (
+    GZIP,
+    ZSTD,
+    compression_of,
+    iter_lines_reversed,
+    load_frame_index,
+    open_session,
+    read_tail,
+    save_frame_index,
+    session_stem,
+    write_framed,
+)
+from src.jsonl_parser import JSONLParser
+
+
+def _prompt(text: str, sidechain: bool = False) -> bytes:
+    entry = {
+        "type": "user",
+        "isSidechain": sidechain,
+        "timestamp": "2025-01-01T12:00:00Z",
+        "message": {"role": "user", "content": text},
+    }
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+def _filler(n: int) -> bytes:
+    entry = {
+        "type": "assistant",
+        "message": {"role": "assistant", "content": [{"type": "text", "text": n}]},
+    }
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+def _session_lines(count: int = 400) -> list:
+    lines = [_prompt("First prompt")]
+    lines += [_filler(n) for n in range(count)]
+    lines += [_prompt("Last prompt"), _filler(-1), _prompt("Subagent task", True)]
+    return lines
+
+
+def _write(path: Path, lines: list, kind: str = GZIP, frame_bytes: int = 4096):
+    with open(path, "wb") as out:
+        frames = write_framed(lines, out, kind, frame_bytes)
+    save_frame_index(path, frames)
+    return frames
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path):
+    """Keep frame indexes out of the real cache directory"""
+    with patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path / "cache")}):
+        yield
+
+
+class TestCompressedSessions:
+    """Test cases for transparent decompression of session files"""
+
+    def test_file_names(self):
+        """Test that compression and session id come from the file name"""
+        assert compression_of("a/s.jsonl") is None
+        assert compression_of("a/s.jsonl.gz") == GZIP
+        assert compression_of("a/s.jsonl.zst") == ZSTD
+        assert session_stem("a/abc.jsonl.gz") == "abc"
+        assert session_stem("a/abc.jsonl.zst") == "abc"
+        assert session_stem("a/abc.jsonl") == "abc"
+
+    def test_framed_gzip_reads_back_and_seeks(self):
+        """Test that a framed file is valid gzip and seeks to any offset"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.gz"
+            lines = _session_lines()
+            data = b"".join(lines)
+            frames = _write(path, lines)
+
+            assert len(frames) > 3
+            assert gzip.decompress(path.read_bytes()) == data
+            with open_session(path) as f:
+                assert f.read() == data
+                for offset in (len(data) - 7, 5, frames[2][1], len(data) // 2):
+                    f.seek(offset)
+                    assert f.read(20) == data[offset : offset + 20]
+
+    def test_frame_index_of_plain_gzip(self):
+        """Test that files from other tools get an index built once"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.gz"
+            data = b"".join(_session_lines())
+            path.write_bytes(gzip.compress(data[:5000]) + gzip.compress(data[5000:]))
+
+            frames = load_frame_index(path)
+            assert frames == [(0, 0), frames[1], frames[2]]
+            assert frames[1][1] == 5000
+            assert frames[2] == (path.stat().st_size, len(data))
+
+            with patch.object(compressed, "build_frame_index") as build:
+                assert load_frame_index(path) == frames
+                build.assert_not_called()
+
+    def test_tail_reads_decompress_only_final_frames(self):
+        """Test that the tail and reversed lines stop at the needed frames"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.gz"
+            lines = _session_lines()
+            _write(path, lines)
+
+            with patch.object(
+                compressed, "_decompressobj", wraps=compressed._decompressobj
+            ) as spy:
+                tail, complete = read_tail(path, 100)
+                assert spy.call_count == 1
+            assert not complete
+            assert b"".join(lines).endswith(tail)
+
+            reversed_lines = list(iter_lines_reversed(path))
+            assert reversed_lines == [line.rstrip(b"\n") for line in lines[::-1]]
+
+    def test_parser_reads_compressed_session(self):
+        """Test that the parser gives the same state for plain and gzip files"""
+        with tempfile.TemporaryDirectory() as tmp:
+            lines = _session_lines()
+            plain = Path(tmp) / "s.jsonl"
+            plain.write_bytes(b"".join(lines))
+            packed = Path(tmp) / "s.jsonl.gz"
+            _write(packed, lines)
+            parser = JSONLParser()
+
+            assert parser.parse_session(packed).prompt == "Last prompt"
+            assert parser.parse_session(plain).prompt == "Last prompt"
+            assert len(parser.get_branch_status(packed)) == len(
+                parser.get_branch_status(plain)
+            )
+
+    def test_last_prompt_lookup_starts_at_the_end(self):
+        """Test that the last prompt is found without decompressing everything"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.gz"
+            frames = _write(path, _session_lines())
+
+            with patch.object(
+                compressed, "_decompressobj", wraps=compressed._decompressobj
+            ) as spy:
+                prompt, timestamp = JSONLParser().get_last_user_prompt_with_timestamp(
+                    path
+                )
+            assert prompt == "Last prompt"
+            assert timestamp is not None
+            assert spy.call_count < len(frames) - 1
+
+    def test_activity_from_compressed_tail(self):
+        """Test that agent activity is classified from a compressed tail"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.gz"
+            tool_use = {
+                "type": "assistant",
+                "timestamp": "2025-01-01T12:00:01Z",
+                "message": {
+                    "role": "assistant",
+                    "content": [{"type": "tool_use", "id": "t1", "name": "Bash"}],
+                },
+            }
+            lines = [_prompt("Run tests"), (json.dumps(tool_use) + "\n").encode()]
+            _write(path, lines)
+
+            activity = get_activity(path, now=1735732802.0)
+            assert activity.state == WAITING
+            assert activity.tool_name == "Bash"
+
+    def test_zstd_without_implementation(self):
+        """Test that a .zst file is unreadable rather than misparsed"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.zst"
+            path.write_bytes(b"not really zstd")
+            with (
+                patch.object(compressed, "_stdlib_zstd", None),
+                patch.object(compressed, "zstandard", None),
+            ):
+                with pytest.raises(OSError):
+                    open_session(path)
+                assert JSONLParser().parse_session(path) is None
+
+    def test_framed_zstd(self):
+        """Test zstd framing when an implementation is installed"""
+        if compressed._stdlib_zstd is None:
+            pytest.importorskip("zstandard")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl.zst"
+            lines = _session_lines()
+            frames = _write(path, lines, ZSTD)
+
+            assert compressed.build_frame_index(path) == frames
+            with open_session(path) as f:
+                assert f.read() == b"".join(lines)
+            assert JSONLParser().get_last_user_prompt(path) == "Last prompt"
@@ -0,0 +1,141 @@
+# ABOUTME: Test suite for the declarative extractor registry and its single-pass scan
+# ABOUTME: Tests reducers, dispatch by entry/item/tool, prefiltering and parser use
+
+import json
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from src.extractors import SESSION_METRICS, Extractor, ExtractorRegistry
+from src.jsonl_parser import JSONLParser
+from src.parse_cache import ParseCache
+
+
+def _tool_use(
+    name: str, tokens: int, sidechain: bool = False, message_id: str = ""
+) -> dict:
+    entry = {
+        "type": "assistant",
+        "isSidechain": sidechain,
+        "message": {
+            "role": "assistant",
+            "model": "model-a",
+            "content": [{"type": "tool_use", "name": name, "input": {}}],
+            "usage": {"input_tokens": 1, "output_tokens": tokens},
+        },
+    }
+    if message_id:
+        entry["message"]["id"] = message_id
+    return entry
+
+
+def _write(f, *entries) -> None:
+    for entry in entries:
+        f.write(json.dumps(entry) + "\n")
+    f.flush()
+
+
+class TestExtractorRegistry:
+    def test_reducers_and_dispatch(self):
+        """Test last, first, count and sum over entry and tool matches"""
+        registry = ExtractorRegistry(
+            [
+                Extractor("bash_calls", "count", tool_name="Bash"),
+                Extractor(
+                    "first_tool",
+                    "first",
+                    item_type="tool_use",
+                    value=lambda entry, item: item["name"],
+                ),
+                Extractor(
+                    "last_tool",
+                    "last",
+                    item_type="tool_use",
+                    value=lambda entry, item: item["name"],
+                ),
+                Extractor("user_entries", "count", entry_type="user"),
+            ]
+            + SESSION_METRICS
+        )
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl") as f:
+            _write(
+                f,
+                _tool_use("Bash", 10),
+                {"type": "user", "message": {"role": "user", "content": "hi"}},
+                _tool_use("Read", 5),
+                _tool_use("Bash", 7),
+                _tool_use("Bash", 100, sidechain=True),
+            )
+            values = registry.scan(f.name)
+
+        assert values["bash_calls"] == 2
+        assert values["first_tool"] == "Bash"
+        assert values["last_tool"] == "Bash"
+        assert values["user_entries"] == 1
+        assert values["tool_uses"] == 3
+        assert values["output_tokens"] == 22
+        assert values["model"] == "model-a"
+
+    def test_prefilter_skips_lines_without_declared_keys(self):
+        """Test that lines that cannot match are never decoded"""
+        registry = ExtractorRegistry(
+            [Extractor("todo_writes", "count", tool_name="TodoWrite")]
+        )
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl") as f:
+            _write(f, _tool_use("Bash", 1), _tool_use("TodoWrite", 1))
+            with patch("src.extractors.json.loads", wraps=json.loads) as loads:
+                values = registry.scan(f.name)
+
+        assert values == {"todo_writes": 1}
+        assert loads.call_count == 1
+
+    def test_invalid_registrations_are_rejected(self):
+        """Test duplicate names and unknown reducers"""
+        registry = ExtractorRegistry([Extractor("calls", "count", tool_name="Bash")])
+        with pytest.raises(ValueError):
+            registry.register(Extractor("calls", "count", tool_name="Read"))
+        with pytest.raises(ValueError):
+            registry.register(Extractor("other", "median"))
+
+    def test_parser_runs_extractors_in_its_single_pass(self):
+        """Test that parse_session fills extracted values and extends them"""
+        registry = ExtractorRegistry(SESSION_METRICS)
+        parser = JSONLParser(cache=ParseCache(), extractors=registry)
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl") as f:
+            _write(f, _tool_use("Bash", 10))
+            first = parser.parse_session(f.name)
+            assert first.extracted["output_tokens"] == 10
+
+            _write(f, _tool_use("Read", 5))
+            second = parser.parse_session(f.name)
+
+        assert second.extracted["tool_uses"] == 2
+        assert second.extracted["output_tokens"] == 15
+        # The earlier snapshot is not changed by the extension
+        assert first.extracted["output_tokens"] == 10
+
+    def test_split_responses_count_usage_once(self):
+        """Test that entries of one API response add their usage only once"""
+        registry = ExtractorRegistry(SESSION_METRICS)
+        parser = JSONLParser(cache=ParseCache(), extractors=registry)
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl") as f:
+            _write(
+                f,
+                _tool_use("Read", 10, message_id="msg_1"),
+                _tool_use("Bash", 10, message_id="msg_1"),
+                {"type": "user", "message": {"role": "user", "content": "done"}},
+                _tool_use("Read", 4, message_id="msg_2"),
+            )
+            assert registry.scan(f.name)["output_tokens"] == 14
+            assert parser.parse_session(f.name).extracted["output_tokens"] == 14
+
+            # The response continues across an incremental parse
+            _write(f, _tool_use("Edit", 4, message_id="msg_2"))
+            values = registry.scan(f.name)
+            state = parser.parse_session(f.name)
+
+        assert values["output_tokens"] == state.extracted["output_tokens"] == 14
+        assert values["input_tokens"] == state.extracted["input_tokens"] == 2
+        # Every entry still contributes its own tool calls
+        assert values["tool_uses"] == state.extracted["tool_uses"] == 4
@@ -0,0 +1,206 @@
+# ABOUTME: Test suite for the latency-budgeted git status cache
+# ABOUTME: Tests budget fallbacks, background completion and persistence
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.git_cache import GitSnapshot, GitStatusCache, refresh_repositories
+from src.git_integration import GitIntegration, WorkingTreeStatus
+
+
+def _clean_tree(repo_path=None, timeout=10.0):
+    return WorkingTreeStatus()
+
+
+class TestGitStatusCache:
+    def test_snapshot_round_trip(self):
+        """Test that snapshots survive conversion to and from a dictionary"""
+        snapshot = GitSnapshot()
+        snapshot.is_repository = True
+        snapshot.commit_message = "Add feature"
+        snapshot.commit_timestamp = 1751200000.0
+        snapshot.working_tree = WorkingTreeStatus()
+        snapshot.working_tree.ahead = 3
+        snapshot.checked_at = 100.0
+
+        restored = GitSnapshot.from_dict(snapshot.to_dict())
+
+        assert restored.is_repository is True
+        assert restored.commit_message == "Add feature"
+        assert restored.working_tree is not None
+        assert restored.working_tree.ahead == 3
+        assert restored.checked_at == 100.0
+
+    def test_slow_git_falls_back_then_completes_in_background(self):
+        """Test that an exhausted budget returns at once and fills the cache later"""
+        release = threading.Event()
+
+        def slow_summary(repo_path=None, timeout=10):
+            release.wait(5)
+            return True, "Slow commit", 1751200000.0
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = GitStatusCache(Path(tmp) / "git.json")
+            with (
+                patch.object(GitIntegration, "get_commit_summary", slow_summary),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+            ):
+                started = time.monotonic()
+                partial = cache.get("/repo", budget=0.05)
+                assert time.monotonic() - started < 1
+                # The fast working tree query is published on its own
+                assert partial.working_tree is not None
+                assert partial.checked_at == 0
+                assert cache.pending_repositories() == ["/repo"]
+
+                release.set()
+                snapshot = cache.get("/repo", budget=5)
+                cache.save()
+
+            assert cache.pending_repositories() == []
+            assert snapshot is not None
+            assert snapshot.commit_message == "Slow commit"
+
+            # A new process starts warm from the persisted file
+            reloaded = GitStatusCache(Path(tmp) / "git.json")
+            with patch.object(GitIntegration, "get_commit_summary") as mock_summary:
+                snapshot = reloaded.get("/repo", budget=0)
+                mock_summary.assert_not_called()
+            assert snapshot is not None
+            assert snapshot.commit_message == "Slow commit"
+
+    def test_slow_working_tree_does_not_hold_back_commit(self):
+        """Test that the commit is published as soon as git log returns"""
+        release = threading.Event()
+
+        def slow_tree(repo_path=None, timeout=10.0):
+            release.wait(5)
+            return WorkingTreeStatus()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = GitStatusCache(Path(tmp) / "git.json")
+            with (
+                patch.object(
+                    GitIntegration,
+                    "get_commit_summary",
+                    return_value=(True, "Fast commit", 1.0),
+                ),
+                patch.object(GitIntegration, "get_working_tree_status", slow_tree),
+            ):
+                snapshot = cache.get("/repo", budget=0.2)
+                assert snapshot.commit_message == "Fast commit"
+                assert snapshot.working_tree is None
+
+                # A cold cache that does not wait for fresh answers waits for
+                # the commit only
+                cold = GitStatusCache(Path(tmp) / "cold.json", wait_for_fresh=False)
+                started = time.monotonic()
+                snapshot = cold.get("/repo", budget=5)
+                assert time.monotonic() - started < 1
+                assert snapshot.commit_message == "Fast commit"
+
+                release.set()
+                assert cache.get("/repo", budget=5, max_age=60).working_tree
+
+    def test_cached_snapshot_is_returned_without_waiting(self):
+        """Test that a cache not waiting for fresh answers never blocks when warm"""
+        release = threading.Event()
+
+        def slow_summary(repo_path=None, timeout=10):
+            release.wait(5)
+            return True, "New commit", 2.0
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "git.json"
+            with (
+                patch.object(
+                    GitIntegration,
+                    "get_commit_summary",
+                    return_value=(True, "Old commit", 1.0),
+                ),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+            ):
+                # A repository with nothing cached is waited for
+                cold = GitStatusCache(path, wait_for_fresh=False)
+                assert cold.get("/repo", budget=5).commit_message == "Old commit"
+                cold.save()
+
+            warm = GitStatusCache(path, wait_for_fresh=False)
+            with (
+                patch.object(GitIntegration, "get_commit_summary", slow_summary),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+            ):
+                started = time.monotonic()
+                snapshot = warm.get("/repo", budget=5, max_age=0)
+                assert time.monotonic() - started < 1
+                assert snapshot.commit_message == "Old commit"
+                assert warm.pending_repositories() == ["/repo"]
+                release.set()
+
+    def test_timed_out_query_keeps_previous_snapshot(self):
+        """Test that a git timeout never replaces a known answer"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = GitStatusCache(Path(tmp) / "git.json")
+            with (
+                patch.object(
+                    GitIntegration,
+                    "get_commit_summary",
+                    return_value=(True, "Known commit", 1.0),
+                ),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+            ):
+                assert cache.get("/repo", budget=5) is not None
+
+            with (
+                patch.object(GitIntegration, "get_commit_summary", return_value=None),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+            ):
+                snapshot = cache.get("/repo", budget=5, max_age=0)
+
+            assert snapshot is not None
+            assert snapshot.commit_message == "Known commit"
+
+    def test_finish_hands_pending_queries_to_refresher(self):
+        """Test that over-budget queries are passed to a detached process"""
+        release = threading.Event()
+
+        def slow_summary(repo_path=None, timeout=10):
+            release.wait(5)
+            return True, "Slow commit", 1.0
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Path(tmp) / "git.json"
+            cache = GitStatusCache(cache_path)
+            with (
+                patch.object(GitIntegration, "get_commit_summary", slow_summary),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+                patch("src.git_cache.subprocess.Popen") as mock_popen,
+            ):
+                cache.get("/repo", budget=0)
+                cache.finish()
+                release.set()
+
+            args = mock_popen.call_args[0][0]
+            assert args[1:] == ["-m", "src.git_cache", str(cache_path), "/repo"]
+            assert mock_popen.call_args[1]["start_new_session"] is True
+
+    def test_refresh_repositories_persists_answers(self):
+        """Test the refresher entry point used by the detached process"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Path(tmp) / "git.json"
+            with (
+                patch.object(
+                    GitIntegration,
+                    "get_commit_summary",
+                    return_value=(True, "Refreshed", 1.0),
+                ),
+                patch.object(GitIntegration, "get_working_tree_status", _clean_tree),
+            ):
+                refresh_repositories(cache_path, ["/repo"])
+
+            snapshot = GitStatusCache(cache_path).get("/repo", budget=0, max_age=60)
+            assert snapshot is not None
+            assert snapshot.commit_message == "Refreshed"
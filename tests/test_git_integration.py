@@ -1,10 +1,29 @@
 # ABOUTME: Test suite for git integration functionality in Claude status display script
 # ABOUTME: Tests extraction of git commit messages and status information
 
+import tempfile
+import threading
 from pathlib import Path
 from unittest.mock import Mock, patch
 
-from src.git_integration import GitIntegration
+from src.git_integration import (
+    WORKING_TREE_STATUS_ARGS,
+    GitIntegration,
+    WorkingTreeStatus,
+    find_git_dir,
+    parse_porcelain_v2,
+)
+
+PORCELAIN_V2_OUTPUT = """# branch.oid 1234567890abcdef1234567890abcdef12345678
+# branch.head main
+# branch.upstream origin/main
+# branch.ab +2 -1
+1 .M N... 100644 100644 100644 abc abc src/a.py
+1 M. N... 100644 100644 100644 abc abc src/b.py
+2 R. N... 100644 100644 100644 abc abc R100 src/c.py	src/old_c.py
+u UU N... 100644 100644 100644 100644 abc abc abc conflict.py
+? notes.txt
+"""
 
 
 class TestGitIntegration:
@@ -115,3 +134,105 @@ class TestGitIntegration:
             is_repo = git_integration.is_git_repository()
 
             assert is_repo is False
+
+    def test_parse_porcelain_v2(self):
+        """Test parsing branch, ahead/behind and change counts"""
+        status = parse_porcelain_v2(PORCELAIN_V2_OUTPUT)
+
+        assert status.branch == "main"
+        assert status.upstream == "origin/main"
+        assert (status.ahead, status.behind) == (2, 1)
+        assert (status.staged, status.unstaged) == (2, 1)
+        assert status.conflicted == 1
+        assert status.untracked == 1
+        assert status.is_dirty
+        assert status.compact() == "*4 ?1 +2 -1"
+        assert status.summary() == (
+            "main, 1 conflicted, 2 staged, 1 modified, 1 untracked, ahead 2, behind 1"
+        )
+
+    def test_parse_porcelain_v2_clean_detached(self):
+        """Test a clean tree on a detached HEAD without upstream"""
+        status = parse_porcelain_v2("# branch.oid abc\n# branch.head (detached)\n")
+
+        assert status.branch is None
+        assert not status.is_dirty
+        assert status.compact() == ""
+        assert status.summary() == "(detached), clean"
+
+    def test_get_working_tree_status_command(self):
+        """Test that git status runs without optional locks and with a timeout"""
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout=PORCELAIN_V2_OUTPUT)
+
+            status = GitIntegration().get_working_tree_status(timeout=3)
+
+            assert status is not None and status.ahead == 2
+            mock_run.assert_called_once_with(
+                ["git", *WORKING_TREE_STATUS_ARGS],
+                capture_output=True,
+                text=True,
+                timeout=3,
+                cwd=None,
+            )
+            assert "--no-optional-locks" in WORKING_TREE_STATUS_ARGS
+            assert "core.untrackedCache=true" in WORKING_TREE_STATUS_ARGS
+
+    def test_working_tree_status_cached_serves_stale_and_revalidates(self):
+        """Test that a stale value is returned at once while a refresh runs"""
+        git_integration = GitIntegration()
+        repo = "/tmp/swr-test-repo"  # nosec B108
+        stale = WorkingTreeStatus()
+        stale.untracked = 1
+        fresh = WorkingTreeStatus()
+        fresh.untracked = 2
+        release = threading.Event()
+
+        def slow_status(repo_path=None, timeout=10.0):
+            release.wait(5)
+            return fresh
+
+        with (
+            patch.dict(GitIntegration._tree_cache, {repo: (stale, 0.0)}),
+            patch.object(
+                git_integration, "get_working_tree_status", side_effect=slow_status
+            ),
+        ):
+            status, age = git_integration.get_working_tree_status_cached(repo)
+            assert status is stale
+            assert age is not None and age > 1000
+
+            refresh = GitIntegration._tree_refreshing[repo]
+            release.set()
+            refresh.join(5)
+
+            status, age = git_integration.get_working_tree_status_cached(repo)
+            assert status is fresh
+            assert age is not None and age < 5
+
+
+class TestFindGitDir:
+    def test_finds_git_dir_from_subdirectory(self):
+        """Test that the git directory of an enclosing work tree is found"""
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / ".git").mkdir()
+            subdir = Path(tmp) / "src" / "pkg"
+            subdir.mkdir(parents=True)
+
+            assert find_git_dir(str(subdir)) == Path(tmp) / ".git"
+
+    def test_follows_gitdir_file_of_linked_worktree(self):
+        """Test that a .git file pointing elsewhere is followed"""
+        with tempfile.TemporaryDirectory() as tmp:
+            real_git_dir = Path(tmp) / "main" / ".git" / "worktrees" / "feature"
+            real_git_dir.mkdir(parents=True)
+            worktree = Path(tmp) / "feature"
+            worktree.mkdir()
+            (worktree / ".git").write_text(f"gitdir: {real_git_dir}\n")
+
+            assert find_git_dir(str(worktree)) == real_git_dir.resolve()
+
+    def test_outside_repository(self):
+        """Test that no git directory is found outside a repository"""
+        with tempfile.TemporaryDirectory() as tmp:
+            assert find_git_dir(tmp) is None
@@ -4,8 +4,11 @@
 import json
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
 
-from src.jsonl_parser import JSONLParser
+from src.extractors import SESSION_METRICS, ExtractorRegistry
+from src.jsonl_parser import JSONLParser, SessionState
+from src.parse_cache import ParseCache
 
 
 class TestJSONLParser:
@@ -124,6 +127,40 @@ class TestJSONLParser:
             assert todos[1]["content"] == "Write code"
             assert todos[1]["status"] == "in_progress"
 
+    def test_latest_todo_list_keeps_the_transcript_fields(self):
+        """Test that unknown keys and unrecognized values are returned as written"""
+        todos = [
+            {
+                "id": "1",
+                "content": "Run tests",
+                "status": "blocked",
+                "priority": "urgent",
+                "activeForm": "Running tests",
+            }
+        ]
+        entry = {
+            "type": "assistant",
+            "timestamp": "2025-06-29T14:05:25.270Z",
+            "message": {
+                "role": "assistant",
+                "content": [
+                    {"type": "tool_use", "name": "TodoWrite", "input": {"todos": todos}}
+                ],
+            },
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            path.write_text(json.dumps(entry) + "\n")
+            parser = JSONLParser(cache=ParseCache())
+
+            returned, timestamp = parser.get_latest_todo_list_with_timestamp(path)
+            assert returned == todos
+            assert timestamp is not None
+
+            # Changing the result leaves the cached state alone
+            returned[0]["status"] = "completed"
+            assert parser.get_latest_todo_list(path) == todos
+
     def test_extract_latest_todo_list_no_todos(self):
         """Test behavior when no todo lists exist"""
         with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
@@ -273,3 +310,249 @@ class TestJSONLParser:
             # Should be the timestamp from the real message, not the tool result
             expected_timestamp = parser._parse_timestamp("2025-06-29T14:05:25.270Z")
             assert abs(timestamp - expected_timestamp) < 1  # Within 1 second
+
+    def test_sidechain_prompt_is_not_last_user_prompt(self):
+        """Test that subagent prompts on sidechains don't replace the main prompt"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            entries = [
+                {
+                    "type": "user",
+                    "uuid": "00000000-0000-0000-0000-000000000001",
+                    "parentUuid": None,
+                    "isSidechain": False,
+                    "message": {"role": "user", "content": "Main prompt"},
+                    "timestamp": "2025-06-29T14:05:25.270Z",
+                },
+                {
+                    "type": "user",
+                    "uuid": "00000000-0000-0000-0000-000000000002",
+                    "parentUuid": None,
+                    "isSidechain": True,
+                    "message": {"role": "user", "content": "Subagent task"},
+                    "timestamp": "2025-06-29T14:06:25.270Z",
+                },
+            ]
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+
+            parser = JSONLParser()
+            prompt, _ = parser.get_last_user_prompt_with_timestamp(f.name)
+
+            assert prompt == "Main prompt"
+
+    def test_get_branch_status_separates_sidechains(self):
+        """Test that sidechains are reported as separate branches with status"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            entries = [
+                ("1", None, False, "user", "Main prompt"),
+                ("2", "1", True, "user", "Research task"),
+                ("3", "2", True, "assistant", [{"type": "tool_use", "name": "Grep"}]),
+                ("4", "1", True, "user", "Finished task"),
+                ("5", "4", True, "assistant", [{"type": "text", "text": "Done"}]),
+                ("6", "1", False, "assistant", [{"type": "text", "text": "Ok"}]),
+            ]
+            for uuid, parent, sidechain, role, content in entries:
+                entry = {
+                    "type": role,
+                    "uuid": f"00000000-0000-0000-0000-00000000000{uuid}",
+                    "parentUuid": (
+                        f"00000000-0000-0000-0000-00000000000{parent}"
+                        if parent
+                        else None
+                    ),
+                    "isSidechain": sidechain,
+                    "message": {"role": role, "content": content},
+                    "timestamp": "2025-06-29T14:05:25.270Z",
+                }
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+
+            parser = JSONLParser()
+            branches = parser.get_branch_status(f.name)
+
+            assert len(branches) == 3
+            main, research, finished = branches
+            assert not main.is_sidechain
+            assert main.prompt == "Main prompt"
+            assert main.entry_count == 2
+            assert research.is_sidechain and research.active
+            assert research.prompt == "Research task"
+            assert finished.is_sidechain and not finished.active
+            assert finished.prompt == "Finished task"
+
+    def test_get_branch_status_grows_with_cached_offset(self):
+        """Test that branches are extended from the cache, not rescanned"""
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+
+            def append(uuid, parent, sidechain, content):
+                entry = {
+                    "type": "user",
+                    "uuid": f"00000000-0000-0000-0000-00000000000{uuid}",
+                    "parentUuid": (
+                        f"00000000-0000-0000-0000-00000000000{parent}"
+                        if parent
+                        else None
+                    ),
+                    "isSidechain": sidechain,
+                    "message": {"role": "user", "content": content},
+                }
+                with open(session, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+            append("1", None, False, "Main prompt")
+            parser = JSONLParser(cache=ParseCache(), track_branches=True)
+            assert len(parser.get_branch_status(session)) == 1
+
+            append("2", "1", True, "Subagent task")
+            with patch.object(
+                JSONLParser,
+                "_feed_branch",
+                autospec=True,
+                side_effect=JSONLParser._feed_branch,
+            ) as feed:
+                branches = parser.get_branch_status(session)
+                state = parser.parse_session(session)
+
+            assert feed.call_count == 1  # only the appended line
+            assert [b.prompt for b in branches] == ["Main prompt", "Subagent task"]
+            assert state.prompt == "Main prompt"
+
+    def test_get_branch_status_example_jsonl_is_single_chain(self):
+        """Test that a session without sidechains has only the main branch"""
+        example_jsonl_path = Path(__file__).parent.parent / "example.jsonl"
+        parser = JSONLParser()
+
+        branches = parser.get_branch_status(example_jsonl_path)
+
+        assert len(branches) == 1
+        assert branches[0].prompt == "Do not do anything right now, this is a test."
+
+    def test_partial_trailing_line_completed_by_next_scan(self):
+        """Test that a half-written last line is held and parsed once complete"""
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+            first = {"type": "user", "message": {"role": "user", "content": "one"}}
+            second = {"type": "user", "message": {"role": "user", "content": "two"}}
+            second_line = json.dumps(second) + "\n"
+            with open(session, "w") as f:
+                f.write(json.dumps(first) + "\n" + second_line[:15])
+
+            parser = JSONLParser()
+            state = SessionState()
+            with open(session, "rb") as f:
+                parser._scan(f, state)
+            assert state.prompt == "one"
+            assert state.partial_line_bytes == 15
+            assert state.malformed_lines == 0
+
+            with open(session, "a") as f:
+                f.write(second_line[15:])
+            with open(session, "rb") as f:
+                parser._scan(f, state)
+            assert state.prompt == "two"
+            assert state.partial_line_bytes == 0
+            assert state.malformed_lines == 0
+            assert state.offset == session.stat().st_size
+
+    def test_malformed_lines_counted_separately(self):
+        """Test that broken complete lines are counted as malformed, not partial"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            f.write('{"type": "user" not json}\n')
+            f.write(json.dumps({"type": "user", "message": {"role": "user"}}) + "\n")
+            f.write('{"type": "user", "mess')
+            f.flush()
+
+            state = JSONLParser().parse_session(f.name)
+
+            assert state is not None
+            assert state.malformed_lines == 1
+            assert state.partial_line_bytes == len('{"type": "user", "mess')
+
+    def test_lines_without_prompts_or_todos_are_not_decoded(self):
+        """Test that the prefilter skips lines no reader of the state needs"""
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+            entries = [
+                {
+                    "type": "user",
+                    "sessionId": "first",
+                    "message": {"role": "user", "content": "Fix bug"},
+                },
+            ] + [
+                {
+                    "type": "assistant",
+                    "sessionId": f"id-{n}",
+                    "message": {"role": "assistant", "model": "m", "content": []},
+                }
+                for n in range(3)
+            ]
+            with open(session, "w") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+
+            with patch.object(
+                JSONLParser, "_feed", autospec=True, side_effect=JSONLParser._feed
+            ) as feed:
+                state = JSONLParser().parse_session(session)
+                assert feed.call_count == 1
+                assert state.prompt == "Fix bug"
+                assert state.session_id == "id-2"
+
+                # Lines an extractor declared interest in are decoded
+                metrics = ExtractorRegistry(SESSION_METRICS)
+                state = JSONLParser(extractors=metrics).parse_session(session)
+                assert feed.call_count == 1 + 4
+                assert state.extracted["model"] == "m"
+
+    def test_unterminated_complete_last_line_is_consumed(self):
+        """Test that a whole JSON document without a final newline is used"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            entry = {"type": "user", "message": {"role": "user", "content": "last"}}
+            f.write(json.dumps(entry))
+            f.flush()
+
+            state = JSONLParser().parse_session(f.name)
+
+            assert state is not None
+            assert state.prompt == "last"
+            assert state.partial_line_bytes == 0
+
+    def test_bounded_prompt_keeps_preview_and_full_length(self):
+        """Test that a huge prompt is kept as a preview plus its full length"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            text = "x" * 10000
+            entry = {"type": "user", "message": {"role": "user", "content": text}}
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+
+            parser = JSONLParser(max_prompt_chars=100)
+            state = parser.parse_session(f.name)
+
+            assert state is not None
+            assert state.prompt == "x" * 100
+            assert state.prompt_length == 10000
+            assert state.prompt_truncated
+
+            preview, length, _ = parser.get_last_user_prompt_preview(f.name, 10)
+            assert preview == "x" * 10
+            assert length == 10000
+
+            # The full text is still available on request
+            assert parser.get_last_user_prompt(f.name) == text
+
+    def test_bounded_and_unbounded_parsers_share_cache_safely(self):
+        """Test that parsers with different prompt bounds never mix cached state"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            entry = {"type": "user", "message": {"role": "user", "content": "y" * 50}}
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+
+            cache = ParseCache()
+            bounded = JSONLParser(cache=cache, max_prompt_chars=5)
+            unbounded = JSONLParser(cache=cache)
+
+            assert bounded.parse_session(f.name).prompt == "y" * 5
+            assert unbounded.parse_session(f.name).prompt == "y" * 50
+            assert not unbounded.parse_session(f.name).prompt_truncated
@@ -0,0 +1,96 @@
+# ABOUTME: Test suite for the in-process LRU cache of parsed session state
+# ABOUTME: Tests hits, incremental extension, eviction bounds and statistics
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from src.jsonl_parser import JSONLParser
+from src.parse_cache import ParseCache
+
+
+def _write_prompt(path: Path, text: str, mode: str = "a") -> None:
+    entry = {
+        "type": "user",
+        "message": {"role": "user", "content": text},
+        "timestamp": "2025-06-29T14:05:25.270Z",
+    }
+    with open(path, mode) as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+class TestParseCache:
+    def test_hit_miss_and_extension(self):
+        """Test that lookups distinguish unchanged, grown and unknown files"""
+        cache = ParseCache()
+        assert cache.get("/a.jsonl", 1, 100, 5) == (None, False)
+
+        cache.put("/a.jsonl", 1, 100, 5, "state", 10)
+        assert cache.get("/a.jsonl", 1, 100, 5) == ("state", True)
+        assert cache.get("/a.jsonl", 1, 150, 6) == ("state", False)
+
+        # A different inode means the file was replaced
+        assert cache.get("/a.jsonl", 2, 150, 6) == (None, False)
+        assert cache.stats() == {
+            "hits": 1,
+            "misses": 2,
+            "extensions": 1,
+            "evictions": 0,
+            "entries": 0,
+            "bytes": 0,
+        }
+
+    def test_evicts_least_recently_used_by_count(self):
+        """Test that the entry bound evicts the least recently used file"""
+        cache = ParseCache(max_entries=2)
+        cache.put("/a", 1, 1, 1, "a", 1)
+        cache.put("/b", 1, 1, 1, "b", 1)
+        cache.get("/a", 1, 1, 1)
+        cache.put("/c", 1, 1, 1, "c", 1)
+
+        assert cache.get("/b", 1, 1, 1) == (None, False)
+        assert cache.get("/a", 1, 1, 1) == ("a", True)
+        assert cache.stats()["evictions"] == 1
+
+    def test_evicts_by_approximate_bytes(self):
+        """Test that the byte bound is enforced and oversized values are skipped"""
+        cache = ParseCache(max_bytes=100)
+        cache.put("/a", 1, 1, 1, "a", 60)
+        cache.put("/b", 1, 1, 1, "b", 60)
+        assert len(cache) == 1
+        assert cache.stats()["bytes"] == 60
+
+        cache.put("/huge", 1, 1, 1, "huge", 1000)
+        assert cache.get("/huge", 1, 1, 1) == (None, False)
+
+    def test_parser_extends_cached_state_incrementally(self):
+        """Test that a grown file is parsed from the cached offset"""
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+            _write_prompt(session, "first", mode="w")
+
+            cache = ParseCache()
+            parser = JSONLParser(cache=cache)
+            assert parser.get_last_user_prompt(session) == "first"
+            first_offset = parser.parse_session(session).offset
+            assert cache.stats()["hits"] == 1
+
+            _write_prompt(session, "second")
+            os.utime(session, ns=(0, os.stat(session).st_mtime_ns + 1))
+            state = parser.parse_session(session)
+
+            assert state.prompt == "second"
+            assert state.offset == session.stat().st_size > first_offset
+            assert cache.stats()["extensions"] == 1
+
+    def test_parser_reparses_truncated_file(self):
+        """Test that a rewritten, shorter file is parsed from scratch"""
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+            _write_prompt(session, "a much longer first prompt", mode="w")
+            parser = JSONLParser(cache=ParseCache())
+            parser.parse_session(session)
+
+            _write_prompt(session, "short", mode="w")
+            assert parser.get_last_user_prompt(session) == "short"
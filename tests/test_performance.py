@@ -0,0 +1,250 @@
+# ABOUTME: Performance tier with throughput, I/O, subprocess and memory budgets
+# ABOUTME: Runs on large synthetic sessions only when CLAUDE_STATUS_PERF is set
+
+import json
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from claude_status import display_status
+from src.activity import UNKNOWN, get_activity
+from src.compressed import (
+    iter_lines_reversed,
+    read_tail,
+    save_frame_index,
+    write_framed,
+)
+from src.git_cache import GitStatusCache
+from src.jsonl_parser import JSONLParser
+from src.parse_cache import ParseCache
+
+pytestmark = pytest.mark.performance
+
+# Budgets are set well below what a laptop achieves so that only real
+# regressions (an extra full pass, a lost cache, a copied buffer) trip them
+SESSION_LINES = 50_000
+MIN_LINES_PER_SECOND = 25_000
+MAX_INCREMENTAL_READ_BYTES = 256 * 1024
+MAX_TAIL_READ_BYTES = 64 * 1024
+MAX_GIT_SUBPROCESSES = 4
+HUGE_PROMPT_CHARS = 4 * 1024 * 1024
+MAX_PEAK_MEMORY_BYTES = 48 * 1024 * 1024
+
+
+def _entries(count: int):
+    """Yield a realistic mix of prompts, tool calls, todos and sidechains"""
+    for i in range(count):
+        timestamp = f"2025-06-29T14:{(i // 60) % 60:02d}:{i % 60:02d}.000Z"
+        kind = i % 10
+        if kind == 0:
+            yield {
+                "type": "user",
+                "uuid": f"u{i}",
+                "parentUuid": f"u{i - 1}" if i else None,
+                "message": {"role": "user", "content": f"Prompt number {i} " * 5},
+                "timestamp": timestamp,
+            }
+        elif kind == 5:
+            yield {
+                "type": "assistant",
+                "uuid": f"u{i}",
+                "parentUuid": f"u{i - 1}",
+                "message": {
+                    "role": "assistant",
+                    "content": [
+                        {
+                            "type": "tool_use",
+                            "name": "TodoWrite",
+                            "input": {
+                                "todos": [
+                                    {"id": str(n), "content": f"Task {n}", "status": s}
+                                    for n, s in enumerate(
+                                        ["completed", "in_progress", "pending"]
+                                    )
+                                ]
+                            },
+                        }
+                    ],
+                },
+                "timestamp": timestamp,
+            }
+        else:
+            yield {
+                "type": "assistant",
+                "uuid": f"u{i}",
+                "parentUuid": f"u{i - 1}",
+                "isSidechain": kind == 7,
+                "message": {
+                    "role": "assistant",
+                    "content": [{"type": "text", "text": "Working on it. " * 20}],
+                },
+                "timestamp": timestamp,
+            }
+
+
+@pytest.fixture(scope="module")
+def large_session():
+    """A synthetic session file of SESSION_LINES lines"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "large.jsonl"
+        with open(path, "w") as f:
+            for entry in _entries(SESSION_LINES):
+                f.write(json.dumps(entry) + "\n")
+        yield path
+
+
+@pytest.fixture(scope="module")
+def compressed_session(large_session):
+    """The large session compressed in frames, with its frame index cached"""
+    path = large_session.with_suffix(".jsonl.gz")
+    with open(large_session, "rb") as lines, open(path, "wb") as out:
+        frames = write_framed(lines, out)
+    cache_dir = large_session.parent / "frames"
+    save_frame_index(path, frames, cache_dir)
+    return path, cache_dir
+
+
+@pytest.fixture
+def appendable_session(large_session, tmp_path):
+    """A copy of the large session that a test may modify"""
+    path = tmp_path / "large.jsonl"
+    shutil.copyfile(large_session, path)
+    return path
+
+
+def _read_bytes() -> int:
+    """Bytes this process has read through read syscalls so far"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    pytest.skip("/proc/self/io is not available")
+
+
+class TestParserThroughput:
+    @pytest.mark.parametrize(
+        "method",
+        [
+            "parse_session",
+            "get_last_user_prompt",
+            "get_latest_todo_list",
+            "get_branch_status",
+        ],
+    )
+    def test_lines_per_second(self, large_session, method):
+        """Test that each parser entry point scans fast enough"""
+        parser = JSONLParser()
+        start = time.perf_counter()
+        getattr(parser, method)(large_session)
+        elapsed = time.perf_counter() - start
+
+        assert SESSION_LINES / elapsed >= MIN_LINES_PER_SECOND, (
+            f"{method}: {SESSION_LINES / elapsed:.0f} lines/s"
+        )
+
+
+class TestIncrementalReads:
+    def test_append_reads_only_new_bytes(self, appendable_session):
+        """Test that a cached parser reads little more than an appended line"""
+        parser = JSONLParser(cache=ParseCache())
+        parser.parse_session(appendable_session)
+
+        line = json.dumps(
+            {"type": "user", "message": {"role": "user", "content": "appended"}}
+        )
+        with open(appendable_session, "a") as f:
+            f.write(line + "\n")
+
+        before = _read_bytes()
+        state = parser.parse_session(appendable_session)
+        read = _read_bytes() - before
+
+        assert state.prompt == "appended"
+        assert read <= MAX_INCREMENTAL_READ_BYTES, f"read {read} bytes"
+
+
+class TestTailReads:
+    def test_activity_reads_only_the_tail(self, large_session):
+        """Test that classifying the activity reads the tail, not the session"""
+        before = _read_bytes()
+        activity = get_activity(large_session, now=0)
+        read = _read_bytes() - before
+
+        assert activity.state != UNKNOWN
+        assert read <= MAX_TAIL_READ_BYTES, f"read {read} bytes"
+
+    def test_compressed_tail_reads_only_the_last_frames(self, compressed_session):
+        """Test that reverse lookups in a compressed session skip its head"""
+        path, cache_dir = compressed_session
+
+        before = _read_bytes()
+        data, complete = read_tail(path, 8 * 1024, cache_dir)
+        read = _read_bytes() - before
+        assert data and not complete
+        assert read <= MAX_TAIL_READ_BYTES, f"read {read} bytes"
+
+        before = _read_bytes()
+        last = next(iter_lines_reversed(path, cache_dir))
+        read = _read_bytes() - before
+        assert json.loads(last)["uuid"] == f"u{SESSION_LINES - 1}"
+        assert read <= MAX_TAIL_READ_BYTES, f"read {read} bytes"
+
+
+class TestGitSubprocesses:
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+    @pytest.mark.parametrize("cached", [False, True])
+    def test_display_status_git_subprocess_count(
+        self, large_session, monkeypatch, tmp_path, cached
+    ):
+        """Test how many git processes one status display starts"""
+        repo = tmp_path / "repo"
+        subprocess.run(["git", "init", "-q", str(repo)], check=True)  # nosec
+        calls = []
+        real_run = subprocess.run
+
+        def counting_run(*args, **kwargs):
+            calls.append(args[0])
+            return real_run(*args, **kwargs)
+
+        git_cache = GitStatusCache(tmp_path / "git_status.json") if cached else None
+        monkeypatch.chdir(repo)
+        with patch("src.git_integration.subprocess.run", side_effect=counting_run):
+            display_status(large_session, git_cache=git_cache, git_budget=5.0)
+
+        assert 0 < len(calls) <= MAX_GIT_SUBPROCESSES, calls
+        if cached:
+            # Both queries answered within the budget, so none is left over
+            assert git_cache.pending_repositories() == []
+
+
+class TestMemory:
+    def test_huge_prompts_bounded_peak_memory(self):
+        """Test that megabyte prompts do not blow up memory while parsing"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "huge.jsonl"
+            with open(path, "w") as f:
+                for i in range(5):
+                    content = str(i) * HUGE_PROMPT_CHARS
+                    message = {"role": "user", "content": content}
+                    f.write(json.dumps({"type": "user", "message": message}) + "\n")
+
+            parser = JSONLParser(cache=ParseCache(), max_prompt_chars=4000)
+            tracemalloc.start()
+            try:
+                state = parser.parse_session(path)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        assert state.prompt_length == HUGE_PROMPT_CHARS
+        assert state.approx_bytes() < 64 * 1024
+        assert peak <= MAX_PEAK_MEMORY_BYTES, f"peak {peak} bytes"
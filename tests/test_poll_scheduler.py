@@ -0,0 +1,116 @@
+# ABOUTME: Test suite for the adaptive per-file polling scheduler
+# ABOUTME: Tests back-off on quiet files, fast polling after changes and waiting
+
+import os
+import tempfile
+from pathlib import Path
+
+from src.poll_scheduler import AdaptivePoller, file_signature
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def _touch(path: Path, content: str) -> None:
+    path.write_text(content)
+    stat = path.stat()
+    # Make the change visible even on coarse mtime filesystems
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestAdaptivePoller:
+    def test_quiet_file_backs_off_to_cap(self):
+        """Test that an unchanged file is checked exponentially less often"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            path.write_text("a\n")
+            clock = FakeClock()
+            poller = AdaptivePoller(max_interval=4, min_interval=0.5, clock=clock)
+            poller.watch(path)
+
+            intervals = []
+            for _ in range(6):
+                clock.sleep(poller.time_until_due())
+                assert poller.poll() == []
+                intervals.append(poller.interval(path))
+
+            assert intervals == [1.0, 2.0, 4, 4, 4, 4]
+
+    def test_change_resets_interval(self):
+        """Test that a changed file goes back to the shortest interval"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            path.write_text("a\n")
+            clock = FakeClock()
+            poller = AdaptivePoller(max_interval=8, min_interval=0.5, clock=clock)
+            poller.watch(path)
+            for _ in range(4):
+                clock.sleep(poller.time_until_due())
+                poller.poll()
+
+            _touch(path, "a\nb\n")
+            clock.sleep(poller.time_until_due())
+
+            assert poller.poll() == [path]
+            assert poller.interval(path) == 0.5
+
+    def test_files_keep_separate_schedules(self):
+        """Test that a busy file does not make quiet files polled more often"""
+        with tempfile.TemporaryDirectory() as tmp:
+            busy = Path(tmp) / "busy.jsonl"
+            quiet = Path(tmp) / "HEAD"
+            busy.write_text("0\n")
+            quiet.write_text("ref\n")
+            clock = FakeClock()
+            poller = AdaptivePoller(max_interval=8, min_interval=0.5, clock=clock)
+            poller.watch(busy)
+            poller.watch(quiet)
+
+            for n in range(8):
+                _touch(busy, f"{n}\n" * (n + 2))
+                clock.sleep(poller.time_until_due())
+                poller.poll()
+
+            assert poller.interval(busy) == 0.5
+            assert poller.interval(quiet) > 2
+
+    def test_missing_file_appearing_counts_as_change(self):
+        """Test that a watched path may not exist yet"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "later.jsonl"
+            clock = FakeClock()
+            poller = AdaptivePoller(max_interval=4, clock=clock)
+            poller.watch(path)
+            assert file_signature(path) is None
+
+            path.write_text("x\n")
+            clock.sleep(poller.time_until_due())
+
+            assert poller.poll() == [path]
+
+    def test_wait_returns_changes_or_times_out(self):
+        """Test that wait stops at the first change or after the timeout"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            path.write_text("a\n")
+            clock = FakeClock()
+            poller = AdaptivePoller(max_interval=4, clock=clock)
+            poller.watch(path)
+
+            assert poller.wait(10, sleep=clock.sleep) == []
+            assert clock.now == 1010.0
+
+            def sleep_then_write(seconds):
+                clock.sleep(seconds)
+                _touch(path, "a\nb\n")
+
+            assert poller.wait(10, sleep=sleep_then_write) == [path]
+            assert clock.now < 1020.0
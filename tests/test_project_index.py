@@ -0,0 +1,96 @@
+# ABOUTME: Test suite for the mapping between real project paths and Claude folders
+# ABOUTME: Tests cwd discovery, subdirectory lookup, persistence and refresh rules
+
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from src.project_index import ProjectIndex
+
+
+def _add_session(projects_dir: Path, folder: str, cwd: str) -> Path:
+    folder_dir = projects_dir / folder
+    folder_dir.mkdir(parents=True, exist_ok=True)
+    session = folder_dir / "session.jsonl"
+    with open(session, "w") as f:
+        f.write(json.dumps({"type": "summary", "summary": "Earlier work"}) + "\n")
+        f.write(json.dumps({"type": "user", "cwd": cwd}) + "\n")
+    return session
+
+
+class TestProjectIndex:
+    def test_maps_real_paths_despite_dashes(self):
+        """Test that paths with dashes map to the folder that recorded them"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            _add_session(projects_dir, "-work-my-app", "/work/my-app")
+            _add_session(projects_dir, "-work-my", "/work/my")
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+
+            assert index.projects() == {
+                "/work/my": "-work-my",
+                "/work/my-app": "-work-my-app",
+            }
+            assert index.folder_for("/work/my-app") == "-work-my-app"
+            assert index.folder_for("/work/my") == "-work-my"
+
+    def test_subdirectory_resolves_to_enclosing_project(self):
+        """Test that the closest enclosing project wins for subdirectories"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            _add_session(projects_dir, "-work-app", "/work/app")
+            _add_session(projects_dir, "-work-app-lib", "/work/app/lib")
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+
+            assert index.folder_for("/work/app/src/module") == "-work-app"
+            assert index.folder_for("/work/app/lib/tests") == "-work-app-lib"
+            assert index.folder_for("/work/application") is None
+
+    def test_saved_mapping_avoids_rescanning(self):
+        """Test that an unchanged projects directory is not read again"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            _add_session(projects_dir, "-work-app", "/work/app")
+            ProjectIndex(Path(tmp) / "projects.json", projects_dir).refresh()
+
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+            with patch("src.project_index.read_session_cwd") as read_cwd:
+                assert index.folder_for("/work/app") == "-work-app"
+                read_cwd.assert_not_called()
+
+            # A new folder changes the projects directory and is picked up
+            _add_session(projects_dir, "-work-api", "/work/api")
+            assert index.folder_for("/work/api") == "-work-api"
+
+    def test_folder_without_sessions_is_resolved_later(self):
+        """Test that a folder whose first session appears later gets mapped"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            (projects_dir / "-work-app").mkdir(parents=True)
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+            assert index.projects() == {}
+            # Found by its derived name until a session records its cwd
+            assert index.folder_for("/work/app") == "-work-app"
+
+            _add_session(projects_dir, "-work-app", "/work/app")
+            assert index.projects() == {"/work/app": "-work-app"}
+            assert index.folder_for("/work/app") == "-work-app"
+
+    def test_home_and_root_projects_never_enclose_other_projects(self):
+        """Test that a session started in $HOME does not claim its subdirectories"""
+        with tempfile.TemporaryDirectory() as tmp:
+            home = Path(tmp) / "home" / "user"
+            projects_dir = Path(tmp) / "projects"
+            _add_session(projects_dir, "-home", str(home))
+            _add_session(projects_dir, "-root", "/")
+            _add_session(projects_dir, "-home-code", str(home / "code"))
+            index = ProjectIndex(Path(tmp) / "projects.json", projects_dir)
+
+            with patch.dict("os.environ", {"HOME": str(home)}):
+                assert index.folder_for(str(home)) == "-home"
+                # A new project with no sessions yet is not the home project
+                assert index.folder_for(str(home / "new-project")) is None
+                assert index.folder_for("/srv/other") is None
+                # Ordinary enclosing projects still resolve subdirectories
+                assert index.folder_for(str(home / "code" / "src")) == "-home-code"
@@ -0,0 +1,222 @@
+# ABOUTME: Test suite for the cross-session full-text search index
+# ABOUTME: Tests indexing of prompts and todos, incremental updates and queries
+
+import gzip
+import json
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.search_index import SearchIndex, SearchIndexError
+
+
+def _user_entry(text: str, session_id: str = "session-1") -> dict:
+    return {
+        "type": "user",
+        "sessionId": session_id,
+        "message": {"role": "user", "content": text},
+        "timestamp": "2025-06-29T14:05:25.270Z",
+    }
+
+
+def _todo_entry(contents: list) -> dict:
+    return {
+        "type": "assistant",
+        "sessionId": "session-1",
+        "message": {
+            "role": "assistant",
+            "content": [
+                {
+                    "type": "tool_use",
+                    "name": "TodoWrite",
+                    "input": {
+                        "todos": [
+                            {"id": str(i), "content": c, "status": "pending"}
+                            for i, c in enumerate(contents)
+                        ]
+                    },
+                }
+            ],
+        },
+        "timestamp": "2025-06-29T14:06:25.270Z",
+    }
+
+
+class TestSearchIndex:
+    def _setup(self, tmp: str) -> tuple:
+        projects_dir = Path(tmp) / "projects"
+        project_dir = projects_dir / "-home-user-project"
+        project_dir.mkdir(parents=True)
+        session = project_dir / "session.jsonl"
+        index = SearchIndex(Path(tmp) / "search.db", projects_dir)
+        return index, session
+
+    def test_search_prompts_and_todos(self):
+        """Test that prompts and todo contents are both searchable"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            with open(session, "w") as f:
+                f.write(json.dumps(_user_entry("Fix the flaky login test")) + "\n")
+                f.write(json.dumps(_todo_entry(["Refactor login handler"])) + "\n")
+
+            assert index.update() == 2
+
+            results = index.search("login")
+            kinds = sorted(result.kind for result in results)
+            assert kinds == ["prompt", "todo"]
+            assert results[0].project == "-home-user-project"
+            assert results[0].session_id == "session-1"
+
+            assert index.search("nonexistent") == []
+            index.close()
+
+    def test_incremental_update_reads_only_new_lines(self):
+        """Test that a second update indexes only appended entries"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            with open(session, "w") as f:
+                f.write(json.dumps(_user_entry("first prompt")) + "\n")
+            assert index.update() == 1
+            assert index.update() == 0
+
+            with open(session, "a") as f:
+                f.write(json.dumps(_user_entry("second prompt")) + "\n")
+            assert index.update() == 1
+            assert len(index.search("prompt")) == 2
+            index.close()
+
+    def test_partial_trailing_line_is_deferred(self):
+        """Test that a half-written last line is indexed once it is complete"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            line = json.dumps(_user_entry("streaming prompt"))
+            with open(session, "w") as f:
+                f.write(line[:20])
+            assert index.update() == 0
+
+            with open(session, "a") as f:
+                f.write(line[20:] + "\n")
+            assert index.update() == 1
+            assert len(index.search("streaming")) == 1
+            index.close()
+
+    def test_repeated_todo_lists_indexed_once(self):
+        """Test that rewritten todo lists do not duplicate todo documents"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            with open(session, "w") as f:
+                f.write(json.dumps(_todo_entry(["Write docs"])) + "\n")
+                f.write(json.dumps(_todo_entry(["Write docs", "Ship it"])) + "\n")
+
+            assert index.update() == 2
+            assert len(index.search("docs")) == 1
+            index.close()
+
+    def test_fts_syntax_in_terms_is_literal(self):
+        """Test that FTS operators in user input do not raise errors"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            with open(session, "w") as f:
+                f.write(json.dumps(_user_entry("use AND or NOT here")) + "\n")
+            index.update()
+
+            assert len(index.search('NOT "here')) == 1
+            index.close()
+
+    def test_compressed_sessions_are_indexed_once(self):
+        """Test that gzip transcripts are searchable and not reindexed"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            compressed = session.with_name("archived.jsonl.gz")
+            compressed.write_bytes(
+                gzip.compress(
+                    (json.dumps(_user_entry("Archived login fix")) + "\n").encode()
+                )
+            )
+
+            assert index.update() == 1
+            assert index.search("archived")[0].path == str(compressed)
+            assert index.update() == 0
+            index.close()
+
+    def test_update_streams_instead_of_reading_the_whole_tail(self):
+        """Test that new entries are read line by line, not in one read()"""
+
+        class LinesOnly:
+            """Session file that can only be iterated, not read() whole"""
+
+            def __init__(self, path):
+                self.file = open(path, "rb")
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                self.file.close()
+
+            def seek(self, offset):
+                self.file.seek(offset)
+
+            def __iter__(self):
+                return iter(self.file)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            index, session = self._setup(tmp)
+            with open(session, "w") as f:
+                for n in range(3):
+                    f.write(json.dumps(_user_entry(f"prompt number {n}")) + "\n")
+
+            with patch("src.search_index.open_session", LinesOnly):
+                assert index.update() == 3
+            index.close()
+
+    def test_sqlite_errors_are_explained(self):
+        """Test that missing FTS5 and a locked index raise a clear error"""
+        with tempfile.TemporaryDirectory() as tmp:
+            connection = MagicMock()
+            connection.execute.return_value.fetchone.return_value = (0,)
+            connection.executescript.side_effect = sqlite3.OperationalError(
+                "no such module: fts5"
+            )
+            with (
+                patch("src.search_index.sqlite3.connect", return_value=connection),
+                pytest.raises(SearchIndexError, match="FTS5"),
+            ):
+                SearchIndex(Path(tmp) / "search.db", Path(tmp))
+
+            index, session = self._setup(tmp)
+            session.write_text(json.dumps(_user_entry("locked")) + "\n")
+            locked = sqlite3.OperationalError("database is locked")
+            with (
+                patch.object(index, "_index_file", side_effect=locked),
+                pytest.raises(SearchIndexError, match="locked by another process"),
+            ):
+                index.update()
+            index.close()
+
+    def test_damaged_index_suggests_rebuilding(self):
+        """Test that a corrupt index file raises an error naming the fix"""
+        with tempfile.TemporaryDirectory() as tmp:
+            index_path = Path(tmp) / "search.db"
+            index_path.write_bytes(b"not an sqlite database" * 100)
+
+            with pytest.raises(SearchIndexError, match="delete it") as raised:
+                SearchIndex(index_path, Path(tmp))
+            assert str(index_path) in str(raised.value)
+
+            # Deleting the file is all it takes
+            index_path.unlink()
+            SearchIndex(index_path, Path(tmp)).close()
+
+            index, session = self._setup(tmp)
+            session.write_text(json.dumps(_user_entry("damaged")) + "\n")
+            malformed = sqlite3.DatabaseError("database disk image is malformed")
+            with (
+                patch.object(index, "_index_file", side_effect=malformed),
+                pytest.raises(SearchIndexError, match="next search rebuilds it"),
+            ):
+                index.update()
+            index.close()
@@ -0,0 +1,220 @@
+# ABOUTME: Test suite for pluggable status sections and their runner
+# ABOUTME: Tests TTL caching, concurrent timeouts, error capture and plugin loading
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.sections import (
+    ENTRY_POINT_GROUP,
+    Section,
+    SectionRunner,
+    SectionValue,
+    find_entry_points,
+    load_entry_point_sections,
+    load_section_spec,
+    section,
+)
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingSection(Section):
+    """Section answering with the number of times it was collected"""
+
+    name = "Count"
+    ttl = 30.0
+
+    def __init__(self):
+        self.calls = 0
+
+    def collect(self, project_path):
+        self.calls += 1
+        return f"call {self.calls}"
+
+
+class TestSectionRunner:
+    """Test cases for collecting sections behind TTL caches"""
+
+    def test_values_are_reused_until_their_ttl_expires(self):
+        """Test that a fresh value is served without collecting again"""
+        with tempfile.TemporaryDirectory() as tmp:
+            clock = FakeClock()
+            counting = CountingSection()
+            runner = SectionRunner([counting], Path(tmp) / "s.json", clock=clock)
+
+            assert runner.collect("/work/app") == [
+                SectionValue("Count", "call 1", None, 1000.0)
+            ]
+            clock.now += 10
+            assert runner.collect("/work/app")[0].text == "call 1"
+            assert counting.calls == 1
+
+            # A stale value is returned while the refresh runs in the background
+            clock.now += 30
+            assert runner.collect("/work/app")[0].text in ("call 1", "call 2")
+            runner.finish()
+            assert counting.calls == 2
+            assert runner.collect("/work/app")[0].text == "call 2"
+
+    def test_slow_section_does_not_delay_others(self):
+        """Test that sections run concurrently and waits stop at the timeout"""
+        release = threading.Event()
+
+        @section("Slow", timeout=0.1)
+        def slow(project_path):
+            release.wait(5)
+            return "finally"
+
+        @section("Fast", timeout=2.0)
+        def fast(project_path):
+            time.sleep(0.05)
+            return "quick"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = SectionRunner([slow, fast], Path(tmp) / "s.json")
+
+            started = time.monotonic()
+            values = runner.collect("/work/app")
+            assert time.monotonic() - started < 1
+            assert values[0] == SectionValue("Slow", None, None, None)
+            assert values[1].text == "quick"
+
+            # The hung refresh is not started a second time
+            assert runner.collect("/work/app")[0].fetched_at is None
+            assert len(runner._refreshing) == 1
+
+            # Its timeout has passed, so wait for the thread itself
+            ((refresh, _),) = runner._refreshing.values()
+            release.set()
+            refresh.join(5)
+            assert runner.collect("/work/app")[0].text == "finally"
+
+    def test_errors_are_captured_and_none_hides_the_section(self):
+        """Test that a failing plugin shows its error instead of raising"""
+
+        @section("Broken")
+        def broken(project_path):
+            raise RuntimeError("no token")
+
+        @section("Hidden")
+        def hidden(project_path):
+            return None
+
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = SectionRunner([broken, hidden], Path(tmp) / "s.json")
+
+            values = runner.collect("/work/app")
+
+        assert [(v.name, v.text, v.error) for v in values] == [
+            ("Broken", None, "RuntimeError: no token")
+        ]
+
+    def test_values_persist_between_processes(self):
+        """Test that a new runner starts from the saved values"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.json"
+            clock = FakeClock()
+            runner = SectionRunner([CountingSection()], path, clock=clock)
+            runner.collect("/work/app")
+            runner.finish()
+
+            counting = CountingSection()
+            restored = SectionRunner([counting], path, clock=clock)
+
+            assert restored.collect("/work/app")[0].text == "call 1"
+            assert counting.calls == 0
+
+
+class TestLoadSectionSpec:
+    """Test cases for loading sections named on the command line"""
+
+    def test_module_and_attribute_specs(self):
+        """Test loading a SECTIONS list and a single Section subclass"""
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "my_sections.py").write_text(
+                "from src.sections import Section, section\n"
+                "class CI(Section):\n"
+                "    name = 'CI'\n"
+                "    def collect(self, project_path):\n"
+                "        return 'passing'\n"
+                "@section('Tests', ttl=5)\n"
+                "def tests(project_path):\n"
+                "    return '12 passed'\n"
+                "SECTIONS = [CI, tests]\n"
+                "VERSION = '1.0'\n"
+                "class Unfinished(Section):\n"
+                "    name = 'Unfinished'\n"
+            )
+            with patch.object(sys, "path", [tmp, *sys.path]):
+                try:
+                    assert [s.name for s in load_section_spec("my_sections")] == [
+                        "CI",
+                        "Tests",
+                    ]
+                    assert [s.name for s in load_section_spec("my_sections:CI")] == [
+                        "CI"
+                    ]
+                    with pytest.raises(ImportError):
+                        load_section_spec("my_sections:missing")
+                    with pytest.raises(TypeError):
+                        load_section_spec("my_sections:VERSION")
+                    # A subclass without collect() fails when it is loaded
+                    with pytest.raises(TypeError):
+                        load_section_spec("my_sections:Unfinished")
+                finally:
+                    sys.modules.pop("my_sections", None)
+
+
+class TestEntryPointSections:
+    """Test cases for finding sections registered by installed packages"""
+
+    def test_scan_is_reused_until_sys_path_changes(self):
+        """Test that distribution metadata is only scanned after installs"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = Path(tmp) / "entry_points.json"
+            site = Path(tmp) / "site-packages"
+            site.mkdir()
+            (site / "ci_plugin.py").write_text(
+                "from src.sections import section\n"
+                "@section('CI')\n"
+                "def ci(project_path):\n"
+                "    return 'passing'\n"
+            )
+            found = [("ci", "ci_plugin:ci")]
+
+            with (
+                patch.object(sys, "path", [str(site), *sys.path]),
+                patch("src.sections._scan_entry_points", return_value=found) as scan,
+            ):
+                try:
+                    sections = load_entry_point_sections(cache_path)
+                    assert [s.name for s in sections] == ["CI"]
+                    assert scan.call_count == 1
+
+                    entry_point = find_entry_points(cache_path)[0]
+                    assert (entry_point.name, entry_point.group) == (
+                        "ci",
+                        ENTRY_POINT_GROUP,
+                    )
+                    assert scan.call_count == 1
+
+                    # Installing a package changes its site directory
+                    (site / "other-1.0.dist-info").mkdir()
+                    find_entry_points(cache_path)
+                    assert scan.call_count == 2
+                finally:
+                    sys.modules.pop("ci_plugin", None)
@@ -0,0 +1,183 @@
+# ABOUTME: Test suite for compacting finished sessions into columnar summaries
+# ABOUTME: Tests summary contents, staleness checks and search over compacted sessions
+
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.search_index import SearchIndex
+from src.session_archive import SessionArchive, build_summary
+
+
+def _write_session(path: Path) -> None:
+    entries = [
+        {
+            "type": "user",
+            "sessionId": "session-1",
+            "message": {"role": "user", "content": "Fix the login bug"},
+            "timestamp": "2025-06-29T14:05:25.270Z",
+        },
+        {
+            "type": "assistant",
+            "sessionId": "session-1",
+            "message": {
+                "role": "assistant",
+                "content": [
+                    {
+                        "type": "tool_use",
+                        "name": "TodoWrite",
+                        "input": {
+                            "todos": [
+                                {"content": "Write test", "status": "completed"},
+                                {"content": "Fix handler", "status": "pending"},
+                            ]
+                        },
+                    }
+                ],
+                "usage": {"input_tokens": 10, "output_tokens": 5},
+            },
+            "timestamp": "2025-06-29T14:06:25.270Z",
+        },
+    ]
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+class TestSessionArchive:
+    def _setup(self, tmp: str) -> tuple:
+        projects_dir = Path(tmp) / "projects"
+        (projects_dir / "-home-user-project").mkdir(parents=True)
+        session = projects_dir / "-home-user-project" / "session.jsonl"
+        _write_session(session)
+        archive = SessionArchive(Path(tmp) / "archive", projects_dir)
+        return archive, session, projects_dir
+
+    def test_build_summary_columns(self):
+        """Test that prompts, todo events and usage land in columns"""
+        with tempfile.TemporaryDirectory() as tmp:
+            _, session, _ = self._setup(tmp)
+
+            summary = build_summary(session)
+
+            assert summary["prompts"]["text"] == ["Fix the login bug"]
+            assert summary["prompts"]["offset"] == [0]
+            assert summary["todos"]["content"] == ["Write test", "Fix handler"]
+            assert summary["todos"]["event"] == [0, 0]
+            assert summary["usage"]["tool_uses"] == 1
+            assert summary["usage"]["input_tokens"] == 10
+            assert summary["offset"] == session.stat().st_size
+            assert summary["session_id"] == "session-1"
+
+    def test_build_summary_counts_each_response_once(self):
+        """Test that entries sharing a message id add their usage once"""
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+            with open(session, "w") as f:
+                for text in ("Reading", "Editing"):
+                    entry = {
+                        "type": "assistant",
+                        "message": {
+                            "id": "msg_1",
+                            "role": "assistant",
+                            "content": [{"type": "text", "text": text}],
+                            "usage": {"input_tokens": 10, "output_tokens": 5},
+                        },
+                    }
+                    f.write(json.dumps(entry) + "\n")
+
+            usage = build_summary(session)["usage"]
+
+        assert usage["assistant"] == 2
+        assert usage["input_tokens"] == 10
+        assert usage["output_tokens"] == 5
+
+    def test_compact_only_finished_sessions(self):
+        """Test that recently written sessions are left alone"""
+        with tempfile.TemporaryDirectory() as tmp:
+            archive, session, _ = self._setup(tmp)
+
+            assert archive.compact(finished_after=3600).sessions == 0
+
+            old = time.time() - 7200
+            os.utime(session, (old, old))
+            with patch.dict(os.environ, {"XDG_CACHE_HOME": tmp}):
+                result = archive.compact(finished_after=3600, keep_gzip_copy=True)
+            assert result.sessions == 1
+            assert archive.load(session).prompts["text"] == ["Fix the login bug"]
+
+            copy = archive.summary_path(session).with_name("session.jsonl.gz")
+            with gzip.open(copy, "rb") as f:
+                assert f.read() == session.read_bytes()
+            # The copy's frame index was cached when it was written
+            assert list((Path(tmp) / "claude_status" / "frames").glob("*.json"))
+
+            # Already current summaries are not rebuilt
+            assert archive.compact(finished_after=3600).sessions == 0
+
+    def test_write_failure_skips_only_that_session(self):
+        """Test that a summary that cannot be written does not stop compaction"""
+        with tempfile.TemporaryDirectory() as tmp:
+            archive, session, projects_dir = self._setup(tmp)
+            other = projects_dir / "-home-user-project" / "other.jsonl"
+            _write_session(other)
+            write_atomic = archive._write_atomic
+
+            def fail_for_session(path, data):
+                if path == archive.summary_path(session):
+                    raise OSError(28, "No space left on device")
+                return write_atomic(path, data)
+
+            with patch.object(archive, "_write_atomic", side_effect=fail_for_session):
+                result = archive.compact(finished_after=0)
+
+            assert result.sessions == 1
+            assert archive.load(other) is not None
+            assert archive.load(session) is None
+            assert [path for path, _ in result.failed] == [str(session)]
+            assert "No space left" in result.failed[0][1]
+
+    def test_compact_compressed_sessions(self):
+        """Test that gzip transcripts are summarized like plain ones"""
+        with tempfile.TemporaryDirectory() as tmp:
+            archive, session, _ = self._setup(tmp)
+            compressed = session.with_name("session.jsonl.gz")
+            compressed.write_bytes(gzip.compress(session.read_bytes()))
+            session.unlink()
+
+            assert archive.finished_sessions(finished_after=0) == [compressed]
+            assert archive.compact(finished_after=0).sessions == 1
+            summary = archive.load(compressed)
+            assert summary.prompts["text"] == ["Fix the login bug"]
+            assert archive.summary_path(compressed).name == "session.summary.json.gz"
+
+    def test_changed_session_invalidates_summary(self):
+        """Test that a summary is ignored once its session file changes"""
+        with tempfile.TemporaryDirectory() as tmp:
+            archive, session, _ = self._setup(tmp)
+            archive.compact(finished_after=0)
+            assert archive.load(session) is not None
+
+            with open(session, "a") as f:
+                f.write("\n")
+            assert archive.load(session) is None
+
+    def test_search_reads_summary_instead_of_raw_json(self):
+        """Test that search indexes a compacted session from its summary"""
+        with tempfile.TemporaryDirectory() as tmp:
+            archive, _, projects_dir = self._setup(tmp)
+            archive.compact(finished_after=0)
+            index = SearchIndex(Path(tmp) / "search.db", projects_dir, archive)
+
+            with patch.object(SearchIndex, "_index_entry") as raw_indexer:
+                assert index.update() == 3
+                raw_indexer.assert_not_called()
+
+            assert [result.kind for result in index.search("login")] == ["prompt"]
+            assert index.search("handler")[0].session_id == "session-1"
+            assert index.update() == 0
+            index.close()
@@ -0,0 +1,150 @@
+# ABOUTME: Test suite for the serial and asyncio project status collectors
+# ABOUTME: Tests that JSONL parsing and git queries are combined into one status
+
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from src.git_integration import GitIntegration
+from src.jsonl_parser import JSONLParser
+from src.parse_cache import ParseCache
+from src.status_collector import (
+    collect_many_async,
+    collect_sessions,
+    collect_status,
+    collect_status_async,
+)
+
+EXAMPLE_JSONL = Path(__file__).parent.parent / "example.jsonl"
+
+
+def _fake_git(args, repo_path=None, timeout=10):
+    """Answer git queries the way a repository with one commit would"""
+    if args[0] == "rev-parse":
+        return 0, ".git\n"
+    if args[-1] == "--pretty=format:%s":
+        return 0, f"Commit in {repo_path}\n"
+    return 0, "1751200000\n"
+
+
+class TestStatusCollector:
+    def test_collect_status_async_combines_session_and_git(self):
+        """Test that the async collector fills in prompt, todos and commit"""
+        with patch.object(
+            GitIntegration, "_run_git_async", AsyncMock(side_effect=_fake_git)
+        ) as mock_git:
+            status = asyncio.run(collect_status_async("/repo", EXAMPLE_JSONL))
+
+        assert status.prompt == "Do not do anything right now, this is a test."
+        assert status.todos is not None and len(status.todos) == 4
+        assert status.is_git_repository is True
+        assert status.commit_message == "Commit in /repo"
+        assert status.commit_timestamp == 1751200000.0
+        assert mock_git.call_count == 3
+
+    def test_collect_status_async_without_repository(self):
+        """Test that commit details are dropped outside a git repository"""
+        with patch.object(
+            GitIntegration, "_run_git_async", AsyncMock(return_value=(128, ""))
+        ):
+            status = asyncio.run(collect_status_async("/not-a-repo", None))
+
+        assert status.prompt is None
+        assert status.is_git_repository is False
+        assert status.commit_message is None
+
+    def test_collect_many_async_preserves_order_and_bounds_fan_out(self):
+        """Test that many projects are collected concurrently up to the limit"""
+        running = 0
+        peak = 0
+
+        async def slow_git(args, repo_path=None, timeout=10):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return _fake_git(args, repo_path, timeout)
+
+        projects = [(f"/repo{i}", None) for i in range(6)]
+        with patch.object(
+            GitIntegration, "_run_git_async", AsyncMock(side_effect=slow_git)
+        ):
+            statuses = asyncio.run(collect_many_async(projects, concurrency=2))
+
+        assert [status.project_path for status in statuses] == [
+            f"/repo{i}" for i in range(6)
+        ]
+        assert statuses[5].commit_message == "Commit in /repo5"
+        # Two projects at a time, each running its three git queries at once
+        assert peak == 6
+
+    def test_collect_sessions_shares_one_git_query(self):
+        """Test that sessions of one project are parsed apart but share git"""
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for n in range(3):
+                path = Path(tmp) / f"session-{n}.jsonl"
+                entry = {
+                    "type": "user",
+                    "sessionId": f"id-{n}",
+                    "message": {"role": "user", "content": f"Prompt {n}"},
+                }
+                path.write_text(json.dumps(entry) + "\n")
+                paths.append(path)
+
+            with (
+                patch.object(
+                    GitIntegration, "is_git_repository", return_value=True
+                ) as is_repo,
+                patch.object(
+                    GitIntegration, "get_last_commit_message", return_value="Fix"
+                ),
+                patch.object(
+                    GitIntegration, "get_last_commit_timestamp", return_value=1.0
+                ),
+            ):
+                statuses = collect_sessions(
+                    "/repo", paths, parser=JSONLParser(cache=ParseCache())
+                )
+
+            assert [s.prompt for s in statuses] == ["Prompt 0", "Prompt 1", "Prompt 2"]
+            assert [s.session_id for s in statuses] == ["id-0", "id-1", "id-2"]
+            assert all(s.commit_message == "Fix" for s in statuses)
+            assert all(s.last_activity is not None for s in statuses)
+            assert is_repo.call_count == 1
+
+    def test_abandoned_subagents_are_not_listed(self):
+        """Test that a sidechain quiet for longer than STALE_AFTER is dropped"""
+
+        def entry(uuid, parent, sidechain, content, age):
+            return {
+                "type": "user",
+                "uuid": f"00000000-0000-0000-0000-00000000000{uuid}",
+                "parentUuid": (
+                    f"00000000-0000-0000-0000-00000000000{parent}" if parent else None
+                ),
+                "isSidechain": sidechain,
+                "timestamp": time.strftime(
+                    "%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(time.time() - age)
+                ),
+                "message": {"role": "user", "content": content},
+            }
+
+        with tempfile.TemporaryDirectory() as tmp:
+            session = Path(tmp) / "session.jsonl"
+            with open(session, "w") as f:
+                for line in (
+                    entry("1", None, False, "Main prompt", 7200),
+                    entry("2", "1", True, "Interrupted task", 7200),
+                    entry("3", "1", True, "Running task", 60),
+                ):
+                    f.write(json.dumps(line) + "\n")
+
+            with patch.object(GitIntegration, "is_git_repository", return_value=False):
+                status = collect_status(None, session, include_subagents=True)
+
+        assert [branch.prompt for branch in status.subagents] == ["Running task"]
@@ -0,0 +1,44 @@
+# ABOUTME: Test suite for the atomic status file writer used by prompt integrations
+# ABOUTME: Tests that files are replaced atomically and only when content changes
+
+import os
+import tempfile
+from pathlib import Path
+
+from src.status_file import StatusFileWriter
+
+
+class TestStatusFileWriter:
+    def test_writes_only_on_change(self):
+        """Test that identical content does not rewrite the file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "status" / "project.txt"
+            writer = StatusFileWriter()
+
+            assert writer.write(path, "line1\nline2\n") is True
+            inode = path.stat().st_ino
+            assert writer.write(path, "line1\nline2\n") is False
+            assert path.stat().st_ino == inode
+
+            assert writer.write(path, "changed\n") is True
+            assert path.read_text() == "changed\n"
+
+    def test_existing_identical_file_is_not_rewritten(self):
+        """Test that a fresh writer leaves an up-to-date file alone"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "project.txt"
+            path.write_text("same\n")
+            inode = path.stat().st_ino
+
+            assert StatusFileWriter().write(path, "same\n") is False
+            assert path.stat().st_ino == inode
+
+    def test_no_temporary_files_left_behind(self):
+        """Test that the atomic replace leaves only the destination file"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "project.txt"
+            writer = StatusFileWriter()
+            writer.write(path, "one\n")
+            writer.write(path, "two\n")
+
+            assert os.listdir(tmp) == ["project.txt"]
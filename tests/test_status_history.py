@@ -0,0 +1,189 @@
+# ABOUTME: Test suite for the SQLite status history recorder
+# ABOUTME: Tests change detection, batched writes, downsampling and trend queries
+
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.activity import STALE_AFTER, Activity
+from src.status_collector import ProjectStatus
+from src.status_history import StatusHistory, TrendPoint
+
+DAY = 86400.0
+START = 100 * DAY  # midnight UTC
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self, now: float = START):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _status(prompt: str = "Fix bug", done: int = 0, state: str = "working"):
+    todos = [{"content": f"t{n}", "status": "completed"} for n in range(done)]
+    todos.append({"content": "next", "status": "pending"})
+    return ProjectStatus(
+        project_path="/work/app",
+        session_id="s1",
+        prompt=prompt,
+        todos=todos,
+        activity=Activity(state),
+    )
+
+
+def _rows(history: StatusHistory) -> list:
+    return history.conn.execute(
+        "SELECT resolution, COUNT(*), SUM(count), SUM(working) FROM samples "
+        "GROUP BY resolution ORDER BY resolution"
+    ).fetchall()
+
+
+class TestStatusHistory:
+    """Test cases for recording and downsampling status snapshots"""
+
+    def test_only_changed_snapshots_are_recorded(self):
+        """Test that repeated identical statuses are dropped"""
+        with tempfile.TemporaryDirectory() as tmp:
+            history = StatusHistory(Path(tmp) / "h.db", clock=FakeClock())
+
+            assert history.record(_status())
+            assert not history.record(_status())
+            assert history.record(_status(done=1))
+            assert history.record(_status(done=1, state="idle"))
+            history.flush()
+
+            assert _rows(history) == [(0, 3, 3, 2)]
+            history.close()
+
+    def test_writes_are_batched(self):
+        """Test that snapshots wait in memory until a batch is due"""
+        with tempfile.TemporaryDirectory() as tmp:
+            clock = FakeClock()
+            history = StatusHistory(
+                Path(tmp) / "h.db", batch_size=3, flush_interval=60, clock=clock
+            )
+
+            history.record(_status("a"))
+            history.record(_status("b"))
+            assert _rows(history) == []
+            history.record(_status("c"))
+            assert _rows(history) == [(0, 3, 3, 3)]
+
+            history.record(_status("d"))
+            clock.now += 61
+            history.record(_status("e"))  # the interval elapsed
+            assert _rows(history) == [(0, 5, 5, 5)]
+            history.close()
+
+    def test_restart_continues_from_stored_snapshot(self):
+        """Test that reopening the database does not repeat the last snapshot"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "h.db"
+            history = StatusHistory(path, clock=FakeClock())
+            history.record(_status())
+            history.close()
+
+            history = StatusHistory(path, clock=FakeClock())
+            assert not history.record(_status())
+            assert history.record(_status("Next prompt"))
+            history.close()
+
+    def test_downsampling_keeps_counts(self):
+        """Test that old snapshots become per-minute, then per-hour rows"""
+        with tempfile.TemporaryDirectory() as tmp:
+            clock = FakeClock()
+            history = StatusHistory(Path(tmp) / "h.db", batch_size=1000, clock=clock)
+            for n in range(360):  # one snapshot every 10 seconds for an hour
+                history.record(
+                    _status(f"p{n}", state="working" if n % 2 else "idle"),
+                    now=START + 10 * n,
+                )
+            history.flush()
+            assert _rows(history) == [(0, 360, 360, 180)]
+
+            clock.now = START + 2 * DAY
+            history.downsample()
+            assert _rows(history) == [(60, 60, 360, 180)]
+
+            clock.now = START + 9 * DAY
+            history.downsample()
+            assert _rows(history) == [(3600, 1, 360, 180)]
+            # The last snapshot lasted until the first downsampling pass
+            assert history.conn.execute(
+                "SELECT seconds, working_seconds FROM samples"
+            ).fetchone() == (2 * DAY, 179 * 10 + STALE_AFTER)
+
+            # The merged row keeps the last snapshot of its bucket
+            assert history.conn.execute(
+                "SELECT time, activity FROM samples"
+            ).fetchall() == [(START, "working")]
+            history.close()
+
+    def test_trend_per_day(self):
+        """Test that trend points summarize each day"""
+        with tempfile.TemporaryDirectory() as tmp:
+            clock = FakeClock(START + 3 * DAY)
+            history = StatusHistory(Path(tmp) / "h.db", clock=clock)
+            history.record(_status("a"), now=START + 100)
+            history.record(_status("b", done=1), now=START + 200)
+            history.record(_status("b", done=1, state="idle"), now=START + 300)
+            history.record(_status("c", done=2), now=START + DAY + 100)
+
+            # Working for 200 of the day's seconds; the last working snapshot
+            # counts for STALE_AFTER, after which it would have read idle
+            assert history.trend("/work/app", START) == [
+                TrendPoint(START, 3, 2, 0, 1, 2, 200 / DAY),
+                TrendPoint(START + DAY, 1, 1, 0, 2, 3, STALE_AFTER / (2 * DAY - 100)),
+            ]
+            assert history.trend("/other", START) == []
+            history.close()
+
+    def test_working_share_is_weighted_by_time(self):
+        """Test that long working spans outweigh short idle blips"""
+        with tempfile.TemporaryDirectory() as tmp:
+            clock = FakeClock(START + 3600)
+            history = StatusHistory(Path(tmp) / "h.db", clock=clock)
+            history.record(_status("a"), now=START)
+            history.record(_status("a", state="idle"), now=START + 1200)
+            history.record(_status("b"), now=START + 1210)
+            history.record(_status("b", state="idle"), now=START + 1220)
+
+            # Half of the snapshots, but 1210 of the hour's 3600 seconds
+            (point,) = history.trend("/work/app", START, step=3600)
+            assert point.working == pytest.approx(1210 / 3600)
+
+            # Merged rows keep the seconds, so the share survives downsampling
+            clock.now = START + 9 * DAY
+            before = history.trend("/work/app", START)
+            history.downsample()
+            assert _rows(history) == [(3600, 1, 4, 2)]
+            assert history.trend("/work/app", START) == before
+            assert before[0].working == pytest.approx(1210 / (9 * DAY))
+            history.close()
+
+    def test_older_databases_gain_the_time_columns(self):
+        """Test that a database from before time weighting is upgraded"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "h.db"
+            conn = sqlite3.connect(str(path))
+            conn.execute(
+                "CREATE TABLE samples (project TEXT NOT NULL, "
+                "session_id TEXT NOT NULL, time REAL NOT NULL, "
+                "resolution INTEGER NOT NULL, count INTEGER NOT NULL, "
+                "working INTEGER NOT NULL, prompt_hash TEXT, "
+                "todos_completed INTEGER, todos_in_progress INTEGER, "
+                "todos_pending INTEGER, commit_hash TEXT, activity TEXT)"
+            )
+            conn.close()
+
+            history = StatusHistory(path, clock=FakeClock(START + 60))
+            history.record(_status(), now=START)
+            (point,) = history.trend("/work/app", START)
+            assert point.working == 1.0
+            history.close()
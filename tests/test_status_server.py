@@ -0,0 +1,135 @@
+# ABOUTME: Test suite for the read-only HTTP status server and its status board
+# ABOUTME: Tests JSON endpoints, ETag revalidation and server-sent change events
+
+import http.client
+import json
+import threading
+
+from src.status_server import StatusBoard, StatusServer, etag_matches
+
+
+class _Documents:
+    """Stand-in renderer whose output the test changes at will"""
+
+    def __init__(self) -> None:
+        self.documents = {
+            "/work/a": json.dumps({"project": "/work/a", "prompt": "A"}) + "\n",
+            "/work/b": json.dumps({"project": "/work/b", "prompt": "B"}) + "\n",
+        }
+        self.calls = 0
+
+    def __call__(self) -> dict:
+        self.calls += 1
+        return dict(self.documents)
+
+
+class TestStatusServer:
+    def _start(self, render: _Documents) -> StatusServer:
+        server = StatusServer(
+            ("127.0.0.1", 0), StatusBoard(render), interval=3600, heartbeat=0.05
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def _get(self, server: StatusServer, path: str, headers: dict = None):
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        return response, body
+
+    def test_status_and_projects_endpoints(self):
+        """Test that both endpoints serve the rendered JSON documents"""
+        server = self._start(_Documents())
+        try:
+            response, body = self._get(server, "/status")
+            assert response.status == 200
+            assert json.loads(body)["prompt"] == "A"
+
+            _, body = self._get(server, "/status?project=/work/b")
+            assert json.loads(body)["prompt"] == "B"
+
+            response, body = self._get(server, "/projects")
+            assert [doc["prompt"] for doc in json.loads(body)["projects"]] == [
+                "A",
+                "B",
+            ]
+
+            response, _ = self._get(server, "/status?project=/elsewhere")
+            assert response.status == 404
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test that a polling client with the current ETag gets a 304"""
+        render = _Documents()
+        server = self._start(render)
+        try:
+            response, _ = self._get(server, "/projects")
+            etag = response.getheader("ETag")
+
+            response, body = self._get(server, "/projects", {"If-None-Match": etag})
+            assert response.status == 304
+            assert body == b""
+
+            render.documents["/work/a"] = json.dumps({"prompt": "changed"}) + "\n"
+            assert server.board.refresh() is True
+            response, _ = self._get(server, "/projects", {"If-None-Match": etag})
+            assert response.status == 200
+            assert response.getheader("ETag") != etag
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_unchanged_refresh_publishes_nothing(self):
+        """Test that identical renders keep the version and ETag"""
+        board = StatusBoard(_Documents())
+        assert board.refresh() is True
+        etag = board.all_documents()[1]
+
+        assert board.refresh() is False
+        assert board.version == 1
+        assert board.all_documents()[1] == etag
+
+    def test_events_stream_pushes_changes(self):
+        """Test that the event stream sends the state, then each new version"""
+        render = _Documents()
+        server = self._start(render)
+        try:
+            conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+            conn.request("GET", "/events")
+            response = conn.getresponse()
+            assert response.getheader("Content-Type") == "text/event-stream"
+
+            def next_event() -> dict:
+                lines = []
+                while True:
+                    line = response.fp.readline().decode("utf-8").rstrip("\n")
+                    if line.startswith(":"):
+                        continue  # keep-alive
+                    if not line and lines:
+                        break
+                    if line:
+                        lines.append(line)
+                data = [line[6:] for line in lines if line.startswith("data: ")]
+                return json.loads(data[0])
+
+            assert next_event()["projects"][0]["prompt"] == "A"
+
+            render.documents["/work/a"] = json.dumps({"prompt": "pushed"}) + "\n"
+            server.board.refresh()
+            assert next_event()["projects"][0]["prompt"] == "pushed"
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_etag_matches_header_forms(self):
+        """Test list, weak and wildcard forms of If-None-Match"""
+        assert etag_matches('"a", "b"', '"b"')
+        assert etag_matches('W/"b"', '"b"')
+        assert etag_matches("*", '"b"')
+        assert not etag_matches(None, '"b"')
+        assert not etag_matches('"a"', '"b"')
@@ -0,0 +1,75 @@
+# ABOUTME: Test suite for terminal display width and truncation helpers
+# ABOUTME: Tests mixed-width text, combining marks, ANSI escapes and long inputs
+
+from src.text_width import (
+    RESET,
+    char_width,
+    display_width,
+    exceeds_width,
+    truncate_to_width,
+)
+
+
+class TestTextWidth:
+    def test_char_width(self):
+        """Test cell widths for narrow, wide, emoji and zero-width characters"""
+        assert char_width("a") == 1
+        assert char_width("漢") == 2
+        assert char_width("😀") == 2
+        assert char_width("\u0301") == 0  # combining acute accent
+        assert char_width("\u200d") == 0  # zero-width joiner
+
+    def test_display_width_mixed_text(self):
+        """Test width of text mixing ASCII, CJK and escape sequences"""
+        assert display_width("abc") == 3
+        assert display_width("日本語") == 6
+        assert display_width("\x1b[96mhi\x1b[0m") == 2
+        assert display_width("é") == 1
+
+    def test_ascii_truncation_matches_slicing(self):
+        """Test that plain ASCII truncates exactly like the old slicing"""
+        text = "x" * 50
+        assert truncate_to_width(text, 20) == text[:17] + "..."
+        assert truncate_to_width("short", 20) == "short"
+
+    def test_wide_characters_are_not_split(self):
+        """Test that a wide character straddling the cut is dropped whole"""
+        result = truncate_to_width("日本語のテキストです", 10)
+
+        assert result == "日本語..."
+        assert display_width(result) <= 10
+
+        result = truncate_to_width("a日本語のテキスト", 10)
+        assert result == "a日本語..."
+        assert display_width(result) == 10
+
+    def test_escape_sequences_are_not_cut(self):
+        """Test that ANSI escapes are kept whole and colors are reset"""
+        text = "\x1b[96m" + "a" * 30 + "\x1b[0m"
+
+        result = truncate_to_width(text, 10)
+
+        assert result == "\x1b[96m" + "a" * 7 + "..." + RESET
+        assert display_width(result) == 10
+        assert truncate_to_width("\x1b[96mok\x1b[0m", 10) == "\x1b[96mok\x1b[0m"
+
+    def test_single_line_replaces_line_breaks(self):
+        """Test that newlines become spaces while truncating"""
+        assert truncate_to_width("one\ntwo\r\nthree", 80, single_line=True) == (
+            "one two  three"
+        )
+        assert truncate_to_width("one\ntwo three", 9, single_line=True) == ("one tw...")
+
+    def test_huge_input_scans_only_the_budget(self):
+        """Test that only the first cells of a huge prompt are examined"""
+        huge = "é" * 5_000_000 + "\n"
+
+        assert exceeds_width(huge, 80)
+        result = truncate_to_width(huge, 80, single_line=True)
+        assert result == "é" * 77 + "..."
+
+    def test_tiny_widths(self):
+        """Test widths too small for the ellipsis"""
+        assert truncate_to_width("abcdef", 0) == ""
+        assert truncate_to_width("abcdef", 2) == "ab"
+        assert not exceeds_width("", 0)
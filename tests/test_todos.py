@@ -0,0 +1,77 @@
+# ABOUTME: Test suite for the compact todo records and their precomputed summary
+# ABOUTME: Tests conversion from TodoWrite JSON, status counts and current todo choice
+
+from src.todos import Todo, TodoList, TodoPriority, TodoStatus
+
+
+class TestTodoList:
+    def test_from_dicts_interns_status_and_priority(self):
+        """Test that statuses and priorities become shared enum members"""
+        todos = TodoList.from_dicts(
+            [
+                {"id": "1", "content": "Write test", "status": "completed"},
+                {"content": "Fix code", "status": "in_progress", "priority": "HIGH"},
+            ]
+        )
+
+        assert todos[0].status is TodoStatus.COMPLETED
+        assert todos[1].priority is TodoPriority.HIGH
+        assert todos[0].priority is TodoPriority.NONE
+        assert not hasattr(todos[0], "__dict__")
+
+    def test_summary_is_computed_once(self):
+        """Test the counts and the current todo of a mixed list"""
+        todos = TodoList.from_dicts(
+            [
+                {"content": "Done", "status": "completed"},
+                {"content": "Next", "status": "pending"},
+                {"content": "Now", "status": "in_progress"},
+                {"content": "Later", "status": "pending"},
+            ]
+        )
+
+        assert todos.counts == {"completed": 1, "pending": 2, "in_progress": 1}
+        assert todos.current.content == "Now"
+        assert not todos.current_completed
+
+    def test_current_falls_back_to_pending_then_last(self):
+        """Test current todo selection without in-progress or pending todos"""
+        pending = TodoList.from_dicts(
+            [
+                {"content": "Done", "status": "completed"},
+                {"content": "Next", "status": "pending"},
+            ]
+        )
+        assert pending.current.content == "Next"
+
+        finished = TodoList.from_dicts(
+            [
+                {"content": "First", "status": "completed"},
+                {"content": "Last", "status": "completed"},
+            ]
+        )
+        assert finished.current.content == "Last"
+        assert finished.current_completed
+
+    def test_malformed_values_do_not_raise(self):
+        """Test that unexpected statuses, priorities and items are tolerated"""
+        todos = TodoList.from_dicts(
+            [
+                {"content": "Odd", "status": ["x"], "priority": 3},
+                "not a todo",
+                {"status": "blocked"},
+            ]
+        )
+
+        assert len(todos) == 2
+        assert todos[0].status is TodoStatus.UNKNOWN
+        assert todos[0].priority is TodoPriority.NONE
+        assert todos[1].content == "Unknown todo"
+        assert todos.counts == {"unknown": 2}
+
+    def test_round_trip_to_dicts(self):
+        """Test conversion back to TodoWrite JSON"""
+        raw = [{"content": "Ship", "status": "pending", "priority": "low", "id": "7"}]
+
+        assert TodoList.from_dicts(raw).to_dicts() == raw
+        assert Todo.from_dict(raw[0]) == Todo("Ship", priority=TodoPriority.LOW, id="7")
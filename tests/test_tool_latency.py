@@ -0,0 +1,171 @@
+# ABOUTME: Test suite for tool-call latency analytics over session files
+# ABOUTME: Tests the tool_use/tool_result join, eviction, statistics and the cache
+
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from src.tool_latency import (
+    ToolLatencyCache,
+    scan_tool_calls,
+    summarize,
+)
+
+
+def _timestamp(seconds: float) -> str:
+    return f"2025-06-29T14:{int(seconds) // 60:02d}:{seconds % 60:06.3f}Z"
+
+
+def _use(tool_id: str, name: str, at: float) -> dict:
+    return {
+        "type": "assistant",
+        "message": {
+            "role": "assistant",
+            "content": [{"type": "tool_use", "id": tool_id, "name": name}],
+        },
+        "timestamp": _timestamp(at),
+    }
+
+
+def _result(tool_id: str, at: float, is_error: bool = False) -> dict:
+    item = {"type": "tool_result", "tool_use_id": tool_id, "content": "ok"}
+    if is_error:
+        item["is_error"] = True
+    return {
+        "type": "user",
+        "message": {"role": "user", "content": [item]},
+        "timestamp": _timestamp(at),
+    }
+
+
+def _write(path: Path, entries: list, mode: str = "w") -> None:
+    with open(path, mode) as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+class TestScanToolCalls:
+    def test_pairs_calls_with_results(self):
+        """Test latencies, error rates and percentiles per tool"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            entries = []
+            for i, seconds in enumerate([1, 2, 3, 4, 10]):
+                start = i * 20
+                entries.append(_use(f"b{i}", "Bash", start))
+                entries.append(_result(f"b{i}", start + seconds, is_error=i == 4))
+            entries.append(_use("e1", "Edit", 200))
+            entries.append(_result("e1", 200.5))
+            _write(path, entries)
+
+            stats = {s.tool: s for s in summarize([scan_tool_calls(path)])}
+
+            assert stats["Bash"].count == 5
+            assert stats["Bash"].p50 == 3.0
+            assert stats["Bash"].p95 == 10.0
+            assert stats["Bash"].max == 10.0
+            assert stats["Bash"].error_rate == 0.2
+            assert stats["Edit"].count == 1
+            assert stats["Edit"].p50 == 0.5
+            assert list(stats) == ["Bash", "Edit"]
+
+    def test_bounded_pending_map_evicts_oldest(self):
+        """Test that calls without results are dropped once too many wait"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            _write(
+                path,
+                [_use("a", "Task", 0), _use("b", "Read", 1), _use("c", "Read", 2)]
+                + [_result("c", 3)],
+            )
+
+            state = scan_tool_calls(path, max_pending=2)
+
+            assert state["unanswered"] == {"Task": 1}
+            assert [call[0] for call in state["pending"]] == ["b"]
+            assert state["calls"] == {"Read": 1}
+
+    def test_continues_from_offset(self):
+        """Test that a result appended later is joined with an earlier call"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            _write(path, [_use("a", "Bash", 0)])
+            state = scan_tool_calls(path)
+            first_offset = state["offset"]
+
+            _write(path, [_result("a", 7)], mode="a")
+            with patch("src.tool_latency.json.loads", wraps=json.loads) as loads:
+                state = scan_tool_calls(path, state)
+
+            assert loads.call_count == 1
+            assert state["offset"] > first_offset
+            assert state["durations"] == {"Bash": [7.0]}
+
+    def test_partial_line_is_left_for_next_scan(self):
+        """Test that a line still being written is not consumed"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            _write(path, [_use("a", "Bash", 0)])
+            with open(path, "a") as f:
+                f.write(json.dumps(_result("a", 2))[:20])
+            size_before_partial = len(json.dumps(_use("a", "Bash", 0))) + 1
+
+            state = scan_tool_calls(path)
+
+            assert state["offset"] == size_before_partial
+            assert state["calls"] == {}
+
+
+class TestToolLatencyCache:
+    def test_reruns_skip_unchanged_files(self):
+        """Test that cached states are reused across cache instances"""
+        with tempfile.TemporaryDirectory() as tmp:
+            sessions = []
+            for n in range(3):
+                path = Path(tmp) / f"s{n}.jsonl"
+                _write(path, [_use(f"t{n}", "Grep", 0), _result(f"t{n}", n + 1)])
+                sessions.append(path)
+            cache_path = Path(tmp) / "cache" / "tool_latency.json"
+
+            stats = ToolLatencyCache(cache_path).analyze(sessions, workers=2)
+            assert stats[0].count == 3
+            assert stats[0].max == 3.0
+
+            with patch("src.tool_latency.scan_tool_calls") as scan:
+                again = ToolLatencyCache(cache_path).analyze(sessions, workers=1)
+                scan.assert_not_called()
+            assert again == stats
+
+    def test_replaced_file_is_rescanned(self):
+        """Test that a file with a new inode starts over"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "session.jsonl"
+            _write(path, [_use("a", "Bash", 0), _result("a", 1)])
+            cache = ToolLatencyCache(Path(tmp) / "tool_latency.json")
+            cache.analyze([path], workers=1)
+
+            replacement = Path(tmp) / "new.jsonl"
+            _write(replacement, [_use("b", "Edit", 0), _result("b", 2)])
+            replacement.replace(path)
+            stats = cache.analyze([path], workers=1)
+
+            assert [s.tool for s in stats] == ["Edit"]
+
+    def test_compressed_sessions_are_scanned_once(self):
+        """Test that a gzip transcript is decompressed and then left alone"""
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = Path(tmp) / "plain.jsonl"
+            _write(plain, [_use("a", "Bash", 0), _result("a", 2)])
+            path = Path(tmp) / "session.jsonl.gz"
+            path.write_bytes(gzip.compress(plain.read_bytes()))
+            plain.unlink()
+            cache = ToolLatencyCache(Path(tmp) / "tool_latency.json")
+
+            stats = cache.analyze([path], workers=1)
+            assert [(s.tool, s.max) for s in stats] == [("Bash", 2.0)]
+
+            with patch("src.tool_latency.scan_tool_calls") as scan:
+                assert cache.analyze([path], workers=1) == stats
+                scan.assert_not_called()
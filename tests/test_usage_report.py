@@ -0,0 +1,203 @@
+# ABOUTME: Test suite for the historical per-project activity report
+# ABOUTME: Tests per-file aggregates, incremental rescans, merging and the file cache
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src import usage_report
+from src.session_archive import SessionArchive
+from src.usage_report import (
+    ACTIVE_SLOT,
+    DayStats,
+    UsageReportCache,
+    scan_session_activity,
+    summarize,
+)
+
+# Noon UTC, so every entry of a test falls on the same local day in most zones
+NOON = 1735732800.0
+
+
+def _stamp(when: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(when))
+
+
+def _prompt(when: float, text: str = "Fix bug", sidechain: bool = False) -> dict:
+    return {
+        "type": "user",
+        "isSidechain": sidechain,
+        "timestamp": _stamp(when),
+        "message": {"role": "user", "content": text},
+    }
+
+
+def _todo_write(when: float, **statuses: str) -> dict:
+    return {
+        "type": "assistant",
+        "timestamp": _stamp(when),
+        "message": {
+            "role": "assistant",
+            "content": [
+                {
+                    "type": "tool_use",
+                    "id": f"todo-{when}",
+                    "name": "TodoWrite",
+                    "input": {
+                        "todos": [
+                            {"content": content, "status": status}
+                            for content, status in statuses.items()
+                        ]
+                    },
+                }
+            ],
+        },
+    }
+
+
+def _append(path: Path, *entries: dict) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+class TestUsageReport:
+    """Test cases for activity aggregation and the report cache"""
+
+    def test_scan_counts_prompts_completions_and_active_slots(self):
+        """Test that only main-chain prompts and new completions are counted"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl"
+            _append(
+                path,
+                _prompt(NOON),
+                _prompt(NOON + 10, "Subagent task", sidechain=True),
+                _todo_write(NOON + 60, a="in_progress", b="pending"),
+                _todo_write(NOON + 900, a="completed", b="pending"),
+                _todo_write(NOON + 960, a="completed", b="completed"),
+            )
+
+            aggregate = scan_session_activity(path)
+
+            assert sum(aggregate["prompts"].values()) == 1
+            assert sum(aggregate["completed"].values()) == 2
+            assert aggregate["active"] == sorted(
+                {int((NOON + t) // ACTIVE_SLOT) for t in (0, 10, 60, 900, 960)}
+            )
+
+    def test_scan_continues_after_append(self):
+        """Test that a grown file is read from the previous offset"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "s.jsonl"
+            _append(path, _todo_write(NOON, a="completed"))
+            aggregate = scan_session_activity(path)
+            offset = aggregate["offset"]
+
+            _append(path, _todo_write(NOON + 60, a="completed"), _prompt(NOON + 90))
+            with patch.object(
+                usage_report.JSONLParser,
+                "_parse_timestamp",
+                autospec=True,
+                side_effect=usage_report.JSONLParser._parse_timestamp,
+            ) as parse:
+                aggregate = scan_session_activity(path, aggregate)
+
+            assert parse.call_count == 2  # only the appended lines
+            assert aggregate["offset"] > offset
+            # The todo was already completed before the append
+            assert sum(aggregate["completed"].values()) == 1
+            assert sum(aggregate["prompts"].values()) == 1
+
+    def test_summarize_merges_sessions_per_day(self):
+        """Test that overlapping sessions count their active time once"""
+        slot = int(NOON // ACTIVE_SLOT)
+        first = {
+            "prompts": {str(slot): 2},
+            "completed": {str(slot + 1): 1},
+            "active": [slot, slot + 1],
+        }
+        second = {"prompts": {str(slot + 1): 1}, "completed": {}, "active": [slot + 1]}
+        old = {"prompts": {"1": 5}, "completed": {}, "active": [1]}
+
+        report = summarize(
+            {"-work-app": [first, second, old], "-work-idle": [old]},
+            since=NOON - 3600,
+            until=NOON + 3600,
+        )
+
+        day = time.strftime("%Y-%m-%d", time.localtime(NOON))
+        assert report == {
+            "-work-app": [DayStats(day, 2, 3, 1, round(2 * ACTIVE_SLOT / 3600, 2))]
+        }
+
+    def test_report_rescans_only_changed_files(self):
+        """Test that unchanged files are answered from the saved cache"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            (projects_dir / "-work-a").mkdir(parents=True)
+            (projects_dir / "-work-b").mkdir(parents=True)
+            a = projects_dir / "-work-a" / "one.jsonl"
+            b = projects_dir / "-work-b" / "two.jsonl"
+            stale = projects_dir / "-work-b" / "stale.jsonl"
+            now = time.time()
+            _append(a, _prompt(now - 600))
+            _append(b, _prompt(now - 300))
+            _append(stale, _prompt(now - 30 * 86400))
+            os.utime(stale, (now - 30 * 86400, now - 30 * 86400))
+            cache_path = Path(tmp) / "usage_report.json"
+
+            report = UsageReportCache(cache_path, projects_dir).report(
+                now - 86400, workers=1
+            )
+            assert set(report) == {"-work-a", "-work-b"}
+            assert sum(s.prompts for s in report["-work-b"]) == 1
+
+            _append(b, _prompt(now - 60))
+            cache = UsageReportCache(cache_path, projects_dir)
+            with patch.object(
+                usage_report,
+                "scan_session_activity",
+                wraps=usage_report.scan_session_activity,
+            ) as scan:
+                report = cache.report(now - 86400, workers=1)
+
+            assert [call.args[0] for call in scan.call_args_list] == [b]
+            assert sum(s.prompts for s in report["-work-b"]) == 2
+            assert str(stale) not in cache.files
+
+    def test_report_reads_compacted_sessions_from_their_summary(self):
+        """Test that a summarized session is not reparsed and counts the same"""
+        with tempfile.TemporaryDirectory() as tmp:
+            projects_dir = Path(tmp) / "projects"
+            (projects_dir / "-work-a").mkdir(parents=True)
+            path = projects_dir / "-work-a" / "one.jsonl"
+            now = time.time()
+            _append(
+                path,
+                _prompt(now - 900),
+                _prompt(now - 890, "Subagent task", sidechain=True),
+                _todo_write(now - 800, a="in_progress"),
+                _todo_write(now - 400, a="completed"),
+            )
+            archive = SessionArchive(Path(tmp) / "archive", projects_dir)
+            assert archive.compact(finished_after=0).sessions == 1
+
+            scanned = scan_session_activity(path)
+            cache = UsageReportCache(Path(tmp) / "usage.json", projects_dir, archive)
+            with patch.object(usage_report, "scan_session_activity") as scan:
+                report = cache.report(now - 86400, workers=1)
+                scan.assert_not_called()
+
+            aggregate = cache.files[str(path)]
+            for key in ("offset", "prompts", "completed", "active", "statuses"):
+                assert aggregate[key] == scanned[key]
+            assert sum(s.prompts for s in report["-work-a"]) == 1
+            assert sum(s.todos_completed for s in report["-work-a"]) == 1
+
+            # A resumed session continues from the end of its summary
+            _append(path, _prompt(now - 60))
+            report = cache.report(now - 86400, workers=1)
+            assert sum(s.prompts for s in report["-work-a"]) == 2